@@ -1,27 +1,330 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Literal, NamedTuple, Optional, Tuple
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from transformers import AutoModelForCausalLM, AutoTokenizer
+from transformers import LogitsProcessor, LogitsProcessorList, StoppingCriteria, StoppingCriteriaList
 import torch
+import numpy as np
 import json
 import re
 import logging
 import os
+import atexit
+import asyncio
+import bisect
+import math
+import queue
+import random
+import threading
+import time
+import copy
+import hashlib
+import sqlite3
+import sys
+import signal
+import socket
+import unicodedata
+import uuid
+import zlib
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 
 # Suppress transformers warnings
 logging.getLogger("transformers").setLevel(logging.ERROR)
 
 app = FastAPI(title="Grievance Classification API", version="1.0")
 
+# ========================
+# CONFIGURATION
+# ========================
+
+# Model directory (defaults to local_model/ next to api.py; the Hub model is used when it is missing)
+MODEL_PATH = os.getenv("MODEL_PATH", "")
+
+# Micro-batching: concurrent /classify and /explain calls are grouped into one generate pass
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "10"))
+
+# /classify/batch: items are sorted by token length and generated in chunks of this size. Chunks are
+# queued as earlier ones finish, at most BATCH_CHUNKS_IN_FLIGHT at a time, and the whole list has
+# BATCH_DEADLINE_SECONDS (the backend waits 60s for a batch)
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "16"))
+BATCH_DEADLINE_SECONDS = float(os.getenv("BATCH_DEADLINE_SECONDS", "60"))
+BATCH_CHUNKS_IN_FLIGHT = 2
+
+# Admission control: work waiting for the model beyond this is rejected with 503 + Retry-After,
+# and work older than the deadline (the backend gives up after 30s) is dropped unprocessed
+INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", "64"))
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "30"))
+
+# Reuse precomputed past_key_values for the constant system prompt prefix
+PREFIX_CACHE_ENABLED = os.getenv("PREFIX_CACHE", "1") == "1"
+
+# CPU inference backend: "fp32", "int8" (dynamic quantization of Linear layers),
+# "bf16" (CPUs with AVX512-BF16/AMX) or "onnx" (ONNX Runtime, needs optimum[onnxruntime])
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "fp32")
+INFERENCE_BACKENDS = ("fp32", "int8", "bf16", "onnx")
+
+# Decoding: "free" (EOS only), "stop" (stop once the answer is complete),
+# "constrained" (also mask tokens so the JSON always parses; no strict retry)
+DECODING_MODE = os.getenv("DECODING_MODE", "stop")
+MAX_NEW_TOKENS = int(os.getenv("MAX_NEW_TOKENS", "256"))
+
+# Prompt encoding: the chat template around the complaint is tokenized once per prompt variant and
+# complaints are tokenized alone, cut to MAX_COMPLAINT_TOKENS so one huge complaint cannot inflate
+# prefill time and padding for the whole batch it lands in
+MAX_COMPLAINT_TOKENS = int(os.getenv("MAX_COMPLAINT_TOKENS", "512"))
+# Recently tokenized complaints, so length bucketing and prompt building share one tokenization
+COMPLAINT_IDS_CACHE_SIZE = 4096
+
+# Classifier mode: "generate" (free-form decoding + parsing) or "score" (label log-likelihood)
+CLASSIFIER_MODE = os.getenv("CLASSIFIER_MODE", "generate")
+CATEGORY_SCORE_THRESHOLD = float(os.getenv("CATEGORY_SCORE_THRESHOLD", "0.3"))
+MAX_SCORED_CATEGORIES = int(os.getenv("MAX_SCORED_CATEGORIES", "3"))
+
+# Key triggers for /classify?explain=true and /explain: occlusion scoring of at most this many
+# complaint spans, all in one batched forward pass
+EXPLAIN_MAX_SPANS = int(os.getenv("EXPLAIN_MAX_SPANS", "12"))
+MAX_KEY_TRIGGERS = 5
+
+# Classification result cache (in-memory LRU, optionally persisted to SQLite)
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "86400"))
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", "")
+
+# Near-duplicate reuse (generate mode): a complaint whose prefill embedding has at least this cosine
+# similarity with a recently classified one reuses its classification. Off (0) by default: the
+# right threshold depends on the model, so pick it with scripts/dedup_report.py on real traffic
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0"))
+DEDUP_MAX_ENTRIES = int(os.getenv("DEDUP_MAX_ENTRIES", "4096"))
+
+# Cascade: a hashed n-gram logistic model distilled from logged classifications
+# (scripts/train_cascade.py) answers "generate" requests whose every decision is at least
+# CASCADE_THRESHOLD confident (unset: the threshold chosen at training); the rest go to the SLM.
+# Off while the model file does not exist
+CASCADE_MODEL_PATH = os.getenv("CASCADE_MODEL_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cascade_model.npz"))
+CASCADE_THRESHOLD = os.getenv("CASCADE_THRESHOLD", "")
+
+# /chat: replies are decoded in slices of CHAT_SLICE_TOKENS at low priority on the shared executor,
+# so classification batches run between slices. Conversations keep their message history (up to
+# CHAT_MAX_SESSIONS; idle ones expire) and the KV cache of their last turn, dropped least recently
+# used first once all caches together exceed CHAT_KV_CACHE_TOKENS
+CHAT_MAX_NEW_TOKENS = int(os.getenv("CHAT_MAX_NEW_TOKENS", "256"))
+CHAT_SLICE_TOKENS = int(os.getenv("CHAT_SLICE_TOKENS", "16"))
+CHAT_MAX_CONTEXT_TOKENS = int(os.getenv("CHAT_MAX_CONTEXT_TOKENS", "1024"))
+CHAT_MAX_SESSIONS = int(os.getenv("CHAT_MAX_SESSIONS", "256"))
+CHAT_SESSION_TTL_SECONDS = float(os.getenv("CHAT_SESSION_TTL_SECONDS", "1800"))
+CHAT_KV_CACHE_TOKENS = int(os.getenv("CHAT_KV_CACHE_TOKENS", "8192"))
+
+# Asynchronous jobs (POST /jobs): complaints and results are persisted in JOBS_DB_PATH and classified
+# in the background JOB_CHUNK_SIZE at a time at low priority; unfinished jobs resume after a restart
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs.db"))
+JOB_CHUNK_SIZE = int(os.getenv("JOB_CHUNK_SIZE", "32"))
+JOB_MAX_ITEMS = int(os.getenv("JOB_MAX_ITEMS", "100000"))
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", str(7 * 86400)))
+JOB_POLL_SECONDS = 1.0
+
+# Routing / SLA / escalation / anonymity rules; the file is re-read when its mtime changes
+POLICY_PATH = os.getenv("POLICY_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "policy.json"))
+POLICY_RELOAD_SECONDS = float(os.getenv("POLICY_RELOAD_SECONDS", "5"))
+
+# Slow-request profiler: while requests are in flight, sample every thread's stack every
+# PROFILE_INTERVAL_MS and write collapsed stacks (flamegraph.pl / speedscope input) for any
+# request slower than PROFILE_SLOW_MS to PROFILE_DIR; 0 disables
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+
+# Logging: records are queued and formatted/written by a background thread. LOG_SAMPLE_RATE is the
+# share of per-request lines (raw outputs, parse and fallback details) kept; startup, reload and
+# warning/error lines are always kept. LOG_FORMAT is "text" ("[TAG] message") or "json" (one object per line)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+
+# Capture: one JSON line per classified complaint (complaint hash, raw output, parsed result, latency,
+# path taken) appended off the request thread to CAPTURE_PATH, rotated at CAPTURE_MAX_BYTES keeping
+# CAPTURE_BACKUPS old files; unset disables. Forked workers write CAPTURE_PATH with a .<worker> suffix
+CAPTURE_PATH = os.getenv("CAPTURE_PATH", "")
+CAPTURE_MAX_BYTES = int(os.getenv("CAPTURE_MAX_BYTES", str(64 * 1024 * 1024)))
+CAPTURE_BACKUPS = int(os.getenv("CAPTURE_BACKUPS", "5"))
+
+# Serving (`python api.py`): SERVE_WORKERS > 1 loads the weights once and forks workers that
+# share them copy-on-write; threads per worker default to physical cores / workers
+API_PORT = int(os.getenv("API_PORT", "8000"))
+SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", "1"))
+SERVE_THREADS_PER_WORKER = int(os.getenv("SERVE_THREADS_PER_WORKER", "0"))
+
+# ========================
+# LOGGING
+# ========================
+
+# Lifecycle messages (startup, reloads, job progress) are always written; per-request
+# details go through request_log, which keeps LOG_SAMPLE_RATE of them below WARNING
+log = logging.getLogger("complaint_api")
+request_log = logging.getLogger("complaint_api.request")
+capture_log = logging.getLogger("complaint_api.capture")
+
+LOG_QUEUE_SIZE = 10000
+
+class SamplingFilter(logging.Filter):
+    """Keep a random share of records below WARNING"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or self.rate >= 1 or random.random() < self.rate
+
+class JsonLogFormatter(logging.Formatter):
+    """One JSON object per record; a leading "[TAG]" in the message becomes the tag field"""
+
+    TAG_PATTERN = re.compile(r"^\[([A-Z_]+)\]\s*")
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "pid": record.process,
+        }
+        match = self.TAG_PATTERN.match(message)
+        if match:
+            entry["tag"] = match.group(1)
+            message = message[match.end():]
+        entry["message"] = message
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+class CaptureFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.capture, ensure_ascii=False, default=str)
+
+class DeferredQueueHandler(QueueHandler):
+    """Hand records to the listener thread as-is: %-formatting and JSON encoding happen there,
+    and a full queue drops the record instead of blocking the request thread"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+_log_handler = DeferredQueueHandler(_log_queue)
+_log_listener: Optional[QueueListener] = None
+
+def start_logging(capture_path: str = CAPTURE_PATH):
+    """Start the background thread that formats and writes queued log and capture records"""
+    global _log_listener
+    if _log_listener is not None:
+        return
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(JsonLogFormatter() if LOG_FORMAT == "json" else logging.Formatter("%(message)s"))
+    console.addFilter(lambda record: record.name != capture_log.name)
+    handlers = [console]
+    if capture_path:
+        capture_dir = os.path.dirname(os.path.abspath(capture_path))
+        os.makedirs(capture_dir, exist_ok=True)
+        capture = RotatingFileHandler(capture_path, maxBytes=CAPTURE_MAX_BYTES, backupCount=CAPTURE_BACKUPS,
+                                      encoding="utf-8", delay=True)
+        capture.setFormatter(CaptureFormatter())
+        capture.addFilter(lambda record: record.name == capture_log.name)
+        handlers.append(capture)
+    _log_listener = QueueListener(_log_queue, *handlers)
+    _log_listener.start()
+
+def stop_logging():
+    """Flush queued records and stop the writer thread (before fork, and at exit)"""
+    global _log_listener
+    if _log_listener is None:
+        return
+    _log_listener.stop()
+    for handler in _log_listener.handlers:
+        handler.close()
+    _log_listener = None
+
+log.setLevel(LOG_LEVEL)
+log.propagate = False
+log.addHandler(_log_handler)
+request_log.addFilter(SamplingFilter(LOG_SAMPLE_RATE))
+# Capture records are not log lines: LOG_LEVEL does not apply to them
+capture_log.setLevel(logging.INFO)
+start_logging()
+atexit.register(stop_logging)
+
+def capture_enabled() -> bool:
+    return bool(CAPTURE_PATH)
+
+def capture_classification(complaint: str, raw_output: Optional[str], result: dict, latency_ms: float,
+                           path: str, **extra):
+    """Queue one capture record; path is how the result was produced (json/native/retry/fallback/score)"""
+    record = {
+        "ts": round(time.time(), 3),
+        "complaint_hash": hashlib.sha256(ClassificationCache.normalize(complaint).encode("utf-8")).hexdigest(),
+        "path": path,
+        "latency_ms": round(latency_ms, 2),
+        "raw_output": raw_output,
+        "result": result,
+    }
+    record.update(extra)
+    capture_log.info("capture", extra={"capture": record})
+
 # ========================
 # PYDANTIC MODELS
 # ========================
 
+ClassifierMode = Literal["generate", "score"]
+
 class ClassifyRequest(BaseModel):
     complaint: str = Field(..., min_length=1, description="Complaint text to classify")
+    mode: Optional[ClassifierMode] = Field(None, description="'generate' or 'score'; defaults to CLASSIFIER_MODE")
 
 class BatchClassifyRequest(BaseModel):
     complaints: List[str] = Field(..., min_items=1, description="List of complaints")
+    mode: Optional[ClassifierMode] = Field(None, description="'generate' or 'score'; defaults to CLASSIFIER_MODE")
+
+class JobRequest(BaseModel):
+    complaints: List[str] = Field(..., min_items=1, description="Complaints to classify")
+    ids: Optional[List[str]] = Field(None, description="Optional caller ids, returned with each result")
+    mode: Optional[ClassifierMode] = Field(None, description="'generate' or 'score'; defaults to CLASSIFIER_MODE")
+
+class ChatRequest(BaseModel):
+    message: str = Field(..., min_length=1, description="User message")
+    conversation_id: Optional[str] = Field(None, description="Continue a conversation (id returned by an earlier reply)")
+    remember: bool = Field(
+        False, description="Start a conversation kept server-side so later turns can continue it; one-shot otherwise"
+    )
+    stream: Optional[Literal["sse", "ndjson"]] = Field(
+        None, description="Stream tokens as SSE or NDJSON (also chosen by the Accept header); plain JSON otherwise"
+    )
+
+class ChatResponse(BaseModel):
+    response: str
+    conversation_id: Optional[str] = None
+
+class ExplainResponse(BaseModel):
+    summary_reason: str
+    key_triggers: List[str]
 
 class ClassificationResponse(BaseModel):
     categories: List[str]
@@ -30,34 +333,785 @@ class ClassificationResponse(BaseModel):
     escalation_required: bool
     route_to: str
     sla_hours: int
+    confidence: Optional[Dict[str, Dict[str, float]]] = None  # label probabilities ("score" mode only)
+    explanation: Optional[ExplainResponse] = None  # /classify?explain=true only
+    duplicate_group: Optional[str] = None  # near-duplicate group id (see /duplicates)
 
-class ExplainResponse(BaseModel):
-    summary_reason: str
-    key_triggers: List[str]
+# ========================
+# METRICS
+# ========================
+
+def _format_labels(labelnames: Tuple[str, ...], values: tuple, le: Optional[str] = None) -> str:
+    pairs = []
+    for name, value in zip(labelnames, values):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{escaped}"')
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class CounterMetric:
+    """Monotonic counter with optional labels (Prometheus text format)"""
+    
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value:g}")
+        return lines
+
+class HistogramMetric:
+    """Cumulative-bucket histogram with optional labels (Prometheus text format)"""
+    
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...], labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = labelnames
+        self._series: Dict[tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, f'{bound:g}')} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, '+Inf')} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-2]:.6f}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+class MetricsRegistry:
+    """In-process metrics rendered on /metrics; gauges are read from callbacks at scrape time"""
+    
+    def __init__(self):
+        self._metrics: List = []
+        self._gauges: List[tuple] = []  # (name, help, callback returning a number)
+    
+    def counter(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> CounterMetric:
+        metric = CounterMetric(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+    
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...],
+                  labelnames: Tuple[str, ...] = ()) -> HistogramMetric:
+        metric = HistogramMetric(name, help_text, buckets, labelnames)
+        self._metrics.append(metric)
+        return metric
+    
+    def gauge(self, name: str, help_text: str, callback):
+        self._gauges.append((name, help_text, callback))
+    
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, help_text, callback in self._gauges:
+            try:
+                value = float(callback())
+            except Exception:
+                continue
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value:g}"])
+        return "\n".join(lines) + "\n"
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+metrics = MetricsRegistry()
+STAGE_SECONDS = metrics.histogram(
+    "complaint_stage_seconds",
+    "Time per pipeline stage (template, tokenize, prefill, decode, parse, strict_retry, fallback, extend, ...)",
+    LATENCY_BUCKETS, ("stage",),
+)
+QUEUE_WAIT_SECONDS = metrics.histogram(
+    "complaint_queue_wait_seconds", "Time model work waited in the inference queue", LATENCY_BUCKETS,
+)
+BATCH_SIZE = metrics.histogram(
+    "complaint_batch_size", "Complaints per micro-batched classification pass", (1, 2, 4, 8, 16, 32, 64),
+)
+DECODE_TOKENS_PER_SECOND = metrics.histogram(
+    "complaint_decode_tokens_per_second", "Generated tokens per second of decode time, per generate pass",
+    (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000),
+)
+PROMPT_TOKENS = metrics.counter("complaint_prompt_tokens_total", "Prompt tokens fed to the model (excluding padding)")
+TRUNCATED_COMPLAINTS = metrics.counter(
+    "complaint_truncated_complaints_total", "Complaints cut to MAX_COMPLAINT_TOKENS before prompting",
+)
+QUEUE_REJECTED = metrics.counter("complaint_queue_rejected_total", "Requests rejected because the queue was full")
+QUEUE_EXPIRED = metrics.counter("complaint_queue_expired_total", "Work dropped after its deadline passed")
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency", LATENCY_BUCKETS, ("method", "path", "status"),
+)
+# Mirrors ComplaintClassifier.decode_stats (retry rate = retries / first_pass_items)
+DECODE_COUNTERS = {
+    "sequences": metrics.counter("complaint_generated_sequences_total", "Sequences generated"),
+    "generated_tokens": metrics.counter("complaint_generated_tokens_total", "Tokens generated (up to EOS)"),
+    "first_pass_items": metrics.counter("complaint_first_pass_items_total", "Complaints given a first generate pass"),
+    "retries": metrics.counter("complaint_strict_retries_total", "Complaints retried with the strict prompt"),
+    "fallbacks": metrics.counter("complaint_fallbacks_total", "Complaints answered by the keyword fallback"),
+}
+
+@contextmanager
+def stage_timer(stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage=stage)
+
+class FirstTokenTimer(StoppingCriteria):
+    """Never stops generation; records when the first new token is produced (end of prefill)"""
+    
+    def __init__(self):
+        self.first_token_at: Optional[float] = None
+    
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        return torch.zeros(input_ids.shape[0], dtype=torch.bool, device=input_ids.device)
+
+class SlowRequestProfiler:
+    """
+    Sampling profiler for slow requests. While any request is in flight a daemon thread
+    records every other thread's stack (sys._current_frames) into a bounded ring; a
+    request that ends above the threshold gets the samples from its time window written
+    as collapsed stacks ("thread;frame;frame count" lines).
+    """
+    
+    def __init__(self, threshold_ms: float, interval_ms: float = 5, output_dir: str = "profiles",
+                 max_files: int = 50, window_seconds: float = 60):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.output_dir = output_dir
+        self.max_files = max_files
+        self._samples: deque = deque(maxlen=max(1, int(window_seconds / max(self.interval, 1e-4))))
+        self._active = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.profiles_written = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+    
+    @staticmethod
+    def _collapse(frame, thread_name: str) -> str:
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        return ";".join([thread_name] + frames[::-1])
+    
+    def _sample_loop(self):
+        own_id = threading.get_ident()
+        while True:
+            self._wake.wait()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            now = time.perf_counter()
+            stacks = tuple(
+                self._collapse(frame, names.get(thread_id, str(thread_id)))
+                for thread_id, frame in sys._current_frames().items() if thread_id != own_id
+            )
+            self._samples.append((now, stacks))
+            time.sleep(self.interval)
+    
+    def request_started(self) -> float:
+        with self._lock:
+            self._active += 1
+            self._wake.set()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._sample_loop, name="slow-request-profiler", daemon=True)
+                self._thread.start()
+        return time.perf_counter()
+    
+    def request_finished(self, started: float, label: str):
+        finished = time.perf_counter()
+        with self._lock:
+            self._active -= 1
+            if self._active == 0:
+                self._wake.clear()
+        if finished - started >= self.threshold:
+            try:
+                self._write(started, finished, label)
+            except OSError as e:
+                log.warning("[PROFILE] Could not write profile: %s", e)
+    
+    def _write(self, started: float, finished: float, label: str):
+        stacks = Counter(
+            stack for timestamp, sample in list(self._samples) if started <= timestamp <= finished for stack in sample
+        )
+        if not stacks:
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        safe_label = re.sub(r"[^A-Za-z0-9_.-]+", "_", label).strip("_")
+        path = os.path.join(
+            self.output_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{int((finished - started) * 1000)}ms-{safe_label}.folded"
+        )
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        self.profiles_written += 1
+        log.info("[PROFILE] Slow request %s (%.0f ms) -> %s", label, (finished - started) * 1000, path)
+        
+        profiles = sorted(
+            os.path.join(self.output_dir, name) for name in os.listdir(self.output_dir) if name.endswith(".folded")
+        )
+        for old in profiles[:-self.max_files]:
+            os.remove(old)
+
+# ========================
+# DECODING CONTROL
+# ========================
+
+SEVERITY_LEVELS = ["Critical", "High", "Normal"]
+
+# Categories the routing and anonymity rules know about (candidate set for "score" mode)
+CATEGORY_LABELS = [
+    "Workplace Harassment", "Sexual Harassment", "Abuse of Authority",
+    "Corruption or Bribery", "Fraud", "Discrimination or Bias",
+    "Retaliation", "Whistleblowing", "Safety Hazard", "Mental Health or Stress",
+    "Academic Misconduct", "Infrastructure or Facility Issue", "Service Issue", "HR",
+]
+
+# Base classifications made by the keyword fallback instead of the model carry "source": FALLBACK_SOURCE;
+# they are never cached, indexed as near-duplicates or used to train the cascade
+FALLBACK_SOURCE = "fallback"
+
+def is_fallback(classification: dict) -> bool:
+    return classification.get("source") == FALLBACK_SOURCE
+
+def is_complete_output(text: str) -> bool:
+    """True once text holds a balanced JSON object or a full 'Categories: ... | Severity: ...' line"""
+    start = text.find('{')
+    if start != -1:
+        depth = 0
+        in_string = False
+        escaped = False
+        for ch in text[start:]:
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == '\\':
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch == '{':
+                depth += 1
+            elif ch == '}':
+                depth -= 1
+                if depth == 0:
+                    return True
+    
+    # Native format: the severity word is complete once a non-word character follows it
+    return re.search(r'Categories:\s*.+?\s*\|\s*Severity:\s*\w+\W', text, re.IGNORECASE) is not None
+
+class StructuredOutputStoppingCriteria(StoppingCriteria):
+    """Stop each row as soon as its generated text is a complete, parseable answer"""
+    
+    def __init__(self, tokenizer, prompt_length: int):
+        self.tokenizer = tokenizer
+        self.prompt_length = prompt_length
+        self._done: Optional[torch.Tensor] = None
+    
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        if self._done is None:
+            self._done = torch.zeros(input_ids.shape[0], dtype=torch.bool, device=input_ids.device)
+        for row in range(input_ids.shape[0]):
+            if not self._done[row]:
+                text = self.tokenizer.decode(input_ids[row, self.prompt_length:], skip_special_tokens=True)
+                self._done[row] = is_complete_output(text)
+        return self._done.clone()
+
+class JsonOutputGrammar:
+    """
+    Character-level automaton for the classification JSON:
+    {"categories": ["...", ...], "severity": "Critical" | "High" | "Normal"}
+    The only whitespace allowed is one optional space after each ':' and ','.
+    States are immutable tuples so candidate tokens can be tried without side effects.
+    """
+    
+    SPACE = " "
+    # Phases entered right after ':' or ',' (one space may come first)
+    SPACE_BEFORE = frozenset({"list_open", "list_next", "severity_key", "severity_quote"})
+    MAX_CATEGORIES = 6
+    MAX_CATEGORY_CHARS = 64
+    
+    # (literal to match, state after it)
+    LITERALS = {
+        "open": ('{', "categories_key"),
+        "categories_key": ('"categories"', "categories_colon"),
+        "categories_colon": (':', "list_open"),
+        "list_open": ('[', "list_first"),
+        "severity_key": ('"severity"', "severity_colon"),
+        "severity_colon": (':', "severity_quote"),
+        "severity_quote": ('"', "severity_value"),
+        "close": ('}', "done"),
+    }
+    
+    INITIAL = ("open", 0, 0, 0)  # (phase, progress, space taken / category chars, categories so far)
+    
+    @staticmethod
+    def is_category_char(ch: str) -> bool:
+        return ch not in '"\\\ufffd' and ord(ch) >= 0x20
+    
+    def advance(self, state: tuple, ch: str) -> Optional[tuple]:
+        phase, progress, counter, n_categories = state
+        
+        if phase in self.LITERALS:
+            literal, next_phase = self.LITERALS[phase]
+            if progress == 0 and ch == self.SPACE:
+                return (phase, 0, 1, n_categories) if phase in self.SPACE_BEFORE and counter == 0 else None
+            if ch != literal[progress]:
+                return None
+            if progress + 1 == len(literal):
+                # The severity value tracks the typed text instead of a literal position
+                return (next_phase, "" if next_phase == "severity_value" else 0, 0, n_categories)
+            return (phase, progress + 1, 0, n_categories)
+        
+        if phase in ("list_first", "list_next", "after_item", "after_list"):
+            if ch == self.SPACE:
+                return (phase, 0, 1, n_categories) if phase in self.SPACE_BEFORE and counter == 0 else None
+            if phase in ("list_first", "list_next") and ch == '"':
+                return ("category", 0, 0, n_categories + 1) if n_categories < self.MAX_CATEGORIES else None
+            if phase in ("list_first", "after_item") and ch == ']':
+                # The category count no longer matters; dropping it keeps later states few
+                return ("after_list", 0, 0, 0)
+            if phase == "after_item" and ch == ',':
+                return ("list_next", 0, 0, n_categories)
+            if phase == "after_list" and ch == ',':
+                return ("severity_key", 0, 0, 0)
+            return None
+        
+        if phase == "category":
+            if ch == '"':
+                return ("after_item", 0, 0, n_categories) if counter > 0 else None
+            if not self.is_category_char(ch) or counter >= self.MAX_CATEGORY_CHARS:
+                return None
+            return ("category", 0, counter + 1, n_categories)
+        
+        if phase == "severity_value":
+            if ch == '"':
+                return ("close", 0, 0, n_categories) if progress in SEVERITY_LEVELS else None
+            typed = progress + ch
+            if not any(level.startswith(typed) for level in SEVERITY_LEVELS):
+                return None
+            return ("severity_value", typed, 0, n_categories)
+        
+        return None  # "done": nothing but EOS may follow
+    
+    def feed(self, state: Optional[tuple], text: str) -> Optional[tuple]:
+        for ch in text:
+            if state is None:
+                return None
+            state = self.advance(state, ch)
+        return state
+
+class GrammarTokenIndex:
+    """
+    Vocabulary masks of the tokens JsonOutputGrammar accepts in each state, built once per
+    state and reused by every generate call. Candidates are narrowed before any token is fed
+    through the automaton (by first character, or for category text by a vectorized length
+    check), so no decoding step scans the vocabulary in Python.
+    """
+    
+    def __init__(self, grammar: JsonOutputGrammar, token_strings: List[Optional[str]]):
+        self.grammar = grammar
+        self.token_strings = token_strings
+        self.size = len(token_strings)
+        self._by_first_char: Dict[str, List[int]] = {}
+        self._quoted: List[int] = []  # tokens that can end category text
+        plain_lengths = []
+        for token_id, text in enumerate(token_strings):
+            if not text:
+                plain_lengths.append(0)
+                continue
+            self._by_first_char.setdefault(text[0], []).append(token_id)
+            plain_lengths.append(len(text) if all(map(grammar.is_category_char, text)) else 0)
+            if '"' in text:
+                self._quoted.append(token_id)
+        # Tokens made only of category characters are accepted inside a category while they fit
+        self._plain_lengths = torch.tensor(plain_lengths)
+        self._masks: Dict[tuple, torch.Tensor] = {}
+        self._closing: Dict[tuple, torch.Tensor] = {}
+    
+    def _accepted(self, state: tuple, candidates) -> List[int]:
+        return [
+            token_id for token_id in candidates
+            if self.grammar.feed(state, self.token_strings[token_id]) is not None
+        ]
+    
+    def _mask_of(self, token_ids: List[int]) -> torch.Tensor:
+        mask = torch.zeros(self.size, dtype=torch.bool)
+        if token_ids:
+            mask[torch.tensor(token_ids, dtype=torch.long)] = True
+        return mask
+    
+    def mask(self, state: tuple) -> torch.Tensor:
+        """Boolean (vocab,) mask of the tokens that keep the output a valid grammar prefix"""
+        if state[0] == "category":
+            # Only the few tokens closing the text depend on the rest of the state; their ids are kept
+            closing = self._closing.get(state)
+            if closing is None:
+                closing = self._closing[state] = torch.tensor(self._accepted(state, self._quoted), dtype=torch.long)
+            limit = self.grammar.MAX_CATEGORY_CHARS - state[2]
+            mask = (self._plain_lengths > 0) & (self._plain_lengths <= limit)
+            mask[closing] = True
+            return mask
+        
+        mask = self._masks.get(state)
+        if mask is None:
+            candidates = [
+                token_id
+                for ch, token_ids in self._by_first_char.items() if self.grammar.advance(state, ch) is not None
+                for token_id in token_ids
+            ]
+            mask = self._masks[state] = self._mask_of(self._accepted(state, candidates))
+        return mask
+
+class JsonGrammarLogitsProcessor(LogitsProcessor):
+    """
+    Keep greedy decoding inside JsonOutputGrammar so the output always parses.
+    Tokens the grammar rejects in each row's state are masked (GrammarTokenIndex);
+    after the closing brace, or when no token fits, only EOS is allowed.
+    """
+    
+    def __init__(self, index: GrammarTokenIndex, eos_token_id: int, prompt_length: int):
+        self.index = index
+        self.grammar = index.grammar
+        self.token_strings = index.token_strings
+        self.eos_token_id = eos_token_id
+        self.prompt_length = prompt_length
+        self._states: Optional[List[Optional[tuple]]] = None
+        self._consumed = 0
+    
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        batch_size = input_ids.shape[0]
+        if self._states is None:
+            self._states = [self.grammar.INITIAL] * batch_size
+        
+        # Advance each row over the tokens chosen since the previous step
+        for row in range(batch_size):
+            for token_id in input_ids[row, self.prompt_length + self._consumed:].tolist():
+                state = self._states[row]
+                if state is None or state[0] == "done":
+                    break
+                text = self.token_strings[token_id] if token_id < len(self.token_strings) else None
+                self._states[row] = self.grammar.feed(state, text) if text else None
+        self._consumed = input_ids.shape[1] - self.prompt_length
+        
+        masked = torch.full_like(scores, float("-inf"))
+        width = min(scores.shape[-1], self.index.size)
+        for row in range(batch_size):
+            state = self._states[row]
+            allowed = None
+            if state is not None and state[0] != "done":
+                allowed = self.index.mask(state)[:width].to(scores.device)
+            if allowed is None or not bool(allowed.any()):
+                masked[row, self.eos_token_id] = 0.0
+            else:
+                masked[row, :width] = torch.where(allowed, scores[row, :width], masked[row, :width])
+        return masked
+
+# ========================
+# KEYWORD MATCHING
+# ========================
+
+# Declarative keyword tables: (kind, value) tag -> terms. Terms match whole words only;
+# a trailing "*" makes a stem ("harass*" matches harass, harassed, harassment) and
+# multi-word terms match across any whitespace.
+KEYWORD_TABLES: Dict[Tuple[str, str], List[str]] = {
+    # Fallback classification when the model output cannot be parsed
+    ("fallback_category", "Harassment"): [
+        "harass*", "bully*", "bullied", "abus*", "discriminat*", "threat*", "assault*", "scold*",
+    ],
+    ("fallback_category", "Infrastructure"): [
+        "water", "cooler*", "drink*", "fountain*", "ac", "air", "conditioning", "temperature*",
+        "hot", "cold", "toilet*", "bathroom*", "washroom*", "restroom*", "broken", "repair*", "maintenance",
+    ],
+    ("fallback_category", "Academic"): [
+        "grade*", "marks", "exam*", "test*", "class", "classes", "classroom*", "professor*", "teacher*",
+        "lecture*", "assignment*", "homework",
+    ],
+    ("fallback_severity", "High"): [
+        "urgent*", "critical*", "emergency", "immediately", "harass*", "assault*",
+    ],
+    # Power imbalance or fear (anonymous submission)
+    ("fear", "power imbalance"): [
+        "scared", "afraid", "fear", "fears", "feared", "fearful", "retaliat*", "threatened", "controls my", "power over",
+        "dependent on", "blackmail*",
+    ],
+    # /explain triggers
+    ("severity_trigger", "Critical"): [
+        "harass*", "abus*", "threatened", "scared", "afraid", "corrupt*", "bribe*", "bribery",
+        "fraud*", "blackmail*", "unsafe", "fire", "safety",
+    ],
+    ("severity_trigger", "High"): [
+        "repeated*", "multiple", "ongoing", "persistent*", "unresolved", "weeks", "months",
+    ],
+    ("category_trigger", "Workplace Harassment"): ["comment*", "body", "stare*", "staring", "follow*", "unwanted"],
+    ("category_trigger", "Abuse of Authority"): ["control*", "authority", "boss", "supervisor*", "power"],
+    ("category_trigger", "Corruption or Bribery"): ["pay", "money", "bribe*", "rupees", "cash"],
+    ("category_trigger", "Safety Hazard"): ["fire", "broken", "unsafe", "dangerous", "equipment"],
+    ("category_trigger", "Discrimination or Bias"): ["bias*", "discriminat*", "caste", "religion*", "gender"],
+    ("category_trigger", "Infrastructure or Facility Issue"): ["not working", "broken", "faulty", "wifi", "wi-fi"],
+}
+
+class KeywordHit(NamedTuple):
+    text: str                           # matched text, lowercased with whitespace collapsed
+    start: int                          # offsets in the scanned complaint
+    end: int
+    tags: Tuple[Tuple[str, str], ...]   # every (kind, value) tag whose term matched here
+
+class KeywordMatcher:
+    """
+    All keyword tables compiled into one word-bounded alternation regex.
+    A complaint is scanned once; each hit carries the tags of every term it matches,
+    including shorter words and stems overlapped by a longer phrase.
+    """
+    
+    SEPARATOR = "\0"
+    TAG_MEMO_SIZE = 4096  # distinct matched texts; the vocabulary is small
+    
+    def __init__(self, tables: Dict[Tuple[str, str], List[str]]):
+        self._exact: Dict[str, List[Tuple[str, str]]] = {}
+        self._stems: Dict[str, List[Tuple[str, str]]] = {}
+        self._tag_memo: Dict[str, Tuple[Tuple[str, str], ...]] = {}
+        trie: dict = {}
+        for tag, terms in tables.items():
+            for term in terms:
+                is_stem = term.endswith("*")
+                words = term.rstrip("*").lower().split()
+                target = self._stems if is_stem else self._exact
+                tags = target.setdefault(" ".join(words), [])
+                if tag not in tags:
+                    tags.append(tag)
+                units = list(" ".join(words)) + (["*"] if is_stem else [])
+                node = trie
+                for unit in units:
+                    node = node.setdefault(unit, {})
+                node[""] = True  # end of a term
+        
+        # The alternation is factored into a prefix trie so each position is tried in
+        # one pass over shared prefixes instead of once per term
+        self.pattern = re.compile(rf"(?<!\w){self._trie_regex(trie)}(?!\w)", re.IGNORECASE)
+    
+    @classmethod
+    def _trie_regex(cls, node: dict) -> str:
+        branches = []
+        for unit in sorted(key for key in node if key and key != "*"):
+            piece = r"\s+" if unit == " " else re.escape(unit)
+            branches.append(piece + cls._trie_regex(node[unit]))
+        # Longer continuations first so phrases win over their first word or a stem
+        if "*" in node:
+            branches.append(r"\w*")
+        if "" in node:
+            branches.append("")
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+    
+    def _tags_for(self, text: str) -> Tuple[Tuple[str, str], ...]:
+        cached = self._tag_memo.get(text)
+        if cached is not None:
+            return cached
+        tags = []
+        for end in range(1, len(text) + 1):
+            prefix = text[:end]
+            candidates = self._stems.get(prefix, [])
+            if end == len(text) or not text[end].isalnum():
+                candidates = candidates + self._exact.get(prefix, [])
+            for tag in candidates:
+                if tag not in tags:
+                    tags.append(tag)
+        tags = tuple(tags)
+        if len(self._tag_memo) < self.TAG_MEMO_SIZE:
+            self._tag_memo[text] = tags
+        return tags
+    
+    def _hit(self, match: "re.Match", base: int = 0) -> KeywordHit:
+        matched = match.group().lower()
+        if " " in matched or not matched.isalnum():
+            matched = " ".join(matched.split())
+        return KeywordHit(matched, match.start() - base, match.end() - base, self._tags_for(matched))
+    
+    def find(self, text: str) -> List[KeywordHit]:
+        """Every keyword hit in one complaint, in text order"""
+        return [self._hit(match) for match in self.pattern.finditer(text)]
+    
+    def find_many(self, texts: List[str]) -> List[List[KeywordHit]]:
+        """Hits for a batch of complaints from a single sweep over the joined texts"""
+        offsets = []
+        position = 0
+        for text in texts:
+            offsets.append(position)
+            position += len(text) + len(self.SEPARATOR)
+        
+        results: List[List[KeywordHit]] = [[] for _ in texts]
+        for match in self.pattern.finditer(self.SEPARATOR.join(texts)):
+            index = bisect.bisect_right(offsets, match.start()) - 1
+            results[index].append(self._hit(match, offsets[index]))
+        return results
+    
+    @staticmethod
+    def values(hits: List[KeywordHit], kind: str) -> List[str]:
+        """Distinct tag values of one kind, in order of first hit"""
+        found = []
+        for hit in hits:
+            for tag_kind, value in hit.tags:
+                if tag_kind == kind and value not in found:
+                    found.append(value)
+        return found
+    
+    @staticmethod
+    def triggers(hits: List[KeywordHit], kind: str, value: str) -> List[str]:
+        """Distinct matched texts carrying a given tag"""
+        found = []
+        for hit in hits:
+            if (kind, value) in hit.tags and hit.text not in found:
+                found.append(hit.text)
+        return found
+
+keyword_matcher = KeywordMatcher(KEYWORD_TABLES)
 
 # ========================
 # MODEL WRAPPER
 # ========================
 
+def cpu_supports_bf16() -> bool:
+    """True when the CPU has native bf16 matmul (otherwise bf16 is emulated and slower than fp32)"""
+    for check in ("_is_avx512_bf16_supported", "_is_amx_tile_supported"):
+        is_supported = getattr(torch.cpu, check, None)
+        if is_supported is not None and is_supported():
+            return True
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+        return "avx512_bf16" in flags or "amx_bf16" in flags
+    except OSError:
+        return False
+
 class ComplaintClassifier:
-    def __init__(self, model_id: str = "smolify/smolified-complaint-classification"):
+    def __init__(self, model_id: str = "smolify/smolified-complaint-classification", backend: Optional[str] = None):
         # Check for local model directory
-        local_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "local_model")
+        local_path = MODEL_PATH or os.path.join(os.path.dirname(os.path.abspath(__file__)), "local_model")
         
         if os.path.exists(local_path) and os.path.isdir(local_path):
-            print(f"[INIT] Loading model from local directory: {local_path}")
+            log.info("[INIT] Loading model from local directory: %s", local_path)
             model_to_load = local_path
         else:
-            print(f"[INIT] Local model not found at {local_path}. Loading from Hub: {model_id}")
+            log.info("[INIT] Local model not found at %s. Loading from Hub: %s", local_path, model_id)
             model_to_load = model_id
-            
+        
+        self.model_source = model_to_load
+        self.backend = backend or INFERENCE_BACKEND
+        if self.backend not in INFERENCE_BACKENDS:
+            raise ValueError(f"Unknown INFERENCE_BACKEND '{self.backend}', expected one of {INFERENCE_BACKENDS}")
+        if self.backend == "bf16" and not cpu_supports_bf16():
+            log.warning("[INIT] CPU has no native bf16 support, using fp32")
+            self.backend = "fp32"
+        
         self.tokenizer = AutoTokenizer.from_pretrained(model_to_load)
-        self.model = AutoModelForCausalLM.from_pretrained(
+        self.model = self._load_model(model_to_load, local_path)
+        
+        # ONNX Runtime sessions cannot take a copied/expanded KV cache
+        self.supports_kv_reuse = self.backend != "onnx"
+        
+        # Batched generation needs left padding so every prompt ends right before the reply
+        self.tokenizer.padding_side = "left"
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        
+        # Model + prompt version; cached results from another namespace are never reused
+        prompts = self._get_system_prompt(strict=False) + self._get_system_prompt(strict=True)
+        prompt_version = hashlib.sha256(prompts.encode("utf-8")).hexdigest()[:12]
+        self.decoding_mode = DECODING_MODE
+        self.cache_namespace = f"{self.model_source}|{self.backend}|{prompt_version}|{self.decoding_mode}"
+        self._grammar = JsonOutputGrammar()
+        self._token_strings: Optional[List[Optional[str]]] = None
+        self._grammar_index: Optional[GrammarTokenIndex] = None
+        self._chat_stop_id_set: Optional[set] = None
+        self._complaint_ids: "OrderedDict[str, List[int]]" = OrderedDict()
+        self._complaint_ids_lock = threading.Lock()
+        
+        # Counters for comparing decoding modes (tokens per answer, retry rate)
+        self._stats_lock = threading.Lock()
+        self.decode_stats = self._empty_decode_stats()
+        
+        # Token ids of the chat template before/after the complaint, one per prompt variant
+        self._prompt_templates = {strict: self._build_prompt_template(strict) for strict in (False, True)}
+        
+        # Tokenized system prompt prefix + its KV cache, one per prompt variant
+        self._prefix_caches = {}
+        if PREFIX_CACHE_ENABLED and self.supports_kv_reuse:
+            for strict in (False, True):
+                self._prefix_caches[strict] = self._build_prefix_cache(strict)
+        
+    def _load_model(self, model_to_load: str, local_path: str):
+        """Load the weights for the selected backend"""
+        log.info("[INIT] Inference backend: %s", self.backend)
+        
+        if self.backend == "onnx":
+            try:
+                from optimum.onnxruntime import ORTModelForCausalLM
+            except ImportError:
+                raise RuntimeError("INFERENCE_BACKEND=onnx requires: pip install optimum[onnxruntime]")
+            
+            # The exported graph is cached next to the weights so export runs only once
+            onnx_path = os.path.join(local_path, "onnx")
+            if os.path.exists(os.path.join(onnx_path, "model.onnx")):
+                return ORTModelForCausalLM.from_pretrained(onnx_path)
+            log.info("[INIT] Exporting ONNX graph to %s (one-time)", onnx_path)
+            model = ORTModelForCausalLM.from_pretrained(model_to_load, export=True)
+            model.save_pretrained(onnx_path)
+            return model
+        
+        if os.path.isdir(model_to_load) and not any(name.endswith(".safetensors") for name in os.listdir(model_to_load)):
+            log.info("[INIT] No .safetensors weights found; run scripts/download_model.py --convert for faster, mmap'd loading")
+        
+        # safetensors files are memory-mapped; low_cpu_mem_usage avoids a second full copy while loading
+        model = AutoModelForCausalLM.from_pretrained(
             model_to_load,
             device_map="auto",
-            torch_dtype=torch.float32
+            torch_dtype=torch.bfloat16 if self.backend == "bf16" else torch.float32,
+            low_cpu_mem_usage=True,
         )
         
+        if self.backend == "int8":
+            from torch.ao.quantization import quantize_dynamic
+            model = quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        
+        return model
+    
     def _extract_json(self, text: str) -> Optional[dict]:
         """Extract JSON object from text"""
         try:
@@ -111,58 +1165,384 @@ class ComplaintClassifier:
         base += "Now output the JSON:"
         return base
     
+    def _get_chat_system_prompt(self) -> str:
+        return (
+            "You are the assistant of a grievance redressal and incident reporting portal.\n"
+            "Help users describe their complaint, and answer questions about complaint categories, "
+            "severity, routing and resolution times briefly and politely."
+        )
+    
     def _generate(self, complaint: str, strict: bool = False) -> str:
-        """Generate model output (original working method)"""
+        """Generate model output for a single complaint"""
+        return self._generate_batch([complaint], strict=strict)[0]
+    
+    def _render_prompt(self, complaint: str, strict: bool = False) -> str:
+        """Apply the chat template for one complaint"""
         messages = [
             {"role": "system", "content": self._get_system_prompt(strict)},
             {"role": "user", "content": complaint}
         ]
+        with stage_timer("template"):
+            return self.tokenizer.apply_chat_template(
+                messages,
+                tokenize=False,
+                add_generation_prompt=True,
+            )
+    
+    def _build_prompt_template(self, strict: bool) -> Optional[dict]:
+        """
+        Tokenize the rendered prompt around the complaint once: head_ids (system prompt and
+        user turn header) and tail_ids (end of user turn, assistant header). exact is True when
+        head + complaint + tail token ids match tokenizing the whole rendered prompt, so prompts
+        can be assembled from ids. Returns None when the template cannot be split around the user turn.
+        """
+        sentinel = "<<COMPLAINT>>"
+        rendered = self._render_prompt(sentinel, strict)
+        if rendered.count(sentinel) != 1:
+            return None
         
-        text = self.tokenizer.apply_chat_template(
-            messages,
-            tokenize=False,
-            add_generation_prompt=True,
+        head, tail = rendered.split(sentinel)
+        head_ids = self.tokenizer(head)["input_ids"]
+        if not head_ids:
+            return None
+        tail_ids = self.tokenizer(tail, add_special_tokens=False)["input_ids"]
+        
+        # Templates that trim the message, or tokens merging across the boundaries, break assembly
+        probes = ["Water is leaking from the ceiling in room 12.", " The lab PC crashed again!\n"]
+        exact = all(
+            head_ids + self.tokenizer(probe, add_special_tokens=False)["input_ids"] + tail_ids
+            == self.tokenizer(self._render_prompt(probe, strict))["input_ids"]
+            for probe in probes
         )
+        if not exact:
+            log.info("[INIT] Prompt template does not tokenize in pieces; prompts are tokenized whole")
+        return {"head_ids": head_ids, "tail_ids": tail_ids, "exact": exact}
+    
+    def _encode_complaints(self, complaints: List[str]) -> List[List[int]]:
+        """
+        Complaint token ids (no special tokens), each cut to MAX_COMPLAINT_TOKENS. Recent
+        complaints are remembered, so bucket_by_length() and the prompt built for the same
+        request tokenize each complaint once; only the rest go through one tokenizer call.
+        """
+        with self._complaint_ids_lock:
+            encoded = [self._complaint_ids.get(complaint) for complaint in complaints]
+            for complaint, ids in zip(complaints, encoded):
+                if ids is not None:
+                    self._complaint_ids.move_to_end(complaint)
         
-        inputs = self.tokenizer(text, return_tensors="pt").to(self.model.device)
+        missing = list(dict.fromkeys(
+            complaint for complaint, ids in zip(complaints, encoded) if ids is None
+        ))
+        if missing:
+            if MAX_COMPLAINT_TOKENS <= 0:
+                fresh = self.tokenizer(missing, add_special_tokens=False)["input_ids"]
+            else:
+                # One token over the budget tells which complaints were cut
+                fresh = self.tokenizer(
+                    missing, add_special_tokens=False, truncation=True, max_length=MAX_COMPLAINT_TOKENS + 1,
+                )["input_ids"]
+                truncated = sum(len(ids) > MAX_COMPLAINT_TOKENS for ids in fresh)
+                if truncated:
+                    TRUNCATED_COMPLAINTS.inc(truncated)
+                fresh = [ids[:MAX_COMPLAINT_TOKENS] for ids in fresh]
+            
+            tokenized = dict(zip(missing, fresh))
+            with self._complaint_ids_lock:
+                self._complaint_ids.update(tokenized)
+                while len(self._complaint_ids) > COMPLAINT_IDS_CACHE_SIZE:
+                    self._complaint_ids.popitem(last=False)
+            encoded = [ids if ids is not None else tokenized[complaint] for complaint, ids in zip(complaints, encoded)]
         
-        # Simple generation without scores (this works!)
+        # Copies, so callers cannot change the remembered ids
+        return [list(ids) for ids in encoded]
+    
+    def encode_prompts(self, complaints: List[str], strict: bool = False) -> List[List[int]]:
+        """
+        Prompt token ids for each complaint. Only the complaints are tokenized, in one batch
+        call, and joined to the cached template ids; templates that do not tokenize in pieces
+        are rendered and tokenized whole. Complaints are cut to MAX_COMPLAINT_TOKENS either way.
+        """
+        template = self._prompt_templates.get(strict)
+        with stage_timer("tokenize"):
+            bodies = self._encode_complaints(complaints)
+            if template is not None and template["exact"]:
+                head_ids, tail_ids = template["head_ids"], template["tail_ids"]
+                return [head_ids + body + tail_ids for body in bodies]
+            
+            if MAX_COMPLAINT_TOKENS > 0:
+                complaints = [
+                    self.tokenizer.decode(body) if len(body) == MAX_COMPLAINT_TOKENS else complaint
+                    for complaint, body in zip(complaints, bodies)
+                ]
+            return self.tokenizer([self._render_prompt(complaint, strict) for complaint in complaints])["input_ids"]
+    
+    def _pad_batch(self, encoded: List[List[int]]) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Left-pad token id lists into (input_ids, attention_mask) tensors"""
+        width = max(len(ids) for ids in encoded)
+        pad_id = self.tokenizer.pad_token_id
+        input_ids = [[pad_id] * (width - len(ids)) + ids for ids in encoded]
+        attention_mask = [[0] * (width - len(ids)) + [1] * len(ids) for ids in encoded]
+        return (
+            torch.tensor(input_ids, device=self.model.device),
+            torch.tensor(attention_mask, device=self.model.device),
+        )
+    
+    def _build_prefix_cache(self, strict: bool) -> Optional[dict]:
+        """
+        Prefill the part of the prompt that precedes the complaint once.
+        Returns None when the template cannot be split around the user turn.
+        """
+        template = self._prompt_templates.get(strict)
+        if template is None:
+            return None
+        
+        prefix_ids = template["head_ids"]
         with torch.no_grad():
-            outputs = self.model.generate(
-                **inputs,
-                max_new_tokens=256,
-                do_sample=False,
-                eos_token_id=self.tokenizer.eos_token_id,
-                pad_token_id=self.tokenizer.eos_token_id if self.tokenizer.pad_token_id is None else self.tokenizer.pad_token_id,
+            outputs = self.model(
+                input_ids=torch.tensor([prefix_ids], device=self.model.device),
+                use_cache=True,
             )
+        # tail_length: template tokens after the complaint (end of user turn, assistant header)
+        return {"input_ids": prefix_ids, "past_key_values": outputs.past_key_values, "tail_length": len(template["tail_ids"])}
+    
+    @staticmethod
+    def _empty_decode_stats() -> dict:
+        return {"sequences": 0, "generated_tokens": 0, "first_pass_items": 0, "retries": 0, "fallbacks": 0}
+    
+    def _count_stat(self, name: str, amount: int = 1):
+        with self._stats_lock:
+            self.decode_stats[name] += amount
+        DECODE_COUNTERS[name].inc(amount)
+    
+    def get_decode_stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self.decode_stats)
+        stats["mode"] = self.decoding_mode
+        stats["avg_generated_tokens"] = round(stats["generated_tokens"] / stats["sequences"], 2) if stats["sequences"] else 0.0
+        stats["retry_rate"] = round(stats["retries"] / stats["first_pass_items"], 4) if stats["first_pass_items"] else 0.0
+        return stats
+    
+    def reset_decode_stats(self):
+        with self._stats_lock:
+            self.decode_stats = self._empty_decode_stats()
+    
+    def _grammar_token_strings(self) -> List[Optional[str]]:
+        """Text of every vocabulary entry as it appears mid-sequence (special tokens map to None)"""
+        if self._token_strings is None:
+            # Decode behind an anchor token so leading-space markers are kept
+            anchor_id = self.tokenizer.encode("{", add_special_tokens=False)[-1]
+            anchor = self.tokenizer.decode([anchor_id])
+            vocab_size = len(self.tokenizer)
+            decoded = self.tokenizer.batch_decode([[anchor_id, token_id] for token_id in range(vocab_size)])
+            special_ids = set(self.tokenizer.all_special_ids)
+            self._token_strings = [
+                None if token_id in special_ids or not text.startswith(anchor) else text[len(anchor):]
+                for token_id, text in enumerate(decoded)
+            ]
+        return self._token_strings
+    
+    def _grammar_token_index(self) -> GrammarTokenIndex:
+        if self._grammar_index is None:
+            self._grammar_index = GrammarTokenIndex(self._grammar, self._grammar_token_strings())
+        return self._grammar_index
+    
+    def _generation_kwargs(self, prompt_length: int) -> dict:
+        kwargs = {
+            "max_new_tokens": MAX_NEW_TOKENS,
+            "do_sample": False,
+            "eos_token_id": self.tokenizer.eos_token_id,
+            "pad_token_id": self.tokenizer.pad_token_id,
+        }
+        if self.decoding_mode in ("stop", "constrained"):
+            kwargs["stopping_criteria"] = StoppingCriteriaList([
+                StructuredOutputStoppingCriteria(self.tokenizer, prompt_length)
+            ])
+        if self.decoding_mode == "constrained":
+            kwargs["logits_processor"] = LogitsProcessorList([
+                JsonGrammarLogitsProcessor(self._grammar_token_index(), self.tokenizer.eos_token_id, prompt_length)
+            ])
+        return kwargs
+    
+    def _run_generate(self, input_ids: torch.Tensor, attention_mask: torch.Tensor, past_key_values=None) -> List[str]:
+        """model.generate with prefill/decode timing, token counters and decoding of the new tokens"""
+        prompt_length = input_ids.shape[1]
+        kwargs = self._generation_kwargs(prompt_length)
+        timer = FirstTokenTimer()
+        kwargs["stopping_criteria"] = StoppingCriteriaList(list(kwargs.get("stopping_criteria", [])) + [timer])
+        if past_key_values is not None:
+            kwargs["past_key_values"] = past_key_values
+        PROMPT_TOKENS.inc(int(attention_mask.sum()))
+        
+        started = time.perf_counter()
+        with torch.no_grad():
+            outputs = self.model.generate(input_ids=input_ids, attention_mask=attention_mask, **kwargs)
+        finished = time.perf_counter()
+        
+        # Prefill ends when the first new token exists
+        first_token_at = timer.first_token_at or finished
+        STAGE_SECONDS.observe(first_token_at - started, stage="prefill")
+        STAGE_SECONDS.observe(finished - first_token_at, stage="decode")
+        return self._decode_new_tokens(outputs, prompt_length, finished - first_token_at)
+    
+    def _decode_new_tokens(self, outputs, prompt_length: int, decode_seconds: float = 0.0) -> List[str]:
+        # Count tokens up to EOS/padding for the decoding stats
+        stop_ids = {self.tokenizer.eos_token_id, self.tokenizer.pad_token_id}
+        generated_tokens = 0
+        for row in outputs[:, prompt_length:].tolist():
+            stop_at = next((pos for pos, token_id in enumerate(row) if token_id in stop_ids), len(row))
+            generated_tokens += stop_at
+        self._count_stat("sequences", len(outputs))
+        self._count_stat("generated_tokens", generated_tokens)
+        if decode_seconds > 0:
+            DECODE_TOKENS_PER_SECOND.observe(generated_tokens / decode_seconds)
+        
+        # All rows share the padded prompt length
+        with stage_timer("detokenize"):
+            return [
+                self.tokenizer.decode(row[prompt_length:], skip_special_tokens=True)
+                for row in outputs
+            ]
+    
+    def _generate_batch(self, complaints: List[str], strict: bool = False) -> List[str]:
+        """Generate model outputs for several complaints in one padded generate pass"""
+        encoded = self.encode_prompts(complaints, strict)
+        
+        prefix = self._prefix_caches.get(strict)
+        if prefix is not None:
+            prefix_ids = prefix["input_ids"]
+            # Only reuse the cache when the prefix tokenizes identically inside every prompt
+            if all(ids[:len(prefix_ids)] == prefix_ids and len(ids) > len(prefix_ids) for ids in encoded):
+                return self._generate_with_prefix(prefix, [ids[len(prefix_ids):] for ids in encoded])
+        
+        input_ids, attention_mask = self._pad_batch(encoded)
+        # Simple generation without scores (this works!)
+        return self._run_generate(input_ids, attention_mask)
+    
+    def _prefix_layout(self, prefix: dict, suffixes: List[List[int]]) -> Tuple[torch.Tensor, torch.Tensor, object]:
+        """
+        Rows laid out as [prefix][padding][user turn] so the shared prefix stays aligned
+        with the cached keys/values while each reply still starts at the end.
+        Returns (input_ids, attention_mask, a per-row copy of the prefix KV cache).
+        """
+        prefix_ids = prefix["input_ids"]
+        width = max(len(suffix) for suffix in suffixes)
+        pad_id = self.tokenizer.pad_token_id
+        
+        input_ids = []
+        attention_mask = []
+        for suffix in suffixes:
+            padding = width - len(suffix)
+            input_ids.append(prefix_ids + [pad_id] * padding + suffix)
+            attention_mask.append([1] * len(prefix_ids) + [0] * padding + [1] * len(suffix))
+        
+        past_key_values = copy.deepcopy(prefix["past_key_values"])
+        if len(suffixes) > 1:
+            past_key_values.batch_repeat_interleave(len(suffixes))
+        return (
+            torch.tensor(input_ids, device=self.model.device),
+            torch.tensor(attention_mask, device=self.model.device),
+            past_key_values,
+        )
+    
+    def _generate_with_prefix(self, prefix: dict, suffixes: List[List[int]]) -> List[str]:
+        """Generate from the cached system prompt prefix; only the user turns are prefilled"""
+        input_ids, attention_mask, past_key_values = self._prefix_layout(prefix, suffixes)
+        return self._run_generate(input_ids, attention_mask, past_key_values=past_key_values)
+    
+    def _prefill_batch(self, complaints: List[str]) -> Optional[dict]:
+        """
+        Prefill the user turns behind the cached system prompt and mean-pool the final
+        hidden states of each complaint's own tokens into an L2-normalized embedding.
+        The KV cache is kept so _generate_prefilled() can decode from it without a second
+        prefill. Returns None when there is no prefix cache to split the prompt on.
+        """
+        prefix = self._prefix_caches.get(False)
+        if prefix is None:
+            return None
+        prefix_ids = prefix["input_ids"]
+        encoded = self.encode_prompts(complaints)
+        if not all(ids[:len(prefix_ids)] == prefix_ids and len(ids) > len(prefix_ids) for ids in encoded):
+            return None
         
-        # Extract generated text
-        generated_ids = outputs[0][inputs["input_ids"].shape[1]:]
-        generated_text = self.tokenizer.decode(generated_ids, skip_special_tokens=True)
+        suffixes = [ids[len(prefix_ids):] for ids in encoded]
+        input_ids, attention_mask, past_key_values = self._prefix_layout(prefix, suffixes)
+        # Same positions generate() derives from the mask, so the cache can be decoded from as-is
+        position_ids = (attention_mask.cumsum(-1) - 1).clamp(min=0)
+        start = len(prefix_ids)
+        with stage_timer("embed"), torch.no_grad():
+            outputs = self.model(
+                input_ids=input_ids[:, start:],
+                attention_mask=attention_mask,
+                position_ids=position_ids[:, start:],
+                past_key_values=past_key_values,
+                use_cache=True,
+                output_hidden_states=True,
+            )
+            hidden = outputs.hidden_states[-1].float().cpu()
+            
+            # Pool only the complaint tokens (after the padding, before the template tail)
+            width = hidden.shape[1]
+            weights = torch.zeros(len(suffixes), width)
+            for row, suffix in enumerate(suffixes):
+                body = max(1, len(suffix) - prefix["tail_length"])
+                weights[row, width - len(suffix):width - len(suffix) + body] = 1.0
+            pooled = (hidden * weights.unsqueeze(-1)).sum(dim=1) / weights.sum(dim=1, keepdim=True)
+            embeddings = torch.nn.functional.normalize(pooled, dim=-1).numpy()
         
-        return generated_text
+        return {
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+            "past_key_values": outputs.past_key_values,
+            "embeddings": embeddings,
+        }
+    
+    def embed(self, complaints: List[str]) -> Optional[np.ndarray]:
+        """(n, hidden_size) complaint embeddings from the model's own prefill, or None if unsupported"""
+        prefilled = self._prefill_batch(complaints)
+        return None if prefilled is None else prefilled["embeddings"]
+    
+    @staticmethod
+    def _select_prefilled(prefilled: dict, rows: List[int]) -> dict:
+        """Keep only some rows of a _prefill_batch() result (its KV cache is narrowed in place)"""
+        if len(rows) < len(prefilled["input_ids"]):
+            prefilled["past_key_values"].batch_select_indices(torch.tensor(rows, device=prefilled["input_ids"].device))
+        return {
+            "input_ids": prefilled["input_ids"][rows],
+            "attention_mask": prefilled["attention_mask"][rows],
+            "past_key_values": prefilled["past_key_values"],
+            "embeddings": prefilled["embeddings"][rows],
+        }
     
-    def _fallback_classification(self, complaint: str) -> dict:
+    def _generate_prefilled(self, prefilled: dict) -> List[str]:
+        """Decode from a _prefill_batch() KV cache; only the last prompt token is run again for its logits"""
+        input_ids = prefilled["input_ids"]
+        past_key_values = prefilled["past_key_values"]
+        past_key_values.crop(input_ids.shape[1] - 1)
+        return self._run_generate(input_ids, prefilled["attention_mask"], past_key_values=past_key_values)
+    
+    def _fallback_classification(self, complaint: str, hits: Optional[List[KeywordHit]] = None) -> dict:
         """Simple keyword-based fallback classification when model fails"""
-        complaint_lower = complaint.lower()
+        with stage_timer("fallback"):
+            return self._keyword_classification(complaint, hits)
+    
+    def _keyword_classification(self, complaint: str, hits: Optional[List[KeywordHit]]) -> dict:
+        if hits is None:
+            hits = keyword_matcher.find(complaint)
+        matched = keyword_matcher.values(hits, "fallback_category")
         
         # Check for categories (can have multiple)
         categories = []
         
         # PRIORITY 1: Harassment (most critical)
-        if any(word in complaint_lower for word in ['harassment', 'harass', 'bully', 'abuse', 'discriminate', 'threaten', 'assault', 'scold']):
+        if "Harassment" in matched:
             categories.append('Harassment')
         
         # Check for Infrastructure
-        if any(word in complaint_lower for word in ['water', 'cooler', 'drink', 'fountain', 'ac', 'air', 'conditioning', 
-                                                      'temperature', 'hot', 'cold', 'toilet', 'bathroom', 'washroom', 
-                                                      'restroom', 'broken', 'repair', 'maintenance']):
-            if 'Infrastructure' not in categories:
-                categories.append('Infrastructure')
+        if "Infrastructure" in matched:
+            categories.append('Infrastructure')
         
         # Check for Academic issues
-        if any(word in complaint_lower for word in ['grade', 'marks', 'exam', 'test', 'class', 'professor', 'teacher', 
-                                                      'lecture', 'assignment', 'homework']):
+        if "Academic" in matched:
             if 'Harassment' not in categories:  # Don't override harassment
                 categories.append('Academic')
         
@@ -172,178 +1552,2203 @@ class ComplaintClassifier:
         
         # Determine severity
         severity = "Normal"
-        if any(word in complaint_lower for word in ['urgent', 'critical', 'emergency', 'immediately', 'harassment', 'harass', 'assault']):
+        if "High" in keyword_matcher.values(hits, "fallback_severity"):
             severity = "High"
         
-        print(f"[FALLBACK] Categories: {categories}, Severity: {severity}")
+        request_log.info("[FALLBACK] Categories: %s, Severity: %s", categories, severity)
+        self._count_stat("fallbacks")
         
         return {
             "categories": categories,
-            "severity": severity
+            "severity": severity,
+            "source": FALLBACK_SOURCE,
         }
     
+    def _parse_output(self, raw_output: str) -> Tuple[Optional[dict], str]:
+        """Try JSON extraction first, then the native format parser; returns (result, parser used)"""
+        with stage_timer("parse"):
+            result = self._extract_json(raw_output)
+            if result is not None:
+                return result, "json"
+            return self._parse_native_format(raw_output), "native"
+    
     def classify_base(self, complaint: str) -> dict:
         """Generate base classification"""
+        return self.classify_base_batch([complaint])[0]
+    
+    def classify_base_batch(self, complaints: List[str], prefilled: Optional[dict] = None) -> List[dict]:
+        """
+        Generate base classifications for several complaints.
+        Applies the same per-item rules as a single call: parse, strict retry, fallback.
+        prefilled: a _prefill_batch() result for exactly these complaints, decoded from directly.
+        """
+        results: List[Optional[dict]] = [None] * len(complaints)
+        self._count_stat("first_pass_items", len(complaints))
+        started = time.perf_counter()
+        
         try:
             # Use working generation method
-            raw_output = self._generate(complaint, strict=False)
-            
-            print(f"[CLASSIFY_BASE] Raw output: '{raw_output[:100]}...'")
+            if prefilled is not None:
+                raw_outputs = self._generate_prefilled(prefilled)
+            else:
+                raw_outputs = self._generate_batch(complaints, strict=False)
+        except Exception as e:
+            request_log.warning("[CLASSIFY_BASE] Exception: %s, using FALLBACK", e)
+            results = [
+                self._fallback_classification(complaint, hits)
+                for complaint, hits in zip(complaints, keyword_matcher.find_many(complaints))
+            ]
+            self._capture_batch(complaints, [None] * len(complaints), results, ["fallback"] * len(complaints), started)
+            return results
+        
+        # How each result was produced: json/native parse, strict retry, or keyword fallback
+        paths = ["fallback"] * len(complaints)
+        captured_outputs: List[Optional[str]] = list(raw_outputs)
+        retry_indices = []
+        for idx, raw_output in enumerate(raw_outputs):
+            request_log.debug("[CLASSIFY_BASE] Raw output: '%s...'", raw_output[:100])
             
             # If output is empty or too short, use fallback
             if not raw_output or len(raw_output.strip()) < 10:
-                print("[CLASSIFY_BASE] Empty or too short output, using FALLBACK")
-                return self._fallback_classification(complaint)
+                request_log.info("[CLASSIFY_BASE] Empty or too short output, using FALLBACK")
+                results[idx] = self._fallback_classification(complaints[idx])
+                continue
             
-            # Try JSON extraction first
-            result = self._extract_json(raw_output)
-            
-            # Try native format parser
-            if result is None:
-                result = self._parse_native_format(raw_output)
+            results[idx], paths[idx] = self._parse_output(raw_output)
+            if results[idx] is None and self.decoding_mode == "constrained":
+                # Constrained output that still fails to parse was cut off; a retry would be too
+                request_log.info("[CLASSIFY_BASE] Constrained output incomplete, using FALLBACK")
+                results[idx] = self._fallback_classification(complaints[idx])
+                paths[idx] = "fallback"
+            elif results[idx] is None:
+                retry_indices.append(idx)
+            else:
+                request_log.debug("[CLASSIFY_BASE] Success! Categories: %s", results[idx].get("categories"))
+        
+        # Retry with strict prompt if failed
+        if retry_indices:
+            self._count_stat("retries", len(retry_indices))
+            request_log.info("[CLASSIFY_BASE] First attempt failed for %d item(s), retrying with strict prompt", len(retry_indices))
+            try:
+                with stage_timer("strict_retry"):
+                    retry_outputs = self._generate_batch([complaints[idx] for idx in retry_indices], strict=True)
+            except Exception as e:
+                request_log.warning("[CLASSIFY_BASE] Exception: %s, using FALLBACK", e)
+                retry_outputs = [""] * len(retry_indices)
             
-            # Retry with strict prompt if failed
-            if result is None:
-                print("[CLASSIFY_BASE] First attempt failed, retrying with strict prompt")
-                raw_output = self._generate(complaint, strict=True)
-                
+            for idx, raw_output in zip(retry_indices, retry_outputs):
+                captured_outputs[idx] = raw_output
                 # Check for empty again
                 if not raw_output or len(raw_output.strip()) < 10:
-                    print("[CLASSIFY_BASE] Retry also empty, using FALLBACK")
-                    return self._fallback_classification(complaint)
+                    request_log.info("[CLASSIFY_BASE] Retry also empty, using FALLBACK")
+                    results[idx] = self._fallback_classification(complaints[idx])
+                    paths[idx] = "fallback"
+                    continue
                 
-                result = self._extract_json(raw_output)
+                results[idx], _ = self._parse_output(raw_output)
                 
-                # Try native format again
-                if result is None:
-                    result = self._parse_native_format(raw_output)
+                # If still failed, use fallback
+                if results[idx] is None:
+                    request_log.info("[CLASSIFY_BASE] All parsing failed, using FALLBACK")
+                    results[idx] = self._fallback_classification(complaints[idx])
+                    paths[idx] = "fallback"
+                else:
+                    request_log.debug("[CLASSIFY_BASE] Success! Categories: %s", results[idx].get("categories"))
+                    paths[idx] = "retry"
+        
+        self._capture_batch(complaints, captured_outputs, results, paths, started)
+        return results
+    
+    def _capture_batch(self, complaints: List[str], raw_outputs: List[Optional[str]], results: List[dict],
+                       paths: List[str], started: float):
+        """Queue capture records for a batch; latency is the whole batch's, shared by its items"""
+        if not capture_enabled():
+            return
+        latency_ms = (time.perf_counter() - started) * 1000
+        for complaint, raw_output, result, path in zip(complaints, raw_outputs, results, paths):
+            capture_classification(complaint, raw_output, result, latency_ms, path,
+                                   mode="generate", decoding=self.decoding_mode, batch_size=len(complaints))
+
+    def bucket_by_length(self, complaints: List[str], chunk_size: int = 16) -> List[List[int]]:
+        """
+        Group indices of similar token length so each chunk wastes little padding. The token
+        ids are remembered, so encoding the chunks' prompts does not tokenize them again.
+        """
+        with stage_timer("tokenize"):
+            lengths = [len(ids) for ids in self._encode_complaints(complaints)]
+        order = sorted(range(len(complaints)), key=lambda idx: lengths[idx])
+        chunk_size = max(1, chunk_size)
+        return [order[start:start + chunk_size] for start in range(0, len(order), chunk_size)]
+    
+    def classify_base_many(self, complaints: List[str], chunk_size: int = 16, mode: str = "generate") -> List[dict]:
+        """
+        Classify a large list with length bucketing.
+        Every chunk goes through one batched generate, and results keep the input order.
+        """
+        results: List[Optional[dict]] = [None] * len(complaints)
+        for chunk in self.bucket_by_length(complaints, chunk_size):
+            chunk_results = self.classify_with_mode([complaints[idx] for idx in chunk], mode)
+            for idx, result in zip(chunk, chunk_results):
+                results[idx] = result
+        
+        return results
+    
+    def _prefill(self, context_ids: List[int]):
+        """Run the shared context once; returns (next-token log-probs, past_key_values)"""
+        prefix = self._prefix_caches.get(False)
+        start = 0
+        past_key_values = None
+        if prefix is not None and context_ids[:len(prefix["input_ids"])] == prefix["input_ids"]:
+            start = len(prefix["input_ids"])
+            past_key_values = copy.deepcopy(prefix["past_key_values"])
+            if start == len(context_ids):
+                # The last context token must be run to get its next-token logits
+                start -= 1
+                past_key_values.crop(start)
+        
+        with torch.no_grad():
+            outputs = self.model(
+                input_ids=torch.tensor([context_ids[start:]], device=self.model.device),
+                past_key_values=past_key_values,
+                use_cache=True,
+            )
+        return torch.log_softmax(outputs.logits[0, -1].float(), dim=-1), outputs.past_key_values
+    
+    def _score_continuations(self, context_ids: List[int], continuations: List[List[int]],
+                             skip: Optional[List[int]] = None) -> List[float]:
+        """
+        Sum log-probability of each continuation after a shared context.
+        The context is prefilled once; all continuations then go through one
+        right-padded forward pass on a copy of its KV cache.
+        skip[row] leading tokens of a continuation are conditioned on but not scored.
+        """
+        skip = skip or [0] * len(continuations)
+        if not self.supports_kv_reuse or not context_ids:
+            return self._score_continuations_full(context_ids, continuations, skip)
+        
+        first_log_probs, past_key_values = self._prefill(context_ids)
+        
+        width = max(len(ids) for ids in continuations)
+        pad_id = self.tokenizer.pad_token_id
+        input_ids = [ids + [pad_id] * (width - len(ids)) for ids in continuations]
+        attention_mask = [[1] * len(context_ids) + [1] * len(ids) + [0] * (width - len(ids)) for ids in continuations]
+        
+        if len(continuations) > 1:
+            past_key_values.batch_repeat_interleave(len(continuations))
+        with torch.no_grad():
+            outputs = self.model(
+                input_ids=torch.tensor(input_ids, device=self.model.device),
+                attention_mask=torch.tensor(attention_mask, device=self.model.device),
+                past_key_values=past_key_values,
+            )
+        log_probs = torch.log_softmax(outputs.logits.float(), dim=-1)
+        
+        scores = []
+        for row, ids in enumerate(continuations):
+            score = 0.0
+            for position in range(skip[row], len(ids)):
+                if position == 0:
+                    score += first_log_probs[ids[0]].item()
+                else:
+                    score += log_probs[row, position - 1, ids[position]].item()
+            scores.append(score)
+        return scores
+    
+    def _score_continuations_full(self, context_ids: List[int], continuations: List[List[int]],
+                                  skip: Optional[List[int]] = None) -> List[float]:
+        """Same scores without KV reuse: one right-padded batch of context + continuation rows"""
+        skip = skip or [0] * len(continuations)
+        width = len(context_ids) + max(len(ids) for ids in continuations)
+        pad_id = self.tokenizer.pad_token_id
+        input_ids = []
+        attention_mask = []
+        for ids in continuations:
+            row = context_ids + ids
+            input_ids.append(row + [pad_id] * (width - len(row)))
+            attention_mask.append([1] * len(row) + [0] * (width - len(row)))
+        
+        with torch.no_grad():
+            outputs = self.model(
+                input_ids=torch.tensor(input_ids, device=self.model.device),
+                attention_mask=torch.tensor(attention_mask, device=self.model.device),
+            )
+        log_probs = torch.log_softmax(outputs.logits.float(), dim=-1)
+        
+        # Token at position p is predicted by the logits at p - 1
+        start = len(context_ids)
+        return [
+            sum(
+                log_probs[row, start + offset - 1, ids[offset]].item()
+                for offset in range(skip[row], len(ids))
+            )
+            for row, ids in enumerate(continuations)
+        ]
+    
+    def _label_probabilities(self, context_ids: List[int], labels: List[str]) -> Dict[str, float]:
+        """
+        Probability of each label (followed by its closing quote), normalized over the label set.
+        Each label is scored by its mean token log-probability so longer labels are not penalized.
+        """
+        continuations = [self.tokenizer.encode(label + '"', add_special_tokens=False) for label in labels]
+        totals = self._score_continuations(context_ids, continuations)
+        scores = torch.tensor([total / len(ids) for total, ids in zip(totals, continuations)])
+        probabilities = torch.softmax(scores, dim=0).tolist()
+        return {label: round(prob, 4) for label, prob in zip(labels, probabilities)}
+    
+    def classify_base_scored(self, complaint: str) -> dict:
+        """
+        Classify by scoring the fixed label set instead of decoding free-form text.
+        Categories above CATEGORY_SCORE_THRESHOLD are selected (the best one always is),
+        then the severity is scored given those categories.
+        """
+        prompt_ids = self.encode_prompts([complaint])[0]
+        
+        category_context = prompt_ids + self.tokenizer.encode('{"categories": ["', add_special_tokens=False)
+        category_probs = self._label_probabilities(category_context, CATEGORY_LABELS)
+        ranked = sorted(category_probs, key=category_probs.get, reverse=True)
+        categories = [ranked[0]] + [
+            label for label in ranked[1:MAX_SCORED_CATEGORIES]
+            if category_probs[label] >= CATEGORY_SCORE_THRESHOLD
+        ]
+        
+        severity_context = prompt_ids + self.tokenizer.encode(
+            '{"categories": ' + json.dumps(categories) + ', "severity": "', add_special_tokens=False,
+        )
+        severity_probs = self._label_probabilities(severity_context, SEVERITY_LEVELS)
+        severity = max(severity_probs, key=severity_probs.get)
+        
+        return {
+            "categories": categories,
+            "severity": severity,
+            "confidence": {"categories": category_probs, "severity": severity_probs},
+        }
+    
+    def classify_base_scored_batch(self, complaints: List[str]) -> List[dict]:
+        """Score-mode counterpart of classify_base_batch with the same fallback rule"""
+        results = []
+        for complaint in complaints:
+            started = time.perf_counter()
+            path = "score"
+            try:
+                with stage_timer("score"):
+                    results.append(self.classify_base_scored(complaint))
+            except Exception as e:
+                request_log.warning("[CLASSIFY_SCORED] Exception: %s, using FALLBACK", e)
+                results.append(self._fallback_classification(complaint))
+                path = "fallback"
+            if capture_enabled():
+                capture_classification(complaint, None, results[-1], (time.perf_counter() - started) * 1000, path,
+                                       mode="score", batch_size=len(complaints))
+        return results
+    
+    @staticmethod
+    def _occlusion_spans(complaint: str, max_spans: int) -> List[Tuple[int, int]]:
+        """Character ranges of at most max_spans contiguous word groups"""
+        words = [match.span() for match in re.finditer(r"\S+", complaint)]
+        if not words:
+            return []
+        size = math.ceil(len(words) / max(1, max_spans))
+        return [
+            (words[start][0], words[min(start + size, len(words)) - 1][1])
+            for start in range(0, len(words), size)
+        ]
+    
+    def attribute_spans(self, complaint: str, classification: dict, max_spans: int = EXPLAIN_MAX_SPANS) -> List[dict]:
+        """
+        Occlusion attribution: how much the log-probability of the predicted answer drops
+        when each complaint span is removed. The full complaint and every occluded copy are
+        scored in one batched forward pass that shares the system prompt KV cache, so the
+        cost is one pass of at most max_spans + 1 rows. Returns spans that support the
+        answer, strongest first.
+        """
+        with stage_timer("attribution"):
+            return self._attribute_spans(complaint, classification, max_spans)
+    
+    def _attribute_spans(self, complaint: str, classification: dict, max_spans: int) -> List[dict]:
+        spans = self._occlusion_spans(complaint, max_spans)
+        if not spans:
+            return []
+        
+        answer = ('{"categories": ' + json.dumps(classification.get("categories", []))
+                  + ', "severity": "' + classification.get("severity", "Normal") + '"')
+        answer_ids = self.tokenizer.encode(answer, add_special_tokens=False)
+        
+        variants = [" ".join(complaint.split())] + [
+            " ".join((complaint[:start] + " " + complaint[end:]).split()) for start, end in spans
+        ]
+        prompt_ids = self.encode_prompts(variants)
+        
+        # Everything up to the first differing token is shared context
+        shared = min(len(ids) for ids in prompt_ids)
+        for position in range(shared):
+            if any(ids[position] != prompt_ids[0][position] for ids in prompt_ids):
+                shared = position
+                break
+        
+        scores = self._score_continuations(
+            prompt_ids[0][:shared],
+            [ids[shared:] + answer_ids for ids in prompt_ids],
+            skip=[len(ids) - shared for ids in prompt_ids],
+        )
+        
+        attributions = []
+        for (start, end), score in zip(spans, scores[1:]):
+            drop = scores[0] - score
+            if drop > 0:
+                attributions.append({"text": complaint[start:end], "start": start, "end": end, "score": round(drop, 4)})
+        return sorted(attributions, key=lambda span: span["score"], reverse=True)
+    
+    def _chat_stop_ids(self) -> set:
+        """EOS ids (tokenizer and generation config) plus the token the chat template closes an assistant turn with"""
+        if self._chat_stop_id_set is not None:
+            return self._chat_stop_id_set
+        
+        stop_ids = {self.tokenizer.eos_token_id}
+        configured = getattr(self.model.generation_config, "eos_token_id", None)
+        stop_ids.update(configured if isinstance(configured, list) else [configured])
+        
+        # Whatever the template renders right after a reply ends the turn (<|im_end|>, <|eot_id|>, ...)
+        sentinel = "<<REPLY>>"
+        try:
+            rendered = self.tokenizer.apply_chat_template(
+                [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": sentinel}],
+                tokenize=False,
+            )
+        except Exception as e:
+            log.warning("[INIT] Could not render an assistant turn to find its end token: %s", e)
+            rendered = ""
+        if rendered.count(sentinel) == 1:
+            after_reply = self.tokenizer(rendered.split(sentinel)[1], add_special_tokens=False)["input_ids"]
+            special_ids = set(self.tokenizer.all_special_ids) | set(self.tokenizer.get_added_vocab().values())
+            if after_reply and after_reply[0] in special_ids:
+                stop_ids.add(after_reply[0])
+        
+        self._chat_stop_id_set = {token_id for token_id in stop_ids if token_id is not None}
+        return self._chat_stop_id_set
+    
+    def chat_prefill(self, messages: List[dict], cached_ids: List[int], past_key_values=None) -> dict:
+        """
+        Prefill a conversation ending in a user turn; returns the decoding state for chat_decode().
+        past_key_values (covering cached_ids, from the previous turn) is cropped to the common
+        token prefix and reused. The oldest turns are dropped to fit CHAT_MAX_CONTEXT_TOKENS.
+        """
+        while True:
+            with stage_timer("template"):
+                rendered = self.tokenizer.apply_chat_template(
+                    [{"role": "system", "content": self._get_chat_system_prompt()}] + messages,
+                    tokenize=False,
+                    add_generation_prompt=True,
+                )
+            ids = self.tokenizer(rendered)["input_ids"]
+            if len(ids) <= CHAT_MAX_CONTEXT_TOKENS or len(messages) <= 1:
+                break
+            messages = messages[2:]
+        if len(ids) > CHAT_MAX_CONTEXT_TOKENS:
+            raise ValueError(f"Message is too long ({len(ids)} tokens with the prompt, max {CHAT_MAX_CONTEXT_TOKENS})")
+        
+        reused = 0
+        if past_key_values is not None and self.supports_kv_reuse:
+            common = next((pos for pos, (a, b) in enumerate(zip(cached_ids, ids)) if a != b), min(len(cached_ids), len(ids)))
+            # At least one token must be run to get the next-token logits
+            reused = min(common, len(ids) - 1)
+            past_key_values.crop(reused)
+        if reused == 0:
+            past_key_values = None
+        
+        PROMPT_TOKENS.inc(len(ids) - reused)
+        with stage_timer("chat_prefill"), torch.no_grad():
+            outputs = self.model(
+                input_ids=torch.tensor([ids[reused:]], device=self.model.device),
+                past_key_values=past_key_values,
+                use_cache=True,
+            )
+        return {
+            "messages": messages,
+            "ids": ids,
+            "past_key_values": outputs.past_key_values,
+            "logits": outputs.logits[0, -1],
+            "generated": [],
+            "text": "",
+            "done": False,
+            "reused_tokens": reused,
+        }
+    
+    def chat_decode(self, state: dict, max_tokens: int, on_text) -> bool:
+        """Greedy-decode up to max_tokens more tokens, passing each new piece of text to on_text; True once the reply is done"""
+        stop_ids = self._chat_stop_ids()
+        with stage_timer("chat_decode"), torch.no_grad():
+            for _ in range(max_tokens):
+                token_id = int(state["logits"].argmax())
+                if token_id in stop_ids or len(state["generated"]) >= CHAT_MAX_NEW_TOKENS:
+                    state["done"] = True
+                    break
+                state["generated"].append(token_id)
+                text = self.tokenizer.decode(state["generated"], skip_special_tokens=True)
+                # A trailing replacement character is half of a multi-byte character
+                if not text.endswith("\ufffd") and len(text) > len(state["text"]):
+                    on_text(text[len(state["text"]):])
+                    state["text"] = text
+                
+                outputs = self.model(
+                    input_ids=torch.tensor([[token_id]], device=self.model.device),
+                    past_key_values=state["past_key_values"],
+                    use_cache=True,
+                )
+                state["past_key_values"] = outputs.past_key_values
+                state["logits"] = outputs.logits[0, -1]
+        
+        if state["done"]:
+            text = self.tokenizer.decode(state["generated"], skip_special_tokens=True)
+            if len(text) > len(state["text"]):
+                on_text(text[len(state["text"]):])
+                state["text"] = text
+        return state["done"]
+    
+    def classify_with_mode(self, complaints: List[str], mode: str,
+                           duplicates: Optional["DuplicateIndex"] = None) -> List[dict]:
+        """
+        Dispatch a batch to the generation or label-scoring path. In generate mode, near-duplicates
+        are reused from `duplicates`; score mode has no prefill to decode from, so embedding
+        would cost a second forward pass and the index is not used.
+        """
+        if duplicates is not None and duplicates.enabled and mode == "generate":
+            return self._classify_deduplicated(complaints, mode, duplicates)
+        if mode == "score":
+            return self.classify_base_scored_batch(complaints)
+        return self.classify_base_batch(complaints)
+    
+    def _classify_deduplicated(self, complaints: List[str], mode: str, duplicates: "DuplicateIndex") -> List[dict]:
+        """
+        Embed the batch from its prefill, answer near-duplicates of indexed complaints from
+        the index, and classify one representative per group of near-duplicates within the
+        batch. Generation for the rest decodes from the same prefill.
+        """
+        try:
+            prefilled = self._prefill_batch(complaints)
+        except Exception as e:
+            request_log.warning("[DEDUP] Embedding failed: %s, classifying without the index", e)
+            prefilled = None
+        if prefilled is None:
+            return self.classify_with_mode(complaints, mode)
+        
+        namespace = f"{self.cache_namespace}|{mode}"
+        embeddings = prefilled["embeddings"]
+        results = duplicates.match(embeddings, namespace)
+        misses = [idx for idx, result in enumerate(results) if result is None]
+        if not misses:
+            return results
+        
+        leaders = duplicates.group_rows(embeddings[misses])
+        unique = [idx for pos, idx in enumerate(misses) if leaders[pos] == pos]
+        unique_complaints = [complaints[idx] for idx in unique]
+        unique_results = self.classify_base_batch(unique_complaints, self._select_prefilled(prefilled, unique))
+        
+        stored = {}
+        for idx, result in zip(unique, unique_results):
+            stored[idx] = duplicates.add(embeddings[idx], namespace, complaints[idx], result)
+        for pos, idx in enumerate(misses):
+            leader = misses[leaders[pos]]
+            if leader == idx:
+                results[idx] = stored[idx]
+            elif is_fallback(stored[leader]):
+                # A fallback is not a model answer to share; this complaint gets its own
+                results[idx] = self._fallback_classification(complaints[idx])
+            else:
+                duplicates.touch(stored[leader].get("duplicate_group"))
+                results[idx] = copy.deepcopy(stored[leader])
+        return results
+
+# ========================
+# REQUEST SCHEDULER
+# ========================
+
+class QueueFullError(Exception):
+    """Raised at admission when the inference queue has no room"""
+    
+    def __init__(self, retry_after: int):
+        super().__init__(f"Inference queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class DeadlineExceededError(Exception):
+    """Raised for work whose deadline passed before the model got to it"""
+
+class _WorkItem:
+    __slots__ = ("kind", "payload", "mode", "future", "deadline", "enqueued_at", "priority", "seq")
+    
+    def __init__(self, kind: str, payload, mode: str, deadline: float, priority: int = 0):
+        self.kind = kind          # "classify" (batched with other calls) or "call" (runs alone)
+        self.payload = payload    # complaint text, or a zero-argument callable
+        self.mode = mode
+        self.future: Future = Future()
+        self.deadline = deadline
+        self.enqueued_at = time.monotonic()
+        self.priority = priority  # lower runs first; FIFO within a priority
+        self.seq = 0
+
+class MicroBatchScheduler:
+    """
+    The single inference executor: every model call goes through its one worker thread.
+    Concurrent classification calls are gathered into one padded batch (up to
+    max_batch_size, waiting at most max_wait_ms); other model work such as a
+    /classify/batch chunk runs on its own between batches. Admission is bounded
+    by max_queue_size, and work whose deadline passed while queued is dropped.
+    Batches consult duplicate_index (when given) before generating.
+    LOW priority work (chat decoding slices) only runs when no NORMAL work is waiting,
+    so long chats cannot starve classification.
+    """
+    
+    NORMAL = 0
+    LOW = 1
+    
+    def __init__(self, classifier: ComplaintClassifier, max_batch_size: int = 8, max_wait_ms: float = 10,
+                 max_queue_size: int = 64, deadline_seconds: float = 30,
+                 duplicate_index: Optional["DuplicateIndex"] = None):
+        self.classifier = classifier
+        self.duplicate_index = duplicate_index
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.deadline_seconds = deadline_seconds
+        self.max_queue_size = max(1, max_queue_size)
+        # Unbounded: admission checks the depth itself so continuations are never rejected
+        self._queue: "queue.PriorityQueue[Tuple[int, int, _WorkItem]]" = queue.PriorityQueue()
+        self._seq = 0
+        self._held: Optional[_WorkItem] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._avg_pass_seconds = 1.0
+        self.rejected = 0
+        self.expired = 0
+    
+    def _ensure_started(self):
+        # Started lazily so the worker thread lives in the serving process
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="batch-scheduler", daemon=True)
+                self._thread.start()
+    
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() + (1 if self._held is not None else 0)
+    
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained"""
+        passes = math.ceil(self.depth / self.max_batch_size)
+        return max(1, math.ceil(passes * self._avg_pass_seconds))
+    
+    def _admit(self, item: _WorkItem, continuation: bool = False) -> Future:
+        """Queue work; new work beyond max_queue_size is rejected, a continuation of admitted work is not"""
+        self._ensure_started()
+        with self._lock:
+            if not continuation and self._queue.qsize() >= self.max_queue_size:
+                self.rejected += 1
+                QUEUE_REJECTED.inc()
+                raise QueueFullError(self.retry_after())
+            self._seq += 1
+            item.seq = self._seq
+            self._queue.put((item.priority, item.seq, item))
+        return item.future
+    
+    def _deadline(self, deadline: Optional[float]) -> float:
+        return deadline if deadline is not None else time.monotonic() + self.deadline_seconds
+    
+    def submit(self, complaint: str, mode: str = "generate", deadline: Optional[float] = None) -> Future:
+        """Queue a complaint and return a future resolving to its base classification"""
+        return self._admit(_WorkItem("classify", complaint, mode, self._deadline(deadline)))
+    
+    def submit_call(self, fn, deadline: Optional[float] = None, priority: int = NORMAL,
+                    continuation: bool = False) -> Future:
+        """Queue arbitrary model work (e.g. one pre-bucketed batch chunk) to run on the worker"""
+        return self._admit(_WorkItem("call", fn, "", self._deadline(deadline), priority), continuation)
+    
+    def classify(self, complaint: str, mode: str = "generate") -> dict:
+        """Blocking helper for callers outside the event loop"""
+        return self.submit(complaint, mode).result()
+    
+    def _next_item(self, timeout: Optional[float] = None) -> _WorkItem:
+        if self._held is not None:
+            item, self._held = self._held, None
+            return item
+        return self._queue.get(timeout=timeout)[2]
+    
+    def _collect(self) -> List[_WorkItem]:
+        first = self._next_item()
+        if first.kind == "call":
+            return [first]
+        
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._next_item(timeout=remaining)
+            except queue.Empty:
+                break
+            if item.priority != first.priority:
+                # Lower priority work waits for whatever arrives next
+                self._queue.put((item.priority, item.seq, item))
+                break
+            if item.kind == "call":
+                # Runs on its own right after this batch
+                self._held = item
+                break
+            batch.append(item)
+        return batch
+    
+    def _live(self, batch: List[_WorkItem]) -> List[_WorkItem]:
+        """Drop work whose caller already gave up (expired or cancelled)"""
+        now = time.monotonic()
+        live = []
+        for item in batch:
+            if item.deadline < now:
+                self.expired += 1
+                QUEUE_EXPIRED.inc()
+                if item.future.set_running_or_notify_cancel():
+                    item.future.set_exception(DeadlineExceededError("Request deadline passed while queued"))
+            elif item.future.set_running_or_notify_cancel():
+                live.append(item)
+        return live
+    
+    def _run(self):
+        while True:
+            batch = self._live(self._collect())
+            if not batch:
+                continue
             
-            # If still failed, use fallback
-            if result is None:
-                print(f"[CLASSIFY_BASE] All parsing failed, using FALLBACK")
-                return self._fallback_classification(complaint)
+            started = time.monotonic()
+            for item in batch:
+                QUEUE_WAIT_SECONDS.observe(started - item.enqueued_at)
+            if batch[0].kind == "call":
+                item = batch[0]
+                try:
+                    item.future.set_result(item.payload())
+                except Exception as e:
+                    item.future.set_exception(e)
+            else:
+                BATCH_SIZE.observe(len(batch))
+                self._run_classify(batch)
             
-            print(f"[CLASSIFY_BASE] Success! Categories: {result.get('categories')}")
+            self._avg_pass_seconds = 0.8 * self._avg_pass_seconds + 0.2 * (time.monotonic() - started)
+    
+    def _run_classify(self, batch: List[_WorkItem]):
+        # Requests in different classifier modes cannot share a pass
+        by_mode: Dict[str, List[_WorkItem]] = {}
+        for item in batch:
+            by_mode.setdefault(item.mode, []).append(item)
+        
+        for mode, items in by_mode.items():
+            try:
+                results = self.classifier.classify_with_mode(
+                    [item.payload for item in items], mode, self.duplicate_index
+                )
+            except Exception as e:
+                for item in items:
+                    item.future.set_exception(e)
+                continue
+            for item, result in zip(items, results):
+                item.future.set_result(result)
+    
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.depth,
+            "queue_capacity": self.max_queue_size,
+            "rejected": self.rejected,
+            "expired": self.expired,
+        }
+
+# ========================
+# RESULT CACHE
+# ========================
+
+class ClassificationCache:
+    """
+    Content-addressed cache of base classifications.
+    Keys hash the normalized complaint text with the model/prompt namespace.
+    Entries live in an in-memory LRU bounded by count, bytes and TTL, and are
+    optionally written through to a SQLite file so they survive restarts.
+    """
+    
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 16 * 1024 * 1024,
+                 ttl_seconds: float = 86400, db_path: str = ""):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, payload)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        
+        self.db_path = db_path
+        self._db: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.open_db()
+    
+    async def run(self, method, *args):
+        """
+        Await a cache method. With the SQLite store it runs on the cache's own thread so disk
+        reads and commits never block the event loop; memory-only lookups run inline.
+        """
+        if self._db is None:
+            return method(*args)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="classification-cache")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, method, *args)
+    
+    def open_db(self):
+        """(Re)open the SQLite store; forked workers must not share the parent's connection"""
+        self._executor = None
+        if not self.db_path:
+            return
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS classification_cache ("
+            "key TEXT PRIMARY KEY, payload TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.execute("DELETE FROM classification_cache WHERE expires_at < ?", (time.time(),))
+        self._db.commit()
+    
+    @staticmethod
+    def normalize(complaint: str) -> str:
+        """Unicode-normalize and collapse whitespace so trivially different copies share a key"""
+        return " ".join(unicodedata.normalize("NFKC", complaint).split())
+    
+    def make_key(self, complaint: str, namespace: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(namespace.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(self.normalize(complaint).encode("utf-8"))
+        return digest.hexdigest()
+    
+    def _entry_size(self, key: str, payload: str) -> int:
+        return len(key) + len(payload)
+    
+    def _drop(self, key: str):
+        _, payload = self._entries.pop(key)
+        self._bytes -= self._entry_size(key, payload)
+    
+    def _store(self, key: str, payload: str, expires_at: float):
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (expires_at, payload)
+        self._bytes += self._entry_size(key, payload)
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+    
+    def get(self, key: str) -> Optional[dict]:
+        """Return a fresh copy of the cached classification, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < now:
+                self._drop(key)
+                entry = None
             
-            return result
-        except Exception as e:
-            print(f"[CLASSIFY_BASE] Exception: {e}, using FALLBACK")
-            return self._fallback_classification(complaint)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return json.loads(entry[1])
+            
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT payload, expires_at FROM classification_cache WHERE key = ? AND expires_at >= ?",
+                    (key, now)
+                ).fetchone()
+                if row is not None:
+                    self._store(key, row[0], row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return json.loads(row[0])
+            
+            self.misses += 1
+            return None
+    
+    def get_many(self, keys: List[str]) -> List[Optional[dict]]:
+        return [self.get(key) for key in keys]
+    
+    def put(self, key: str, value: dict):
+        """Store a classification; keyword fallbacks are skipped so the next request asks the model again"""
+        self.put_many([(key, value)])
+    
+    def put_many(self, items: List[Tuple[str, dict]]):
+        """Store several classifications with one SQLite commit; keyword fallbacks are skipped"""
+        expires_at = time.time() + self.ttl_seconds
+        rows = [
+            (key, json.dumps(value, separators=(",", ":")), expires_at)
+            for key, value in items if not is_fallback(value)
+        ]
+        if not rows:
+            return
+        with self._lock:
+            for row in rows:
+                self._store(*row)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO classification_cache (key, payload, expires_at) VALUES (?, ?, ?)", rows
+                )
+                self._db.commit()
+    
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "persistent": self._db is not None,
+            }
+
+# ========================
+# DUPLICATE INDEX
+# ========================
+
+class DuplicateIndex:
+    """
+    Recently classified complaints as rows of an L2-normalized embedding matrix.
+    A complaint whose embedding has cosine similarity >= threshold with a row of the
+    same namespace (model/prompt/mode) reuses that row's classification instead of
+    being generated. Rows double as duplicate groups for /duplicates. Bounded to
+    max_entries rows; the least recently matched row is evicted first.
+    """
+    
+    def __init__(self, threshold: float = 0.0, max_entries: int = 4096):
+        if not (threshold == 0 or 0 < threshold <= 1):
+            raise ValueError(f"DEDUP_THRESHOLD must be 0 (off) or in (0, 1], got {threshold}")
+        self.threshold = threshold
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None  # (max_entries, dim), allocated on the first add
+        self._namespaces = np.full(self.max_entries, -1, dtype=np.int32)  # -1 marks a free row
+        self._last_used = np.zeros(self.max_entries, dtype=np.int64)
+        self._clock = 0
+        self._entries: List[Optional[dict]] = [None] * self.max_entries
+        self._namespace_ids: Dict[str, int] = {}
+        self._groups: Dict[str, int] = {}  # group id -> row
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+    
+    def _use(self, row: int):
+        self._clock += 1
+        self._last_used[row] = self._clock
+        entry = self._entries[row]
+        entry["count"] += 1
+        entry["last_seen"] = time.time()
+    
+    def match(self, vectors: np.ndarray, namespace: str) -> List[Optional[dict]]:
+        """Copy of the stored classification for each embedding, None where no row is close enough"""
+        results: List[Optional[dict]] = [None] * len(vectors)
+        with self._lock:
+            namespace_id = self._namespace_ids.get(namespace)
+            if self._vectors is not None and namespace_id is not None:
+                similarities = vectors @ self._vectors.T
+                similarities[:, self._namespaces != namespace_id] = -np.inf
+                best = similarities.argmax(axis=1)
+                for idx, row in enumerate(best):
+                    if similarities[idx, row] >= self.threshold:
+                        self._use(row)
+                        results[idx] = copy.deepcopy(self._entries[row]["classification"])
+            matched = sum(result is not None for result in results)
+            self.hits += matched
+            self.misses += len(results) - matched
+        return results
+    
+    def group_rows(self, vectors: np.ndarray) -> List[int]:
+        """Position of the first near-duplicate of each embedding within the same batch (itself if none)"""
+        similarities = vectors @ vectors.T
+        heads: List[int] = []
+        leaders: List[int] = []
+        for idx in range(len(vectors)):
+            leader = next((head for head in heads if similarities[idx, head] >= self.threshold), idx)
+            if leader == idx:
+                heads.append(idx)
+            leaders.append(leader)
+        return leaders
+    
+    def add(self, vector: np.ndarray, namespace: str, complaint: str, classification: dict) -> dict:
+        """
+        Index a freshly classified complaint; returns the classification tagged with its
+        duplicate_group. Keyword fallbacks are returned as-is and not indexed.
+        """
+        if is_fallback(classification):
+            return copy.deepcopy(classification)
+        # The same text classified under another namespace is a separate group
+        key = f"{namespace}|{ClassificationCache.normalize(complaint)}"
+        group = hashlib.sha256(key.encode("utf-8")).hexdigest()[:12]
+        tagged = dict(classification, duplicate_group=group)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+            namespace_id = self._namespace_ids.setdefault(namespace, len(self._namespace_ids))
+            
+            row = self._groups.get(group)
+            previous = self._entries[row] if row is not None else None
+            if row is None:
+                free = np.flatnonzero(self._namespaces < 0)
+                if len(free):
+                    row = int(free[0])
+                else:
+                    row = int(self._last_used.argmin())
+                    del self._groups[self._entries[row]["group"]]
+                    self.evictions += 1
+                self._groups[group] = row
+            
+            now = time.time()
+            self._vectors[row] = vector
+            self._namespaces[row] = namespace_id
+            self._entries[row] = {
+                "group": group,
+                "example": complaint[:200],
+                "classification": tagged,
+                "count": previous["count"] if previous else 0,
+                "first_seen": previous["first_seen"] if previous else now,
+                "last_seen": now,
+            }
+            self._use(row)
+        return copy.deepcopy(tagged)
+    
+    def touch(self, group: Optional[str]):
+        """Count another occurrence of a group (e.g. an exact repeat answered by the result cache)"""
+        with self._lock:
+            row = self._groups.get(group)
+            if row is not None:
+                self._use(row)
+    
+    def groups(self, min_count: int = 2, limit: int = 50) -> List[dict]:
+        """Largest duplicate groups first"""
+        with self._lock:
+            entries = [entry for entry in self._entries if entry is not None and entry["count"] >= min_count]
+            entries.sort(key=lambda entry: (entry["count"], entry["last_seen"]), reverse=True)
+            return [{
+                "group": entry["group"],
+                "count": entry["count"],
+                "example": entry["example"],
+                "categories": entry["classification"].get("categories", []),
+                "severity": entry["classification"].get("severity"),
+                "first_seen": entry["first_seen"],
+                "last_seen": entry["last_seen"],
+            } for entry in entries[:max(0, limit)]]
+    
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._groups),
+                "capacity": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+# ========================
+# CASCADE
+# ========================
+
+class CascadeClassifier:
+    """
+    Lightweight first tier in front of the SLM: hashed word, word-bigram and character
+    n-gram features with a logistic (one-vs-rest) category head and a softmax severity
+    head. Confidence is that of the least certain decision; below the threshold the
+    complaint is deferred to the SLM.
+    """
+    
+    def __init__(self, category_weights: np.ndarray, category_bias: np.ndarray,
+                 severity_weights: np.ndarray, severity_bias: np.ndarray,
+                 categories: List[str], severities: List[str], threshold: float, info: Optional[dict] = None):
+        self.category_weights = category_weights
+        self.category_bias = category_bias
+        self.severity_weights = severity_weights
+        self.severity_bias = severity_bias
+        self.categories = categories
+        self.severities = severities
+        self.n_features = category_weights.shape[0]
+        self.threshold = threshold
+        self.info = info or {}
+        self.answered = 0
+        self.deferred = 0
+    
+    @staticmethod
+    def features(text: str, n_features: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Hashed feature indices and L2-normalized log-count values of one complaint"""
+        words = re.findall(r"\w+", unicodedata.normalize("NFKC", text).lower())
+        grams = [f"w:{word}" for word in words]
+        grams += [f"b:{first} {second}" for first, second in zip(words, words[1:])]
+        # Character n-grams carry typos and transliterated (e.g. Hinglish) spellings
+        for word in words:
+            padded = f"<{word}>"
+            grams += [f"c:{padded[i:i + n]}" for n in (3, 4) for i in range(len(padded) - n + 1)]
+        
+        counts = Counter(zlib.crc32(gram.encode("utf-8")) % n_features for gram in grams)
+        indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        values = np.log1p(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+        norm = np.linalg.norm(values)
+        return indices, values / norm if norm else values
+    
+    def predict(self, text: str) -> Tuple[dict, float]:
+        """(classification, confidence) from the light model alone"""
+        indices, values = self.features(text, self.n_features)
+        category_probs = 1.0 / (1.0 + np.exp(-(values @ self.category_weights[indices] + self.category_bias)))
+        severity_logits = values @ self.severity_weights[indices] + self.severity_bias
+        severity_probs = np.exp(severity_logits - severity_logits.max())
+        severity_probs /= severity_probs.sum()
+        
+        order = np.argsort(-category_probs)
+        chosen = [self.categories[idx] for idx in order if category_probs[idx] >= 0.5]
+        confidence = min(float(np.maximum(category_probs, 1.0 - category_probs).min()), float(severity_probs.max()))
+        if not chosen:
+            # Every complaint gets a category; an unsure pick defers to the SLM
+            chosen = [self.categories[order[0]]]
+            confidence = min(confidence, float(category_probs[order[0]]))
+        
+        return {"categories": chosen, "severity": self.severities[int(severity_probs.argmax())]}, confidence
+    
+    def classify(self, text: str) -> Optional[dict]:
+        """The light model's classification when confident enough, otherwise None"""
+        classification, confidence = self.predict(text)
+        if confidence < self.threshold:
+            self.deferred += 1
+            return None
+        self.answered += 1
+        return classification
+    
+    def save(self, path: str):
+        meta = {"categories": self.categories, "severities": self.severities, "threshold": self.threshold, "info": self.info}
+        # Write-then-rename so a running service never loads a half-written file
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            category_weights=self.category_weights,
+            category_bias=self.category_bias,
+            severity_weights=self.severity_weights,
+            severity_bias=self.severity_bias,
+            meta=np.array(json.dumps(meta)),
+        )
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, path: str, threshold: Optional[float] = None) -> "CascadeClassifier":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            return cls(
+                data["category_weights"], data["category_bias"], data["severity_weights"], data["severity_bias"],
+                meta["categories"], meta["severities"],
+                meta["threshold"] if threshold is None else threshold, meta.get("info"),
+            )
+    
+    def stats(self) -> dict:
+        decided = self.answered + self.deferred
+        return {
+            "threshold": self.threshold,
+            "categories": self.categories,
+            "answered": self.answered,
+            "deferred": self.deferred,
+            "answered_rate": round(self.answered / decided, 4) if decided else 0.0,
+            **self.info,
+        }
+
+def load_cascade(path: str = CASCADE_MODEL_PATH) -> Optional[CascadeClassifier]:
+    if not os.path.exists(path):
+        return None
+    try:
+        model = CascadeClassifier.load(path, float(CASCADE_THRESHOLD) if CASCADE_THRESHOLD else None)
+    except Exception as e:
+        log.warning("[CASCADE] Failed to load %s: %s; every request goes to the SLM", path, e)
+        return None
+    log.info("[CASCADE] Loaded %s (%d categories, threshold %s)", path, len(model.categories), model.threshold)
+    return model
+
+# ========================
+# CHAT SESSIONS
+# ========================
+
+class ConversationBusyError(Exception):
+    """Raised when a conversation already has a reply in progress"""
+
+class ChatSession:
+    __slots__ = ("conversation_id", "messages", "token_ids", "past_key_values", "last_used", "busy")
+    
+    def __init__(self, conversation_id: Optional[str]):
+        self.conversation_id = conversation_id
+        self.messages: List[dict] = []
+        self.token_ids: List[int] = []  # tokens covered by past_key_values
+        self.past_key_values = None
+        self.last_used = time.monotonic()
+        self.busy = False
+
+class ChatSessionStore:
+    """
+    Conversations by id, least recently used first. Message history is kept for up to
+    max_sessions conversations (idle ones expire after ttl_seconds); the KV cache of each
+    conversation's last turn is kept while all caches together hold at most
+    max_cached_tokens tokens, after which the least recently used caches are dropped
+    (that conversation's next turn is prefilled from scratch).
+    """
+    
+    def __init__(self, max_sessions: int = 256, ttl_seconds: float = 1800, max_cached_tokens: int = 8192):
+        self.max_sessions = max(1, max_sessions)
+        self.ttl_seconds = ttl_seconds
+        self.max_cached_tokens = max_cached_tokens
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted_sessions = 0
+        self.evicted_caches = 0
+    
+    def _cached_tokens(self) -> int:
+        return sum(len(session.token_ids) for session in self._sessions.values() if session.past_key_values is not None)
+    
+    def _evict(self):
+        now = time.monotonic()
+        for conversation_id, session in list(self._sessions.items()):
+            over_limit = len(self._sessions) > self.max_sessions
+            if not session.busy and (over_limit or now - session.last_used > self.ttl_seconds):
+                del self._sessions[conversation_id]
+                self.evicted_sessions += 1
+        
+        cached = self._cached_tokens()
+        for session in self._sessions.values():
+            if cached <= self.max_cached_tokens:
+                break
+            if not session.busy and session.past_key_values is not None:
+                cached -= len(session.token_ids)
+                session.past_key_values = None
+                session.token_ids = []
+                self.evicted_caches += 1
+    
+    def checkout(self, conversation_id: Optional[str] = None, remember: bool = False) -> ChatSession:
+        """
+        The conversation (a new one when the id is expired), reserved until checkin(). Without an
+        id a new conversation is stored only when remember is set; otherwise the session is
+        one-shot (conversation_id None) and is dropped after the reply.
+        """
+        if conversation_id is None and not remember:
+            session = ChatSession(None)
+            session.busy = True
+            return session
+        with self._lock:
+            conversation_id = conversation_id or uuid.uuid4().hex
+            session = self._sessions.get(conversation_id)
+            if session is None:
+                session = self._sessions[conversation_id] = ChatSession(conversation_id)
+            elif session.busy:
+                raise ConversationBusyError(f"Conversation {conversation_id} already has a reply in progress")
+            session.busy = True
+            self._sessions.move_to_end(conversation_id)
+            self._evict()
+            return session
+    
+    def checkin(self, session: ChatSession):
+        with self._lock:
+            session.busy = False
+            session.last_used = time.monotonic()
+            if session.conversation_id in self._sessions:
+                self._sessions.move_to_end(session.conversation_id)
+            self._evict()
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "cached_tokens": self._cached_tokens(),
+                "max_cached_tokens": self.max_cached_tokens,
+                "evicted_sessions": self.evicted_sessions,
+                "evicted_caches": self.evicted_caches,
+            }
+
+# ========================
+# JOB STORE
+# ========================
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class JobStore:
+    """
+    SQLite store of asynchronous classification jobs: one row per job plus one per complaint,
+    holding its result or error once classified. Jobs are claimed by the process that runs
+    them; a "running" job whose owner process is gone is claimable again, which is how
+    jobs resume after a restart. Every process (forked workers included) opens its own
+    connection; WAL mode lets them share the file. Async code calls the store through
+    run(), so waiting on another worker's write lock never blocks the event loop.
+    """
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._active: set = set()  # jobs this process is running
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    async def run(self, method, *args):
+        """Run a blocking store method on the store's own thread and await its result"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-store")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, method, *args)
+    
+    def open_db(self):
+        """(Re)open the store; forked workers must not share the parent's connection"""
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, mode TEXT NOT NULL, total INTEGER NOT NULL DEFAULT 0, "
+            "done INTEGER NOT NULL DEFAULT 0, failed INTEGER NOT NULL DEFAULT 0, owner_pid INTEGER, error TEXT, "
+            "created_at REAL NOT NULL, started_at REAL, updated_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS job_items ("
+            "job_id TEXT NOT NULL, idx INTEGER NOT NULL, ref TEXT, complaint TEXT NOT NULL, result TEXT, error TEXT, "
+            "PRIMARY KEY (job_id, idx));"
+        )
+        self._db.commit()
+        self._active = set()
+        # The parent's store thread does not exist in a forked worker
+        self._executor = None
+    
+    def _conn(self) -> sqlite3.Connection:
+        # Opened on first use so importing api.py never creates the file
+        if self._db is None:
+            self.open_db()
+        return self._db
+    
+    def create(self, mode: str) -> str:
+        """New job in the "uploading" state (invisible to runners until enqueue())"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn().execute(
+                "INSERT INTO jobs (id, status, mode, created_at, updated_at) VALUES (?, 'uploading', ?, ?, ?)",
+                (job_id, mode, now, now)
+            )
+            self._conn().commit()
+        return job_id
+    
+    def add_items(self, job_id: str, start: int, records: List[Tuple[Optional[str], str]]):
+        """Append (ref, complaint) records numbered from start"""
+        with self._lock:
+            self._conn().executemany(
+                "INSERT INTO job_items (job_id, idx, ref, complaint) VALUES (?, ?, ?, ?)",
+                [(job_id, start + offset, ref, complaint) for offset, (ref, complaint) in enumerate(records)]
+            )
+            self._conn().commit()
+    
+    def enqueue(self, job_id: str, total: int):
+        with self._lock:
+            self._conn().execute(
+                "UPDATE jobs SET status = 'queued', total = ?, updated_at = ? WHERE id = ?", (total, time.time(), job_id)
+            )
+            self._conn().commit()
+    
+    def delete(self, job_id: str):
+        with self._lock:
+            self._conn().execute("DELETE FROM job_items WHERE job_id = ?", (job_id,))
+            self._conn().execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            self._conn().commit()
+    
+    def claim_next(self) -> Optional[dict]:
+        """Take the oldest queued job, or a running one whose owner process died"""
+        pid = os.getpid()
+        with self._lock:
+            candidates = self._conn().execute(
+                "SELECT id, status, owner_pid FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+            for job_id, status, owner_pid in candidates:
+                if status == "running":
+                    orphaned = (owner_pid == pid and job_id not in self._active) or (owner_pid != pid and not _pid_alive(owner_pid))
+                    if not orphaned:
+                        continue
+                # Compare-and-set so only one process wins the claim
+                now = time.time()
+                claimed = self._conn().execute(
+                    "UPDATE jobs SET status = 'running', owner_pid = ?, started_at = COALESCE(started_at, ?), updated_at = ? "
+                    "WHERE id = ? AND status = ? AND owner_pid IS ?",
+                    (pid, now, now, job_id, status, owner_pid)
+                ).rowcount
+                self._conn().commit()
+                if claimed:
+                    self._active.add(job_id)
+                    return self._get(job_id)
+        return None
+    
+    def release(self, job_id: str):
+        with self._lock:
+            self._active.discard(job_id)
+    
+    def pending_items(self, job_id: str, limit: int) -> List[Tuple[int, str]]:
+        with self._lock:
+            return self._conn().execute(
+                "SELECT idx, complaint FROM job_items WHERE job_id = ? AND result IS NULL AND error IS NULL "
+                "ORDER BY idx LIMIT ?", (job_id, limit)
+            ).fetchall()
+    
+    def save_results(self, job_id: str, rows: List[Tuple[int, Optional[str], Optional[str]]]):
+        """Store (idx, result JSON, error) rows and advance the job's counters in one transaction"""
+        failed = sum(1 for _, _, error in rows if error is not None)
+        with self._lock:
+            self._conn().executemany(
+                "UPDATE job_items SET result = ?, error = ? WHERE job_id = ? AND idx = ?",
+                [(result, error, job_id, idx) for idx, result, error in rows]
+            )
+            self._conn().execute(
+                "UPDATE jobs SET done = done + ?, failed = failed + ?, updated_at = ? WHERE id = ?",
+                (len(rows), failed, time.time(), job_id)
+            )
+            self._conn().commit()
+    
+    def finish(self, job_id: str, status: str, error: Optional[str] = None):
+        """Final state for a running job (a job cancelled meanwhile stays cancelled)"""
+        with self._lock:
+            self._conn().execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ? AND status = 'running'",
+                (status, error, time.time(), job_id)
+            )
+            self._conn().commit()
+    
+    def cancel(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            self._conn().execute(
+                "UPDATE jobs SET status = 'cancelled', updated_at = ? WHERE id = ? AND status IN ('queued', 'running')",
+                (time.time(), job_id)
+            )
+            self._conn().commit()
+            return self._get(job_id)
+    
+    def _get(self, job_id: str) -> Optional[dict]:
+        row = self._conn().execute(
+            "SELECT id, status, mode, total, done, failed, error, created_at, started_at, updated_at FROM jobs WHERE id = ?",
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(("job_id", "status", "mode", "total", "done", "failed", "error",
+                        "created_at", "started_at", "updated_at"), row))
+        job["progress"] = round(job["done"] / job["total"], 4) if job["total"] else 0.0
+        # Throughput since the job first started (includes time spent waiting behind other work)
+        elapsed = job["updated_at"] - job["started_at"] if job["started_at"] else 0
+        rate = job["done"] / elapsed if elapsed > 0 else 0.0
+        job["items_per_second"] = round(rate, 2)
+        job["eta_seconds"] = round((job["total"] - job["done"]) / rate, 1) if rate and job["status"] == "running" else None
+        return job
+    
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._get(job_id)
+    
+    def list(self, limit: int = 50) -> List[dict]:
+        with self._lock:
+            ids = self._conn().execute("SELECT id FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+            return [self._get(job_id) for (job_id,) in ids]
+    
+    def results(self, job_id: str, offset: int = 0, limit: int = 100) -> List[dict]:
+        """Finished items with index >= offset, in input order"""
+        with self._lock:
+            rows = self._conn().execute(
+                "SELECT idx, ref, complaint, result, error FROM job_items "
+                "WHERE job_id = ? AND idx >= ? AND (result IS NOT NULL OR error IS NOT NULL) ORDER BY idx LIMIT ?",
+                (job_id, offset, limit)
+            ).fetchall()
+        items = []
+        for idx, ref, complaint, result, error in rows:
+            item = {"index": idx, "id": ref, "complaint": complaint}
+            if error is not None:
+                item["error"] = error
+            else:
+                item["result"] = json.loads(result)
+            items.append(item)
+        return items
+    
+    def purge(self, older_than_seconds: float) -> int:
+        """Delete finished jobs last updated more than older_than_seconds ago"""
+        cutoff = time.time() - older_than_seconds
+        with self._lock:
+            ids = [job_id for (job_id,) in self._conn().execute(
+                "SELECT id FROM jobs WHERE status IN ('completed', 'failed', 'cancelled') AND updated_at < ?", (cutoff,)
+            ).fetchall()]
+            for job_id in ids:
+                self._conn().execute("DELETE FROM job_items WHERE job_id = ?", (job_id,))
+                self._conn().execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            self._conn().commit()
+        return len(ids)
 
 # ========================
 # BUSINESS LOGIC
 # ========================
 
-def compute_anonymous_recommended(categories: List[str], complaint_text: str) -> bool:
-    """Determine if anonymous submission is recommended"""
-    # Keywords indicating power imbalance or fear
-    fear_keywords = [
-        "scared", "afraid", "fear", "retaliation", "threatened", 
-        "controls my", "power over", "dependent on", "blackmail"
-    ]
+# Built-in rules (the shipped policy.json), in force while the policy file is missing or invalid
+DEFAULT_POLICY = {
+    "routing_rules": [
+        {"categories": ["Workplace Harassment", "Sexual Harassment", "Abuse of Authority"], "department": "Internal Complaints Committee"},
+        {"categories": ["Corruption or Bribery", "Fraud"], "department": "Vigilance / Ethics Office"},
+        {"categories": ["Discrimination or Bias"], "department": "Diversity & Inclusion Office"},
+        {"categories": ["Safety Hazard"], "department": "Health & Safety Department"},
+        {"categories": ["Mental Health or Stress"], "department": "Employee Wellness / HR"},
+        {"categories": ["Academic Misconduct"], "department": "Academic Affairs / Disciplinary Committee"},
+        {"categories": ["Infrastructure or Facility Issue", "Service Issue"], "department": "Operations / Facilities Management"},
+        {"categories": ["HR"], "department": "Human Resources"},
+    ],
+    "default_department": "Customer Support / General Grievance Cell",
+    "sla_hours": {"Critical": 24, "High": 72, "Normal": 168},
+    "default_sla_hours": 168,
+    "escalation_severities": ["Critical"],
+    "sensitive_categories": [
+        "Workplace Harassment", "Abuse of Authority", "Discrimination or Bias", "Sexual Harassment",
+        "Corruption or Bribery", "Fraud", "Retaliation", "Whistleblowing",
+    ],
+}
+
+class RoutingPolicy:
+    """
+    Business rules from the policy file compiled into lookup tables.
+    Per-category answers (department priority, sensitivity) are computed once per
+    distinct category string, so evaluating a classification is a few dict lookups.
+    """
     
-    # Category-based rules
-    sensitive_categories = [
-        "Workplace Harassment", "Abuse of Authority", 
-        "Discrimination or Bias", "Sexual Harassment","Corruption or Bribery",
-        "Fraud","Retaliation","Whistleblowing"
-    ]
-    
-    # Check categories
-    for cat in categories:
-        if any(sensitive in cat for sensitive in sensitive_categories):
+    MEMO_SIZE = 4096  # distinct category strings remembered beyond the known labels
+    
+    def __init__(self, config: dict, source: str = "", mtime: float = 0.0):
+        self.source = source
+        self.mtime = mtime
+        self.rules = [
+            ([keyword.lower() for keyword in rule["categories"]], str(rule["department"]))
+            for rule in config["routing_rules"]
+        ]
+        self.default_department = str(config["default_department"])
+        self.sla_hours = {severity: int(hours) for severity, hours in config["sla_hours"].items()}
+        self.default_sla_hours = int(config["default_sla_hours"])
+        self.escalation_severities = frozenset(config["escalation_severities"])
+        self.sensitive_categories = list(config["sensitive_categories"])
+        
+        self._route_memo: Dict[str, Optional[int]] = {}
+        self._sensitive_memo: Dict[str, bool] = {}
+        for category in CATEGORY_LABELS + ["Harassment", "Infrastructure", "Academic", "Other"]:
+            self._rule_index(category)
+            self._is_sensitive(category)
+    
+    @classmethod
+    def from_file(cls, path: str) -> "RoutingPolicy":
+        mtime = os.path.getmtime(path)
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), source=path, mtime=mtime)
+    
+    def _rule_index(self, category: str) -> Optional[int]:
+        """Index of the first (highest priority) rule whose keyword occurs in the category"""
+        if category in self._route_memo:
+            return self._route_memo[category]
+        category_lower = category.lower()
+        index = next(
+            (idx for idx, (keywords, _) in enumerate(self.rules)
+             if any(keyword in category_lower for keyword in keywords)),
+            None,
+        )
+        if len(self._route_memo) < self.MEMO_SIZE:
+            self._route_memo[category] = index
+        return index
+    
+    def _is_sensitive(self, category: str) -> bool:
+        sensitive = self._sensitive_memo.get(category)
+        if sensitive is None:
+            sensitive = any(name in category for name in self.sensitive_categories)
+            if len(self._sensitive_memo) < self.MEMO_SIZE:
+                self._sensitive_memo[category] = sensitive
+        return sensitive
+    
+    def route_to(self, categories: List[str]) -> str:
+        # Priority-based routing (first matching rule wins across all categories)
+        indices = [idx for idx in map(self._rule_index, categories) if idx is not None]
+        return self.rules[min(indices)][1] if indices else self.default_department
+    
+    def sla(self, severity: str) -> int:
+        return self.sla_hours.get(severity, self.default_sla_hours)
+    
+    def escalation_required(self, severity: str) -> bool:
+        return severity in self.escalation_severities
+    
+    def sensitive(self, categories: List[str]) -> bool:
+        return any(self._is_sensitive(category) for category in categories)
+    
+    def evaluate_many(self, classifications: List[dict]) -> List[dict]:
+        """Routing, SLA, escalation and category sensitivity for many base classifications"""
+        return [
+            {
+                "route_to": self.route_to(item.get("categories", [])),
+                "sla_hours": self.sla(item.get("severity", "Normal")),
+                "escalation_required": self.escalation_required(item.get("severity", "Normal")),
+                "sensitive": self.sensitive(item.get("categories", [])),
+            }
+            for item in classifications
+        ]
+
+class PolicyStore:
+    """
+    Holds the active RoutingPolicy. A reload compiles the new file completely and then
+    swaps a single reference, so requests see either the old or the new policy, never
+    a mix; a file that fails to load or validate leaves the current policy in place.
+    Until the file first loads, the built-in DEFAULT_POLICY is in force.
+    """
+    
+    def __init__(self, path: str, poll_seconds: float = 5.0):
+        self.path = path
+        self.poll_seconds = poll_seconds
+        self.current = RoutingPolicy(DEFAULT_POLICY, source="built-in")
+        self.reloads = 0
+        self.reload_errors = 0
+        self.last_error: Optional[str] = None
+        self._failed_mtime: Optional[float] = None
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        if not self.reload(force=True):
+            log.error("[POLICY] Using the built-in default rules until %s loads", path)
+    
+    def reload(self, force: bool = False) -> bool:
+        """Recompile the file if it changed (or always with force); returns True when swapped"""
+        with self._lock:
+            mtime = None
+            try:
+                # A missing file keeps mtime None, so it is reported once rather than every poll
+                mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+                if not force and mtime in (self.current.mtime, self._failed_mtime):
+                    return False
+                policy = RoutingPolicy.from_file(self.path)
+            except Exception as e:
+                # Not retried until the file changes again
+                self._failed_mtime = mtime
+                self.reload_errors += 1
+                self.last_error = str(e)
+                log.warning("[POLICY] Reload of %s failed, keeping current policy: %s", self.path, e)
+                return False
+            self.current = policy
+            self.reloads += 1
+            self.last_error = None
+            log.info("[POLICY] Loaded %d routing rules from %s", len(policy.rules), self.path)
             return True
     
-    # Check text for fear indicators
-    complaint_lower = complaint_text.lower()
-    if any(keyword in complaint_lower for keyword in fear_keywords):
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_seconds)
+            self.reload()
+    
+    def start_watching(self):
+        if self.poll_seconds > 0 and (self._watcher is None or not self._watcher.is_alive()):
+            self._watcher = threading.Thread(target=self._watch, name="policy-watcher", daemon=True)
+            self._watcher.start()
+    
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "source": self.current.source,
+            "mtime": self.current.mtime,
+            "routing_rules": len(self.current.rules),
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+            "last_error": self.last_error,
+        }
+
+policy_store = PolicyStore(POLICY_PATH, POLICY_RELOAD_SECONDS)
+
+def compute_anonymous_recommended(categories: List[str], complaint_text: str,
+                                  hits: Optional[List[KeywordHit]] = None) -> bool:
+    """Determine if anonymous submission is recommended"""
+    # Category-based rules
+    if policy_store.current.sensitive(categories):
+        return True
+    
+    # Check text for power imbalance / fear indicators
+    if hits is None:
+        hits = keyword_matcher.find(complaint_text)
+    if keyword_matcher.values(hits, "fear"):
         return True
     
     return False
 
 def compute_escalation_required(severity: str) -> bool:
-    """Escalation required for Critical severity"""
-    return severity == "Critical"
+    """Escalation required for the policy's escalation severities (Critical by default)"""
+    return policy_store.current.escalation_required(severity)
 
 def compute_route_to(categories: List[str]) -> str:
     """Map categories to department/authority"""
-    # Priority-based routing (first match wins)
-    routing_rules = [
-        (["Workplace Harassment", "Sexual Harassment", "Abuse of Authority"], "Internal Complaints Committee"),
-        (["Corruption or Bribery", "Fraud"], "Vigilance / Ethics Office"),
-        (["Discrimination or Bias"], "Diversity & Inclusion Office"),
-        (["Safety Hazard"], "Health & Safety Department"),
-        (["Mental Health or Stress"], "Employee Wellness / HR"),
-        (["Academic Misconduct"], "Academic Affairs / Disciplinary Committee"),
-        (["Infrastructure or Facility Issue", "Service Issue"], "Operations / Facilities Management"),
-        (["HR"], "Human Resources"),
-    ]
-    
-    for keywords, department in routing_rules:
-        for cat in categories:
-            if any(keyword.lower() in cat.lower() for keyword in keywords):
-                return department
-    
-    return "Customer Support / General Grievance Cell"
+    return policy_store.current.route_to(categories)
 
 def compute_sla_hours(severity: str) -> int:
     """Calculate SLA based on severity"""
-    sla_map = {
-        "Critical": 24,
-        "High": 72,
-        "Normal": 168
-    }
-    return sla_map.get(severity, 168)
-
-def extend_classification(base: dict, complaint_text: str) -> ClassificationResponse:
-    """Extend base model output with business logic"""
-    categories = base.get("categories", [])
-    severity = base.get("severity", "Normal")
-    
-    return ClassificationResponse(
-        categories=categories,
-        severity=severity,
-        anonymous_recommended=compute_anonymous_recommended(categories, complaint_text),
-        escalation_required=compute_escalation_required(severity),
-        route_to=compute_route_to(categories),
-        sla_hours=compute_sla_hours(severity)
+    return policy_store.current.sla(severity)
+
+def extend_classification(base: dict, complaint_text: str,
+                          hits: Optional[List[KeywordHit]] = None) -> ClassificationResponse:
+    """Extend base model output with business logic (hits: precomputed keyword_matcher results)"""
+    return extend_classifications([base], [complaint_text], [hits] if hits is not None else None)[0]
+
+def extend_classifications(bases: List[dict], complaint_texts: List[str],
+                           hits: Optional[List[List[KeywordHit]]] = None) -> List[ClassificationResponse]:
+    """Extend many base outputs against one policy snapshot and one keyword sweep"""
+    with stage_timer("extend"):
+        return _extend_classifications(bases, complaint_texts, hits)
+
+def _extend_classifications(bases: List[dict], complaint_texts: List[str],
+                            hits: Optional[List[List[KeywordHit]]]) -> List[ClassificationResponse]:
+    policy = policy_store.current
+    if hits is None:
+        hits = keyword_matcher.find_many(complaint_texts)
+    
+    results = []
+    for base, complaint_text, complaint_hits, decision in zip(bases, complaint_texts, hits, policy.evaluate_many(bases)):
+        categories = base.get("categories", [])
+        anonymous = decision["sensitive"] or bool(keyword_matcher.values(complaint_hits, "fear"))
+        results.append(ClassificationResponse(
+            categories=categories,
+            severity=base.get("severity", "Normal"),
+            anonymous_recommended=anonymous,
+            escalation_required=decision["escalation_required"],
+            route_to=decision["route_to"],
+            sla_hours=decision["sla_hours"],
+            confidence=base.get("confidence"),
+            duplicate_group=base.get("duplicate_group")
+        ))
+    return results
+
+def build_explanation(classification: ClassificationResponse, spans: List[dict],
+                      hits: List[KeywordHit]) -> ExplainResponse:
+    """
+    Summary and key triggers for a classification. Triggers are the complaint spans whose
+    removal most lowers the model's confidence in its answer (attribute_spans); the
+    keyword tables are only used when no span attribution is available.
+    """
+    key_triggers = []
+    for span in spans:
+        trigger = span["text"].strip(" .,;:!?\"'()[]").lower()
+        if trigger and trigger not in key_triggers:
+            key_triggers.append(trigger)
+    
+    if not key_triggers:
+        # Severity triggers, then category-specific triggers (tables in KEYWORD_TABLES)
+        trigger_tags = [("severity_trigger", classification.severity)]
+        for category in classification.categories:
+            for cat_name in keyword_matcher.values(hits, "category_trigger"):
+                if cat_name.lower() in category.lower():
+                    trigger_tags.append(("category_trigger", cat_name))
+        
+        for kind, value in trigger_tags:
+            for keyword in keyword_matcher.triggers(hits, kind, value):
+                if keyword not in key_triggers:
+                    key_triggers.append(keyword)
+    
+    # Limit triggers
+    key_triggers = key_triggers[:MAX_KEY_TRIGGERS]
+    
+    # Generate summary
+    category_str = ", ".join(classification.categories)
+    if classification.severity == "Critical":
+        reason = f"Classified as Critical due to {category_str.lower()}"
+        if classification.anonymous_recommended:
+            reason += " with power imbalance indicators"
+    elif classification.severity == "High":
+        reason = f"Classified as High - {category_str.lower()} requiring urgent attention"
+    else:
+        reason = f"Classified as Normal - general {category_str.lower()}"
+    
+    return ExplainResponse(
+        summary_reason=reason,
+        key_triggers=key_triggers if key_triggers else ["general complaint indicators"]
     )
 
 # ========================
 # GLOBAL CLASSIFIER
 # ========================
 
-classifier = ComplaintClassifier()
+# Loaded in the background at startup (or by load_model() in scripts);
+# endpoints answer 503 until it is ready
+classifier: Optional[ComplaintClassifier] = None
+# Per process: every forked worker indexes the complaints it classified itself
+duplicate_index = DuplicateIndex(threshold=DEDUP_THRESHOLD, max_entries=DEDUP_MAX_ENTRIES)
+scheduler = MicroBatchScheduler(
+    None,
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS,
+    max_queue_size=INFERENCE_QUEUE_SIZE,
+    deadline_seconds=REQUEST_DEADLINE_SECONDS,
+    duplicate_index=duplicate_index,
+)
+model_status = {"state": "not_started", "error": None, "load_seconds": None, "peak_rss_mb": None}
+
+class ModelNotReadyError(Exception):
+    """Raised while the model is still loading (or failed to load)"""
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+def warm_up(clf: ComplaintClassifier):
+    """First generate pays for lazy kernel/thread-pool setup; keep it off the request path"""
+    clf._generate_batch(["The hostel wifi has not been working for two days."])
+    clf.reset_decode_stats()
+
+def load_model(warmup: bool = True) -> ComplaintClassifier:
+    """Load the classifier, optionally run one warmup generate, and publish it to the endpoints"""
+    global classifier
+    model_status["state"] = "loading"
+    started = time.perf_counter()
+    try:
+        loaded = ComplaintClassifier()
+        if warmup:
+            warm_up(loaded)
+    except Exception as e:
+        model_status.update(state="failed", error=str(e))
+        log.error("[INIT] Model load failed: %s", e)
+        raise
+    
+    scheduler.classifier = loaded
+    classifier = loaded
+    model_status.update(state="ready", load_seconds=round(time.perf_counter() - started, 2), peak_rss_mb=peak_rss_mb())
+    log.info("[INIT] Model ready in %ss (peak RSS %s MB)", model_status["load_seconds"], model_status["peak_rss_mb"])
+    return loaded
+
+def _load_model_in_background():
+    try:
+        load_model()
+    except Exception:
+        pass  # recorded in model_status; /health/ready reports it
+
+@app.on_event("startup")
+def start_model_loading():
+    """Start loading without blocking startup, so liveness probes answer immediately; watch the policy file"""
+    if model_status["state"] == "not_started":
+        threading.Thread(target=_load_model_in_background, name="model-loader", daemon=True).start()
+    # Started here rather than at import so every forked worker gets its own watcher
+    policy_store.start_watching()
+
+@app.on_event("startup")
+async def start_job_runner():
+    """Run queued jobs, and resume ones whose process died, in the background of every worker"""
+    asyncio.ensure_future(run_jobs())
+
+def require_classifier() -> ComplaintClassifier:
+    if classifier is None:
+        raise ModelNotReadyError(f"Model is not ready ({model_status['state']})")
+    return classifier
+
+job_store = JobStore(JOBS_DB_PATH)
+
+chat_sessions = ChatSessionStore(
+    max_sessions=CHAT_MAX_SESSIONS,
+    ttl_seconds=CHAT_SESSION_TTL_SECONDS,
+    max_cached_tokens=CHAT_KV_CACHE_TOKENS,
+)
+
+# First tier for "generate" requests (None when no cascade model has been trained)
+cascade = load_cascade()
+
+classification_cache = ClassificationCache(
+    max_entries=CACHE_MAX_ENTRIES,
+    max_bytes=CACHE_MAX_BYTES,
+    ttl_seconds=CACHE_TTL_SECONDS,
+    db_path=CACHE_DB_PATH,
+)
+
+profiler = SlowRequestProfiler(PROFILE_SLOW_MS, PROFILE_INTERVAL_MS, PROFILE_DIR, PROFILE_MAX_FILES,
+                               window_seconds=REQUEST_DEADLINE_SECONDS * 2)
+
+metrics.gauge("complaint_model_loaded", "1 once the model is loaded and warmed up", lambda: classifier is not None)
+metrics.gauge("complaint_queue_depth", "Model work items waiting in the inference queue", lambda: scheduler.depth)
+metrics.gauge("complaint_cache_entries", "Cached classifications", lambda: classification_cache.stats()["entries"])
+metrics.gauge("complaint_cache_hit_ratio", "Classification cache hit ratio", lambda: classification_cache.stats()["hit_rate"])
+metrics.gauge("complaint_duplicate_entries", "Complaints in the near-duplicate index", lambda: duplicate_index.stats()["entries"])
+metrics.gauge("complaint_duplicate_hit_ratio", "Share of classifications answered by a near-duplicate",
+              lambda: duplicate_index.stats()["hit_rate"])
+metrics.gauge("complaint_cascade_answered", "Requests answered by the cascade without the SLM",
+              lambda: cascade.answered if cascade else 0)
+metrics.gauge("complaint_cascade_deferred", "Requests the cascade deferred to the SLM",
+              lambda: cascade.deferred if cascade else 0)
+metrics.gauge("complaint_chat_sessions", "Open chat conversations", lambda: chat_sessions.stats()["sessions"])
+metrics.gauge("complaint_chat_cached_tokens", "Tokens held in chat KV caches", lambda: chat_sessions.stats()["cached_tokens"])
+metrics.gauge("complaint_retry_ratio", "Strict retries per first-pass item",
+              lambda: classifier.get_decode_stats()["retry_rate"] if classifier else 0)
+metrics.gauge("complaint_fallback_ratio", "Keyword fallbacks per first-pass item", lambda: (
+    classifier.decode_stats["fallbacks"] / max(1, classifier.decode_stats["first_pass_items"]) if classifier else 0
+))
+metrics.gauge("complaint_log_queue_depth", "Log and capture records waiting for the writer thread", lambda: _log_queue.qsize())
+metrics.gauge("complaint_log_dropped", "Log and capture records dropped because the writer fell behind",
+              lambda: _log_handler.dropped)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Request latency histogram, plus a profile of the request when it is slower than PROFILE_SLOW_MS"""
+    profile_started = profiler.request_started() if profiler.enabled else None
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Route templates (not raw paths) keep the label set bounded
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method=request.method, path=path, status=status)
+        if profile_started is not None:
+            profiler.request_finished(profile_started, f"{request.method} {path}")
+
+async def _await_result(future: Future, deadline: float):
+    """Wait for executor work without holding a threadpool thread"""
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout=max(0.0, deadline - time.monotonic()))
+    except asyncio.TimeoutError:
+        future.cancel()
+        raise DeadlineExceededError("Request deadline passed")
+
+def _overload_exception(e: Exception) -> Optional[HTTPException]:
+    """Map readiness, admission and deadline errors to fast HTTP responses"""
+    if isinstance(e, ModelNotReadyError):
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    if isinstance(e, QueueFullError):
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    if isinstance(e, DeadlineExceededError):
+        return HTTPException(status_code=504, detail=str(e))
+    return None
+
+async def get_base_classification(complaint: str, mode: Optional[str] = None) -> dict:
+    """Base classification for one complaint, served from the cache when possible"""
+    mode = mode or CLASSIFIER_MODE
+    key = classification_cache.make_key(complaint, f"{require_classifier().cache_namespace}|{mode}")
+    cached = await classification_cache.run(classification_cache.get, key)
+    if cached is not None:
+        duplicate_index.touch(cached.get("duplicate_group"))
+        return cached
+    
+    # Cheap enough to recompute, so cascade answers are not cached
+    if cascade is not None and mode == "generate":
+        with stage_timer("cascade"):
+            light = cascade.classify(complaint)
+        if light is not None:
+            return light
+    
+    deadline = time.monotonic() + REQUEST_DEADLINE_SECONDS
+    result = await _await_result(scheduler.submit(complaint, mode, deadline), deadline)
+    await classification_cache.run(classification_cache.put, key, result)
+    return result
+
+async def get_explained_classification(complaint: str, mode: Optional[str] = None) -> Tuple[dict, List[dict]]:
+    """
+    Base classification plus span attributions for one complaint. The classification comes
+    from get_base_classification (cache, cascade, micro-batched with /classify traffic), so
+    it matches /classify; only an uncached attribution runs as its own executor task.
+    """
+    mode = mode or CLASSIFIER_MODE
+    clf = require_classifier()
+    result = await get_base_classification(complaint, mode)
+    if is_fallback(result):
+        # The keyword fallback answered, so its triggers are the explanation (build_explanation); no model pass
+        return result, []
+    
+    # Attributions explain one particular answer, so the answer is part of the key
+    answer = json.dumps([sorted(result.get("categories", [])), result.get("severity")])
+    attribution_key = classification_cache.make_key(complaint, f"{clf.cache_namespace}|{mode}|attribution|{answer}")
+    attribution = await classification_cache.run(classification_cache.get, attribution_key)
+    if attribution is not None:
+        return result, attribution["spans"]
+    
+    def attribute():
+        try:
+            return clf.attribute_spans(complaint, result)
+        except Exception as e:
+            request_log.warning("[EXPLAIN] Attribution failed: %s, using keyword triggers", e)
+            return None
+    
+    deadline = time.monotonic() + REQUEST_DEADLINE_SECONDS
+    spans = await _await_result(scheduler.submit_call(attribute, deadline), deadline)
+    if spans is not None:
+        await classification_cache.run(classification_cache.put, attribution_key, {"spans": spans})
+    return result, spans or []
+
+async def get_base_classifications(complaints: List[str], mode: Optional[str] = None,
+                                   priority: int = MicroBatchScheduler.NORMAL) -> List[object]:
+    """
+    Base classifications for a list; only cache misses reach the model. A chunk that is
+    rejected, expires or fails leaves its exception in place of each of its items, and the
+    other chunks' results are kept.
+    """
+    mode = mode or CLASSIFIER_MODE
+    namespace = f"{require_classifier().cache_namespace}|{mode}"
+    keys = [classification_cache.make_key(complaint, namespace) for complaint in complaints]
+    results: List[Optional[dict]] = await classification_cache.run(classification_cache.get_many, keys)
+    for result in results:
+        if result is not None:
+            duplicate_index.touch(result.get("duplicate_group"))
+    if cascade is not None and mode == "generate":
+        with stage_timer("cascade"):
+            results = [result if result is not None else cascade.classify(complaint)
+                       for complaint, result in zip(complaints, results)]
+    
+    # Identical complaints inside one batch are generated once
+    pending: "OrderedDict[str, List[int]]" = OrderedDict()
+    for idx, (key, result) in enumerate(zip(keys, results)):
+        if result is None:
+            pending.setdefault(key, []).append(idx)
+    
+    if pending:
+        misses = [complaints[indices[0]] for indices in pending.values()]
+        pending_keys = list(pending.keys())
+        
+        # Each length bucket is its own executor task, so single /classify calls interleave.
+        # Bucketing tokenizes, so it runs on the worker too (the fast tokenizer is not thread-safe)
+        deadline = time.monotonic() + BATCH_DEADLINE_SECONDS
+        chunks = await _await_result(scheduler.submit_call(
+            lambda: classifier.bucket_by_length(misses, BATCH_CHUNK_SIZE), deadline, priority
+        ), deadline)
+        
+        def submit(chunk: List[int]):
+            """The chunk's future, or the error that kept it from being queued"""
+            if time.monotonic() >= deadline:
+                return DeadlineExceededError("Request deadline passed")
+            chunk_complaints = [misses[idx] for idx in chunk]
+            try:
+                return scheduler.submit_call(
+                    lambda: classifier.classify_with_mode(chunk_complaints, mode, duplicate_index), deadline, priority
+                )
+            except QueueFullError as e:
+                return e
+        
+        submitted = []
+        try:
+            for position, chunk in enumerate(chunks):
+                # The next chunk waits in the queue behind this one, so the worker never idles on the loop
+                while len(submitted) < min(position + BATCH_CHUNKS_IN_FLIGHT, len(chunks)):
+                    submitted.append(submit(chunks[len(submitted)]))
+                try:
+                    if isinstance(submitted[position], Exception):
+                        raise submitted[position]
+                    chunk_results = await _await_result(submitted[position], deadline)
+                except Exception as e:
+                    request_log.warning("[BATCH] Chunk of %d item(s) failed: %s", len(chunk), e)
+                    for miss_idx in chunk:
+                        for idx in pending[pending_keys[miss_idx]]:
+                            results[idx] = e
+                    continue
+                
+                await classification_cache.run(classification_cache.put_many, [
+                    (pending_keys[miss_idx], result) for miss_idx, result in zip(chunk, chunk_results)
+                ])
+                for miss_idx, result in zip(chunk, chunk_results):
+                    for idx in pending[pending_keys[miss_idx]]:
+                        results[idx] = copy.deepcopy(result)
+        finally:
+            # A caller that gave up leaves no queued chunks behind
+            for future in submitted:
+                if isinstance(future, Future):
+                    future.cancel()
+    
+    return results
+
+async def run_chat_turn(session: ChatSession, message: str, on_text) -> str:
+    """
+    One chat reply as LOW priority executor slices: prefill plus the first token, then
+    CHAT_SLICE_TOKENS at a time. on_text is called on the executor thread with each new
+    piece of text. The session must be checked out; it is checked back in here.
+    """
+    clf = require_classifier()
+    messages = session.messages + [{"role": "user", "content": message}]
+    # The cache belongs to this turn now; it goes back to the session only if the turn completes
+    cached_ids, past_key_values = session.token_ids, session.past_key_values
+    session.token_ids, session.past_key_values = [], None
+    try:
+        def first_slice():
+            state = clf.chat_prefill(messages, cached_ids, past_key_values)
+            clf.chat_decode(state, 1, on_text)
+            return state
+        
+        deadline = time.monotonic() + REQUEST_DEADLINE_SECONDS
+        state = await _await_result(scheduler.submit_call(first_slice, deadline, priority=scheduler.LOW), deadline)
+        while not state["done"]:
+            deadline = time.monotonic() + REQUEST_DEADLINE_SECONDS
+            await _await_result(scheduler.submit_call(
+                lambda: clf.chat_decode(state, CHAT_SLICE_TOKENS, on_text),
+                deadline, priority=scheduler.LOW, continuation=True,
+            ), deadline)
+        
+        session.messages = state["messages"] + [{"role": "assistant", "content": state["text"]}]
+        session.token_ids = state["ids"] + state["generated"]
+        session.past_key_values = state["past_key_values"]
+        return state["text"]
+    finally:
+        chat_sessions.checkin(session)
+
+async def process_job(job: dict):
+    """Classify a claimed job's remaining items chunk by chunk at low priority, saving each chunk"""
+    job_id = job["job_id"]
+    log.info("[JOBS] Running %s: %d/%d done", job_id, job["done"], job["total"])
+    try:
+        while True:
+            current = await job_store.run(job_store.get, job_id)
+            if current is None or current["status"] != "running":
+                log.info("[JOBS] %s stopped (%s)", job_id, current["status"] if current else "deleted")
+                return
+            items = await job_store.run(job_store.pending_items, job_id, JOB_CHUNK_SIZE)
+            if not items:
+                await job_store.run(job_store.finish, job_id, "completed")
+                log.info("[JOBS] %s completed", job_id)
+                return
+            
+            complaints = [complaint for _, complaint in items]
+            overload = (ModelNotReadyError, QueueFullError, DeadlineExceededError)
+            try:
+                bases = await get_base_classifications(complaints, job["mode"], priority=MicroBatchScheduler.LOW)
+            except Exception as e:
+                bases = [e] * len(items)
+            
+            rows = []
+            busy = None
+            for (idx, complaint), base in zip(items, bases):
+                if isinstance(base, overload):
+                    # Busy with interactive traffic: the item stays pending and is retried
+                    busy = base
+                    continue
+                try:
+                    if isinstance(base, Exception):
+                        raise base
+                    rows.append((idx, extend_classification(base, complaint).model_dump_json(), None))
+                except Exception as e:
+                    rows.append((idx, None, str(e)))
+            if rows:
+                await job_store.run(job_store.save_results, job_id, rows)
+            if busy is not None:
+                await asyncio.sleep(getattr(busy, "retry_after", JOB_POLL_SECONDS))
+    except Exception as e:
+        await job_store.run(job_store.finish, job_id, "failed", str(e))
+        log.error("[JOBS] %s failed: %s", job_id, e)
+    finally:
+        await job_store.run(job_store.release, job_id)
+
+async def run_jobs():
+    """Background loop: claim queued (or orphaned) jobs and run them one at a time"""
+    last_purge = 0.0
+    while True:
+        try:
+            job = await job_store.run(job_store.claim_next) if classifier is not None else None
+            if job is not None:
+                await process_job(job)
+                continue
+            if time.time() - last_purge > 3600:
+                last_purge = time.time()
+                purged = await job_store.run(job_store.purge, JOB_RETENTION_SECONDS)
+                if purged:
+                    log.info("[JOBS] Purged %d finished job(s)", purged)
+        except Exception as e:
+            log.error("[JOBS] Runner error: %s", e)
+        await asyncio.sleep(JOB_POLL_SECONDS)
+
+async def _iter_body_records(body: JobRequest):
+    for ref, complaint in zip(body.ids or [None] * len(body.complaints), body.complaints):
+        yield ref, complaint
+
+async def _iter_jsonl_records(request: Request, field: str):
+    """(ref, complaint) records of a JSONL upload (one string or object per line), parsed as it arrives"""
+    buffered = b""
+    line_number = 0
+    async for chunk in request.stream():
+        buffered += chunk
+        *lines, buffered = buffered.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield _job_record(line, field, line_number)
+    if buffered.strip():
+        yield _job_record(buffered, field, line_number + 1)
+
+def _job_record(line: bytes, field: str, line_number: int) -> Tuple[Optional[str], str]:
+    try:
+        row = json.loads(line)
+    except ValueError:
+        raise ValueError(f"Line {line_number} is not valid JSON")
+    if isinstance(row, str):
+        return None, row
+    complaint = row.get(field) if isinstance(row, dict) else None
+    if not isinstance(complaint, str) or not complaint.strip():
+        raise ValueError(f"Line {line_number} has no '{field}' text")
+    ref = row.get("id")
+    return (None if ref is None else str(ref)), complaint
+
+def _chat_event(stream_format: str, payload: dict) -> str:
+    data = json.dumps(payload, ensure_ascii=False)
+    return f"data: {data}\n\n" if stream_format == "sse" else data + "\n"
 
 # ========================
 # ENDPOINTS
 # ========================
 
 @app.post("/classify", response_model=ClassificationResponse)
-def classify_complaint(request: ClassifyRequest):
+async def classify_complaint(request: ClassifyRequest, explain: bool = False):
     """
-    Classify a single complaint
+    Classify a single complaint (explain=true also returns the explanation of the same classification)
     """
     try:
-        base_classification = classifier.classify_base(request.complaint)
+        if explain:
+            base_classification, spans = await get_explained_classification(request.complaint, request.mode)
+            hits = keyword_matcher.find(request.complaint)
+            result = extend_classification(base_classification, request.complaint, hits)
+            result.explanation = build_explanation(result, spans, hits)
+            return result
+        
+        base_classification = await get_base_classification(request.complaint, request.mode)
         return extend_classification(base_classification, request.complaint)
+    except (ModelNotReadyError, QueueFullError, DeadlineExceededError) as e:
+        raise _overload_exception(e)
     except ValueError as e:
         raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Classification failed: {str(e)}")
 
 @app.post("/classify/batch", response_model=List[ClassificationResponse])
-def classify_batch(request: BatchClassifyRequest):
+async def classify_batch(request: BatchClassifyRequest):
     """
-    Classify multiple complaints
+    Classify multiple complaints (length-bucketed batched generation)
     """
     results = []
     errors = []
     
-    for idx, complaint in enumerate(request.complaints):
+    try:
+        base_classifications = await get_base_classifications(request.complaints, request.mode)
+    except (ModelNotReadyError, QueueFullError, DeadlineExceededError) as e:
+        raise _overload_exception(e)
+    except Exception as e:
+        base_classifications = [e] * len(request.complaints)
+    
+    # Business rules for every successful item in one pass (one policy snapshot, one keyword sweep)
+    ok_indices = [idx for idx, base in enumerate(base_classifications) if not isinstance(base, Exception)]
+    extended = {}
+    try:
+        extended = dict(zip(ok_indices, extend_classifications(
+            [base_classifications[idx] for idx in ok_indices],
+            [request.complaints[idx] for idx in ok_indices],
+        )))
+    except Exception:
+        pass  # retried per item below so one bad item only fails itself
+    
+    for idx, (complaint, base_classification) in enumerate(zip(request.complaints, base_classifications)):
         try:
-            base_classification = classifier.classify_base(complaint)
-            results.append(extend_classification(base_classification, complaint))
+            if isinstance(base_classification, Exception):
+                raise base_classification
+            results.append(extended.get(idx) or extend_classification(base_classification, complaint))
         except Exception as e:
             errors.append({"index": idx, "complaint": complaint[:50], "error": str(e)})
             # Return partial error response
@@ -365,78 +3770,363 @@ def classify_batch(request: BatchClassifyRequest):
     
     return results
 
+@app.post("/chat", response_model=ChatResponse)
+async def chat(request: ChatRequest, http_request: Request):
+    """
+    Chat with the loaded model. Plain JSON by default; stream="sse"/"ndjson" (or an Accept header
+    of text/event-stream / application/x-ndjson) streams {"token": ...} events and a final
+    {"done": true, "response": ..., "conversation_id": ...} event.
+    """
+    accept = http_request.headers.get("accept", "")
+    stream_format = request.stream or (
+        "sse" if "text/event-stream" in accept else "ndjson" if "application/x-ndjson" in accept else None
+    )
+    try:
+        require_classifier()
+        session = chat_sessions.checkout(request.conversation_id, request.remember)
+    except ModelNotReadyError as e:
+        raise _overload_exception(e)
+    except ConversationBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    if stream_format is None:
+        try:
+            reply = await run_chat_turn(session, request.message, lambda piece: None)
+        except (ModelNotReadyError, QueueFullError, DeadlineExceededError) as e:
+            raise _overload_exception(e)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Chat failed: {str(e)}")
+        return ChatResponse(response=reply, conversation_id=session.conversation_id)
+    
+    loop = asyncio.get_running_loop()
+    pieces: "asyncio.Queue[str]" = asyncio.Queue()
+    turn = asyncio.ensure_future(run_chat_turn(
+        session, request.message, lambda piece: loop.call_soon_threadsafe(pieces.put_nowait, piece)
+    ))
+    
+    async def events():
+        try:
+            while True:
+                next_piece = asyncio.ensure_future(pieces.get())
+                await asyncio.wait({next_piece, turn}, return_when=asyncio.FIRST_COMPLETED)
+                if next_piece.done():
+                    yield _chat_event(stream_format, {"token": next_piece.result()})
+                    continue
+                next_piece.cancel()
+                # Pieces are queued before the turn resolves; flush what is left
+                while not pieces.empty():
+                    yield _chat_event(stream_format, {"token": pieces.get_nowait()})
+                break
+            reply = turn.result()
+            yield _chat_event(stream_format, {"done": True, "response": reply, "conversation_id": session.conversation_id})
+        except Exception as e:
+            yield _chat_event(stream_format, {"error": str(e), "conversation_id": session.conversation_id})
+        finally:
+            # Client went away: no further slices are queued
+            if not turn.done():
+                turn.cancel()
+    
+    headers = {"Cache-Control": "no-cache"}
+    if session.conversation_id is not None:
+        headers["X-Conversation-Id"] = session.conversation_id
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream" if stream_format == "sse" else "application/x-ndjson",
+        headers=headers,
+    )
+
+@app.post("/jobs", status_code=202)
+async def create_job(request: Request, mode: Optional[ClassifierMode] = None, field: str = "complaint"):
+    """
+    Queue a classification job and return its id immediately. The body is either JSON
+    ({"complaints": [...], "ids": [...], "mode": ...}) or JSONL (one complaint string or
+    object per line, the text in `field`, an optional "id" returned with its result).
+    """
+    job_mode = mode or CLASSIFIER_MODE
+    if request.headers.get("content-type", "").startswith("application/json"):
+        try:
+            body = JobRequest(**await request.json())
+        except Exception as e:
+            raise HTTPException(status_code=422, detail=f"Invalid job: {str(e)}")
+        if body.ids is not None and len(body.ids) != len(body.complaints):
+            raise HTTPException(status_code=422, detail="Invalid job: ids must have one entry per complaint")
+        job_mode = body.mode or job_mode
+        records = _iter_body_records(body)
+    else:
+        records = _iter_jsonl_records(request, field)
+    
+    job_id = None
+    total = 0
+    try:
+        pending: List[Tuple[Optional[str], str]] = []
+        async for record in records:
+            if job_id is None:
+                job_id = await job_store.run(job_store.create, job_mode)
+            pending.append(record)
+            total += 1
+            if total > JOB_MAX_ITEMS:
+                raise OverflowError(f"Jobs are limited to {JOB_MAX_ITEMS} complaints")
+            if len(pending) >= 1000:
+                await job_store.run(job_store.add_items, job_id, total - len(pending), pending)
+                pending = []
+        if job_id is None:
+            raise ValueError("No complaints in the request")
+        if pending:
+            await job_store.run(job_store.add_items, job_id, total - len(pending), pending)
+        await job_store.run(job_store.enqueue, job_id, total)
+    except Exception as e:
+        if job_id is not None:
+            await job_store.run(job_store.delete, job_id)
+        if isinstance(e, OverflowError):
+            raise HTTPException(status_code=413, detail=str(e))
+        raise HTTPException(status_code=400 if isinstance(e, ValueError) else 500, detail=f"Invalid job: {str(e)}")
+    
+    return await job_store.run(job_store.get, job_id)
+
+@app.get("/jobs")
+async def list_jobs(limit: int = 50):
+    """Most recent jobs first"""
+    return await job_store.run(job_store.list, limit)
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Status, progress, throughput and ETA of a job"""
+    job = await job_store.run(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@app.get("/jobs/{job_id}/results")
+async def job_results(job_id: str, http_request: Request, offset: int = 0, limit: int = 100,
+                      format: Literal["json", "ndjson"] = "json"):
+    """
+    Finished results in input order. JSON pages of `limit` items from index `offset` (follow
+    next_offset), or with format=ndjson (or Accept: application/x-ndjson) every finished result streamed.
+    """
+    job = await job_store.run(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    if format == "ndjson" or "application/x-ndjson" in http_request.headers.get("accept", ""):
+        def lines():
+            cursor = offset
+            while True:
+                page = job_store.results(job_id, cursor, 500)
+                if not page:
+                    return
+                for item in page:
+                    yield json.dumps(item, ensure_ascii=False) + "\n"
+                cursor = page[-1]["index"] + 1
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+    
+    items = await job_store.run(job_store.results, job_id, offset, max(1, min(limit, 1000)))
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "total": job["total"],
+        "done": job["done"],
+        "items": items,
+        "next_offset": items[-1]["index"] + 1 if items else None,
+    }
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Stop a queued or running job; results finished so far stay available"""
+    job = await job_store.run(job_store.cancel, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@app.get("/chat/stats")
+async def chat_stats():
+    """Open conversations, KV-cached tokens and evictions"""
+    return chat_sessions.stats()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "model_loaded": classifier.model is not None}
+    status = {"ready": "healthy", "failed": "unhealthy"}.get(model_status["state"], "loading")
+    return {
+        "status": status,
+        "model_loaded": classifier is not None,
+        "load_seconds": model_status["load_seconds"],
+        "peak_rss_mb": model_status["peak_rss_mb"],
+        **scheduler.stats(),
+    }
+
+@app.get("/policy")
+async def policy_info():
+    """Active routing policy file, its mtime and reload counters"""
+    return policy_store.stats()
+
+@app.post("/policy/reload")
+async def reload_policy():
+    """Re-read the policy file now (it is also picked up automatically when its mtime changes)"""
+    swapped = policy_store.reload(force=True)
+    if not swapped:
+        raise HTTPException(status_code=422, detail=f"Policy reload failed: {policy_store.last_error}")
+    return policy_store.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus text format: per-stage latency histograms, token and retry/fallback counters"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/health/live")
+async def liveness():
+    """Liveness: the process is up and serving HTTP (the model may still be loading)"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness: 200 only once the model is loaded and warmed up"""
+    if classifier is None:
+        return JSONResponse(
+            status_code=503,
+            content={"status": model_status["state"], "error": model_status["error"]},
+            headers={"Retry-After": "5"},
+        )
+    return {"status": "ready", "load_seconds": model_status["load_seconds"]}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Classification cache hit/miss counters"""
+    return classification_cache.stats()
+
+@app.get("/decoding/stats")
+async def decoding_stats():
+    """Generated tokens per answer, strict-retry and fallback rates for the active decoding mode"""
+    try:
+        return require_classifier().get_decode_stats()
+    except ModelNotReadyError as e:
+        raise _overload_exception(e)
+
+@app.get("/cascade")
+async def cascade_info():
+    """Cascade model threshold, held-out agreement from training, and answered/deferred counts"""
+    if cascade is None:
+        return {"enabled": False, "path": CASCADE_MODEL_PATH}
+    return {"enabled": True, "path": CASCADE_MODEL_PATH, **cascade.stats()}
+
+@app.get("/duplicates")
+async def duplicate_groups(min_count: int = 2, limit: int = 50):
+    """Groups of near-duplicate complaints seen recently (largest first), plus index counters"""
+    return {"groups": duplicate_index.groups(min_count, limit), **duplicate_index.stats()}
 
 @app.post("/explain", response_model=ExplainResponse)
-def explain_classification(request: ClassifyRequest):
+async def explain_classification(request: ClassifyRequest):
     """
     Explain why a complaint was classified in a certain way
     """
     try:
-        # Get classification
-        base_classification = classifier.classify_base(request.complaint)
-        full_classification = extend_classification(base_classification, request.complaint)
-        
-        # Generate explanation
-        key_triggers = []
-        
-        # Severity trigger keywords
-        severity_keywords = {
-            "Critical": ["harassment", "harass", "abuse", "threatened", "scared", "afraid",
-                        "corruption", "bribery", "fraud", "blackmail", "unsafe", "fire", "safety"],
-            "High": ["repeated", "multiple", "ongoing", "persistent", "unresolved", "weeks", "months"]
-        }
-        
-        # Category-specific triggers
-        category_keywords = {
-            "Workplace Harassment": ["comments", "body", "stares", "follows", "unwanted"],
-            "Abuse of Authority": ["controls", "authority", "boss", "supervisor", "power"],
-            "Corruption or Bribery": ["pay", "money", "bribe", "rupees", "cash"],
-            "Safety Hazard": ["fire", "broken", "unsafe", "dangerous", "equipment"],
-            "Discrimination or Bias": ["bias", "discriminate", "caste", "religion", "gender"],
-            "Infrastructure or Facility Issue": ["not working", "broken", "faulty", "wifi"],
-        }
-        
-        complaint_lower = request.complaint.lower()
-        
-        # Extract triggers
-        for keyword in severity_keywords.get(full_classification.severity, []):
-            if keyword in complaint_lower and keyword not in key_triggers:
-                key_triggers.append(keyword)
-        
-        for category in full_classification.categories:
-            for cat_name, keywords in category_keywords.items():
-                if cat_name.lower() in category.lower():
-                    for keyword in keywords:
-                        if keyword in complaint_lower and keyword not in key_triggers:
-                            key_triggers.append(keyword)
-        
-        # Limit triggers
-        key_triggers = key_triggers[:5]
-        
-        # Generate summary
-        category_str = ", ".join(full_classification.categories)
-        if full_classification.severity == "Critical":
-            reason = f"Classified as Critical due to {category_str.lower()}"
-            if full_classification.anonymous_recommended:
-                reason += " with power imbalance indicators"
-        elif full_classification.severity == "High":
-            reason = f"Classified as High - {category_str.lower()} requiring urgent attention"
-        else:
-            reason = f"Classified as Normal - general {category_str.lower()}"
-        
-        return ExplainResponse(
-            summary_reason=reason,
-            key_triggers=key_triggers if key_triggers else ["general complaint indicators"]
-        )
+        base_classification, spans = await get_explained_classification(request.complaint, request.mode)
+        hits = keyword_matcher.find(request.complaint)
+        full_classification = extend_classification(base_classification, request.complaint, hits)
+        return build_explanation(full_classification, spans, hits)
         
+    except (ModelNotReadyError, QueueFullError, DeadlineExceededError) as e:
+        raise _overload_exception(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Explanation failed: {str(e)}")
 
 
-if __name__ == "__main__":
+# ========================
+# SERVING
+# ========================
+
+def physical_core_count() -> int:
+    """Physical cores available to this process (hyperthreads add little to matmul-bound inference)"""
+    available = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    try:
+        cores = set()
+        physical_id = "0"
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                key = key.strip()
+                if key == "physical id":
+                    physical_id = value.strip()
+                elif key == "core id":
+                    cores.add((physical_id, value.strip()))
+        physical = len(cores) or available
+    except OSError:
+        physical = available
+    return max(1, min(physical, available))
+
+def _run_worker(sock: socket.socket, host: str, port: int, index: int, threads: int):
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Threads do not survive fork: each worker runs its own log writer and capture file
+    start_logging(f"{CAPTURE_PATH}.{index}" if CAPTURE_PATH else "")
+    torch.set_num_threads(threads)
+    classification_cache.open_db()
+    job_store.open_db()
+    if classifier is None:
+        load_model()
+    else:
+        warm_up(classifier)
+    log.info("[SERVE] Worker %d (pid %d) ready with %d thread(s)", index, os.getpid(), threads)
+    uvicorn.Server(uvicorn.Config(app, host=host, port=port)).run(sockets=[sock])
+
+def serve(host: str = "0.0.0.0", port: int = API_PORT, workers: int = SERVE_WORKERS):
+    """Run the API; with workers > 1, preload the model and fork workers sharing one copy of the weights"""
+    import uvicorn
+    if workers <= 1 or not hasattr(os, "fork"):
+        uvicorn.run(app, host=host, port=port)
+        return
+    
+    threads = SERVE_THREADS_PER_WORKER or max(1, physical_core_count() // workers)
+    # No parallel compute in the parent: OpenMP thread pools do not survive fork
+    torch.set_num_threads(1)
+    if INFERENCE_BACKEND == "onnx":
+        log.info("[SERVE] ONNX Runtime sessions cannot cross fork; each worker loads its own copy")
+    else:
+        load_model(warmup=False)
+    
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    
+    # Drain and stop the log writer so no worker inherits its queue mid-write
+    stop_logging()
+    children = []
+    for index in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(sock, host, port, index, threads)
+            except Exception as e:
+                log.error("[SERVE] Worker %d failed: %s", index, e)
+                code = 1
+            finally:
+                stop_logging()
+                os._exit(code)
+        children.append(pid)
+    start_logging()
+    log.info("[SERVE] %d workers x %d thread(s) on http://%s:%d", workers, threads, host, port)
+    
+    def stop(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    
+    for pid in children:
+        while True:
+            try:
+                os.waitpid(pid, 0)
+                break
+            except InterruptedError:
+                continue
+            except ChildProcessError:
+                break
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,298 @@
+"""Offline latency/throughput benchmark of /classify, /classify/batch and /explain against a baseline."""
+import os
+import ast
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import subprocess
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from decoding_report import SAMPLE_COMPLAINTS
+
+DEFAULT_BASELINE = os.path.join(ROOT_DIR, "scripts", "benchmark_baseline.json")
+DEFAULT_MODEL_DIR = os.path.join(tempfile.gettempdir(), "complaint-benchmark-tiny-model")
+TINY_MODEL_VERSION = "1"
+
+SCENARIOS = {
+    # name: (path, complaints per request)
+    "classify": ("/classify", 1),
+    "classify_batch": ("/classify/batch", 8),
+    "explain": ("/explain", 1),
+}
+
+def build_tiny_model(path: str):
+    """Deterministic, randomly initialised 2-layer Llama with a byte-level tokenizer and a chat template"""
+    marker = os.path.join(path, "tiny_model_version")
+    if os.path.exists(marker) and open(marker).read() == TINY_MODEL_VERSION:
+        return
+
+    import torch
+    from tokenizers import Tokenizer, models, pre_tokenizers, decoders
+    from transformers import LlamaConfig, LlamaForCausalLM, PreTrainedTokenizerFast
+
+    print(f"Building tiny benchmark model in {path}...")
+    vocab = {"<pad>": 0, "<s>": 1, "</s>": 2, "<|im_start|>": 3, "<|im_end|>": 4}
+    for char in sorted(pre_tokenizers.ByteLevel.alphabet()):
+        vocab.setdefault(char, len(vocab))
+    tokenizer = Tokenizer(models.BPE(vocab=vocab, merges=[]))
+    tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tokenizer.decoder = decoders.ByteLevel()
+    fast = PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, bos_token="<s>", eos_token="<|im_end|>", pad_token="<pad>",
+        additional_special_tokens=["<|im_start|>", "<|im_end|>"],
+    )
+    fast.chat_template = (
+        "{% for m in messages %}<|im_start|>{{ m['role'] }}\n{{ m['content'] }}<|im_end|>\n{% endfor %}"
+        "{% if add_generation_prompt %}<|im_start|>assistant\n{% endif %}"
+    )
+    fast.save_pretrained(path)
+
+    torch.manual_seed(0)
+    config = LlamaConfig(
+        vocab_size=len(vocab), hidden_size=64, intermediate_size=128, num_hidden_layers=2,
+        num_attention_heads=4, num_key_value_heads=2, max_position_embeddings=4096,
+        bos_token_id=1, eos_token_id=4, pad_token_id=0,
+    )
+    LlamaForCausalLM(config).save_pretrained(path)
+    with open(marker, "w") as f:
+        f.write(TINY_MODEL_VERSION)
+
+def test_api_samples() -> list:
+    """Complaint strings used by test_api.py (read without importing it, it needs a live server)"""
+    with open(os.path.join(ROOT_DIR, "test_api.py"), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    samples = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Dict):
+            for key, value in zip(node.keys, node.values):
+                if not isinstance(key, ast.Constant) or key.value not in ("complaint", "complaints"):
+                    continue
+                values = value.elts if isinstance(value, ast.List) else [value]
+                samples.extend(v.value for v in values if isinstance(v, ast.Constant) and isinstance(v.value, str))
+    return samples
+
+def load_corpus(max_chars: int = 400) -> list:
+    """test_api.py samples, the decoding report set, and request texts from requests.jsonl when present"""
+    corpus = test_api_samples() + SAMPLE_COMPLAINTS
+    requests_path = os.path.join(ROOT_DIR, "requests.jsonl")
+    if os.path.exists(requests_path):
+        with open(requests_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                corpus.append(record.get("title", ""))
+                body = " ".join(str(record.get("body", "")).split())
+                corpus.extend(body[start:start + max_chars] for start in range(0, len(body), max_chars))
+
+    seen = set()
+    return [text for text in corpus if text.strip() and not (text in seen or seen.add(text))]
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+async def run_scenario(client, scenario: str, corpus: list, requests: int, concurrency: int) -> dict:
+    path, size = SCENARIOS[scenario]
+    latencies = []
+    errors = 0
+    next_index = 0
+
+    def payload(index: int) -> dict:
+        texts = [corpus[(index * size + offset) % len(corpus)] for offset in range(size)]
+        return {"complaints": texts} if size > 1 else {"complaint": texts[0]}
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < requests:
+            index = next_index
+            next_index += 1
+            started = time.perf_counter()
+            response = await client.post(path, json=payload(index), timeout=120)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "throughput": round(requests * size / elapsed, 2),  # complaints per second
+    }
+
+def process_peak_rss_mb(pid: int) -> float:
+    """Peak resident set size (VmHWM) of a process, 0 where /proc is unavailable"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return 0.0
+
+async def bench_inprocess(args, corpus: list) -> dict:
+    import httpx
+    import api
+    api.load_model()
+
+    results = {}
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for scenario in args.scenarios:
+            results[scenario] = await run_scenario(client, scenario, corpus, args.requests, args.concurrency)
+    results["peak_rss_mb"] = process_peak_rss_mb(os.getpid()) or api.peak_rss_mb()
+    return results
+
+async def bench_http(args, corpus: list, env: dict) -> dict:
+    import httpx
+    env = dict(env, API_PORT=str(args.port), SERVE_WORKERS="1", PYTHONUNBUFFERED="1")
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT_DIR, "api.py")], cwd=ROOT_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            deadline = time.monotonic() + args.startup_timeout
+            while True:
+                try:
+                    if (await client.get("/health/ready")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise RuntimeError("API server did not become ready")
+                await asyncio.sleep(0.2)
+
+            results = {}
+            for scenario in args.scenarios:
+                results[scenario] = await run_scenario(client, scenario, corpus, args.requests, args.concurrency)
+        results["peak_rss_mb"] = process_peak_rss_mb(server.pid)
+        return results
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Regressions beyond tolerance: slower p95, lower throughput or higher peak RSS"""
+    failures = []
+    for transport, scenarios in results.items():
+        for scenario, stats in scenarios.items():
+            base = baseline.get("results", {}).get(transport, {}).get(scenario)
+            if base is None:
+                continue
+            if scenario == "peak_rss_mb":
+                if base and stats > base * (1 + tolerance):
+                    failures.append(f"{transport} peak RSS {stats} MB > baseline {base} MB")
+                continue
+            if stats["errors"]:
+                failures.append(f"{transport}/{scenario}: {stats['errors']} failed requests")
+            if stats["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+                failures.append(f"{transport}/{scenario}: p95 {stats['p95_ms']} ms > baseline {base['p95_ms']} ms")
+            if stats["throughput"] < base["throughput"] * (1 - tolerance):
+                failures.append(f"{transport}/{scenario}: throughput {stats['throughput']}/s < baseline {base['throughput']}/s")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline latency/throughput benchmark against a tiny local model")
+    parser.add_argument("--transports", nargs="+", choices=["inprocess", "http"], default=["inprocess", "http"])
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=40, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--max-new-tokens", type=int, default=32)
+    parser.add_argument("--model", help="Model directory to benchmark (default: a generated tiny random model)")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--startup-timeout", type=float, default=300)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed relative regression vs the baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline")
+    args = parser.parse_args()
+
+    # Without a baseline there is nothing to fail against; only recording one is allowed
+    if not args.update_baseline and not os.path.exists(args.baseline):
+        print(f"❌ No baseline at {args.baseline}; record one on this machine with --update-baseline")
+        sys.exit(2)
+
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        print("❌ The benchmark needs httpx: pip install httpx")
+        sys.exit(2)
+
+    model_dir = args.model or DEFAULT_MODEL_DIR
+    if not args.model:
+        build_tiny_model(model_dir)
+
+    # Both transports get the same configuration; the result cache, near-duplicate
+    # reuse and the cascade are off so every request hits the model
+    env = dict(os.environ, MODEL_PATH=model_dir, MAX_NEW_TOKENS=str(args.max_new_tokens),
+               CACHE_MAX_ENTRIES="0", CACHE_DB_PATH="", DEDUP_THRESHOLD="0", CASCADE_MODEL_PATH="",
+               POLICY_RELOAD_SECONDS="0")
+    os.environ.update(env)
+
+    corpus = load_corpus()
+    settings = {
+        "model": "tiny" if not args.model else os.path.basename(os.path.normpath(args.model)),
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "max_new_tokens": args.max_new_tokens,
+        "corpus_size": len(corpus),
+    }
+    print(f"Corpus: {len(corpus)} complaints, {args.requests} requests per scenario at concurrency {args.concurrency}")
+
+    results = {}
+    for transport in args.transports:
+        print(f"Running {transport}...", flush=True)
+        if transport == "inprocess":
+            results[transport] = asyncio.run(bench_inprocess(args, corpus))
+        else:
+            results[transport] = asyncio.run(bench_http(args, corpus, env))
+
+    print(f"\n{'transport':<10} {'scenario':<15} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'items/s':>8}")
+    for transport, scenarios in results.items():
+        for scenario in args.scenarios:
+            stats = scenarios[scenario]
+            print(f"{transport:<10} {scenario:<15} {stats['errors']:>6} {stats['p50_ms']:>8} "
+                  f"{stats['p95_ms']:>8} {stats['p99_ms']:>8} {stats['throughput']:>8}")
+        print(f"{transport:<10} {'peak RSS':<15} {scenarios['peak_rss_mb']:>42} MB")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings, "machine": platform.machine(), "cpu_count": os.cpu_count(),
+                       "results": results}, f, indent=2)
+            f.write("\n")
+        print(f"\n✅ Baseline written to {args.baseline}")
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("settings") != settings:
+        print(f"\n❌ Baseline was recorded with different settings: {baseline.get('settings')}")
+        sys.exit(2)
+
+    failures = compare(results, baseline, args.tolerance)
+    if failures:
+        print(f"\n❌ Regressions beyond {args.tolerance:.0%} of the baseline:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print(f"\n✅ Within {args.tolerance:.0%} of the baseline")
+
+if __name__ == "__main__":
+    main()
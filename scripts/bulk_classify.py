@@ -0,0 +1,190 @@
+"""Classify a JSONL/CSV file of complaints offline; re-run the same command to resume from OUTPUT.ckpt (--restart starts over)."""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import multiprocessing as mp
+from collections import deque
+
+# Make api.py importable inside the worker processes
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+# Set in each worker process by _init_worker
+_api = None
+_mode = "generate"
+_chunk_size = 16
+
+def _init_worker(num_threads: int, mode: str, chunk_size: int):
+    """Load the classifier once per worker with its own intra-op thread budget"""
+    global _api, _mode, _chunk_size
+    import torch
+    torch.set_num_threads(num_threads)
+
+    import api
+    api.load_model(warmup=False)
+    _api = api
+    _mode = mode
+    _chunk_size = chunk_size
+
+def _classify_chunk(records: list) -> list:
+    """Batched inference + business logic for one chunk of (index, id, complaint) records"""
+    complaints = [complaint for _, _, complaint in records]
+    extended = None
+    try:
+        bases = _api.classifier.classify_base_many(complaints, chunk_size=_chunk_size, mode=_mode)
+    except Exception as e:
+        bases = [e] * len(records)
+    else:
+        try:
+            extended = _api.extend_classifications(bases, complaints)
+        except Exception:
+            # Some item breaks the policy/extension step: extend them one by one below
+            extended = None
+
+    rows = []
+    for position, ((index, record_id, complaint), base) in enumerate(zip(records, bases)):
+        row = {"index": index, "id": record_id, "complaint": complaint}
+        try:
+            if isinstance(base, Exception):
+                raise base
+            result = extended[position] if extended is not None else _api.extend_classification(base, complaint)
+            row.update(result.model_dump())
+            # Keyword-fallback answers are marked so they can be told apart from model answers
+            row["source"] = base.get("source", "model")
+        except Exception as e:
+            row["error"] = str(e)
+        rows.append(row)
+    return rows
+
+def iter_records(path: str, field: str, id_field: str):
+    """Lazily yield (index, id, complaint) from a JSONL or CSV file"""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+
+        for index, row in enumerate(rows):
+            if isinstance(row, str):
+                yield index, index, row
+            else:
+                yield index, row.get(id_field, index), str(row.get(field) or "")
+
+def count_records(path: str) -> int:
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            return sum(1 for _ in csv.DictReader(f))
+        return sum(1 for line in f if line.strip())
+
+def iter_chunks(records, size: int):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def load_checkpoint(path: str) -> dict:
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return {"records_done": 0, "output_bytes": 0}
+
+def save_checkpoint(path: str, checkpoint: dict):
+    # Write-then-rename so a kill never leaves a half-written checkpoint
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+def format_eta(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{seconds:02d}s"
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify a JSONL/CSV file of complaints offline")
+    parser.add_argument("input", help="Input .jsonl or .csv file")
+    parser.add_argument("output", help="Output .jsonl file (appended to on resume)")
+    parser.add_argument("--field", default="complaint", help="Field/column holding the complaint text")
+    parser.add_argument("--id-field", default="id", help="Field/column copied to the output as 'id'")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes, each with its own model copy")
+    parser.add_argument("--threads", type=int, default=0, help="torch threads per worker (default: cores / workers)")
+    parser.add_argument("--batch-size", type=int, default=16, help="Complaints per generate pass")
+    parser.add_argument("--chunks-per-task", type=int, default=4, help="Batches handed to a worker at a time")
+    parser.add_argument("--mode", choices=["generate", "score"], default="generate")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start over")
+    args = parser.parse_args()
+
+    workers = max(1, args.workers)
+    threads = args.threads or max(1, (os.cpu_count() or 1) // workers)
+    task_size = args.batch_size * max(1, args.chunks_per_task)
+    checkpoint_path = args.output + ".ckpt"
+
+    checkpoint = {"records_done": 0, "output_bytes": 0} if args.restart else load_checkpoint(checkpoint_path)
+    if checkpoint.get("input") not in (None, os.path.abspath(args.input)):
+        print(f"Checkpoint {checkpoint_path} belongs to {checkpoint['input']}; use --restart to overwrite it.")
+        sys.exit(1)
+    checkpoint["input"] = os.path.abspath(args.input)
+
+    # Drop anything written after the last checkpoint (a run killed mid-write)
+    with open(args.output, "ab") as out:
+        out.truncate(checkpoint["output_bytes"])
+
+    total = count_records(args.input)
+    skip = checkpoint["records_done"]
+    print(f"[BULK] {total} records, resuming after {skip}" if skip else f"[BULK] {total} records")
+    print(f"[BULK] {workers} worker(s) x {threads} thread(s), batch size {args.batch_size}, mode {args.mode}")
+
+    records = (record for record in iter_records(args.input, args.field, args.id_field) if record[0] >= skip)
+
+    ctx = mp.get_context("spawn")
+    start = time.perf_counter()
+    processed = 0
+
+    with ctx.Pool(workers, initializer=_init_worker, initargs=(threads, args.mode, args.batch_size)) as pool, \
+            open(args.output, "ab") as out:
+
+        def write_rows(rows: list):
+            nonlocal processed
+            for row in rows:
+                out.write((json.dumps(row, ensure_ascii=False) + "\n").encode("utf-8"))
+            out.flush()
+            processed += len(rows)
+
+            # Results are written in input order, so the checkpoint is a simple record count
+            checkpoint["records_done"] = skip + processed
+            checkpoint["output_bytes"] = out.tell()
+            save_checkpoint(checkpoint_path, checkpoint)
+
+            elapsed = time.perf_counter() - start
+            rate = processed / elapsed if elapsed else 0.0
+            remaining = total - checkpoint["records_done"]
+            eta = format_eta(remaining / rate) if rate else "?"
+            print(f"[BULK] {checkpoint['records_done']}/{total} "
+                  f"({100 * checkpoint['records_done'] / max(total, 1):.1f}%) "
+                  f"{rate:.2f} items/s ETA {eta}", flush=True)
+
+        # Keep a bounded window of tasks in flight so the input is never read ahead in full
+        window = workers * 2
+        pending = deque()
+        for chunk in iter_chunks(records, task_size):
+            pending.append(pool.apply_async(_classify_chunk, (chunk,)))
+            while pending and (len(pending) >= window or pending[0].ready()):
+                write_rows(pending.popleft().get())
+
+        while pending:
+            write_rows(pending.popleft().get())
+
+    elapsed = time.perf_counter() - start
+    print(f"\n✅ Classified {processed} records in {elapsed:.1f}s "
+          f"({processed / elapsed if elapsed else 0:.2f} items/s)")
+    print(f"Output: {args.output}")
+
+if __name__ == "__main__":
+    main()
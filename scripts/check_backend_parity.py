@@ -0,0 +1,108 @@
+"""Check that the int8/bf16/onnx CPU backends classify like fp32, and compare their speed."""
+import os
+import gc
+import sys
+import time
+import argparse
+
+# The classifier published by api.load_model() is the fp32 reference
+os.environ["INFERENCE_BACKEND"] = "fp32"
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from api import ComplaintClassifier, load_model
+from decoding_report import SAMPLE_COMPLAINTS
+
+def current_rss_mb() -> float:
+    """Resident set size of this process (Linux), 0 where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return 0.0
+
+def classify_all(clf: ComplaintClassifier, complaints: list, mode: str) -> tuple:
+    start = time.perf_counter()
+    results = [clf.classify_with_mode([complaint], mode)[0] for complaint in complaints]
+    return results, (time.perf_counter() - start) * 1000 / len(complaints)
+
+def compare(reference_results: list, results: list) -> dict:
+    """Agreement of category sets and severities, plus max probability drift in score mode"""
+    categories_match = 0
+    severity_match = 0
+    max_prob_diff = 0.0
+    for expected, actual in zip(reference_results, results):
+        categories_match += set(expected.get("categories", [])) == set(actual.get("categories", []))
+        severity_match += expected.get("severity") == actual.get("severity")
+
+        expected_conf = expected.get("confidence") or {}
+        actual_conf = actual.get("confidence") or {}
+        for group in ("categories", "severity"):
+            for label, prob in expected_conf.get(group, {}).items():
+                diff = abs(prob - actual_conf.get(group, {}).get(label, 0.0))
+                max_prob_diff = max(max_prob_diff, diff)
+
+    total = len(reference_results)
+    return {
+        "category_agreement": categories_match / total,
+        "severity_agreement": severity_match / total,
+        "max_prob_diff": round(max_prob_diff, 4),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Check classification parity of CPU backends against fp32")
+    parser.add_argument("--backends", nargs="+", default=["int8", "bf16", "onnx"])
+    parser.add_argument("--mode", choices=["generate", "score"], default="generate")
+    parser.add_argument("--min-agreement", type=float, default=0.9,
+                        help="Fail when category or severity agreement drops below this")
+    parser.add_argument("--input", help="Optional text file with one complaint per line")
+    args = parser.parse_args()
+
+    complaints = SAMPLE_COMPLAINTS
+    if args.input:
+        with open(args.input, encoding="utf-8") as f:
+            complaints = [line.strip() for line in f if line.strip()]
+
+    reference = load_model(warmup=False)
+    print(f"Reference: fp32 on {len(complaints)} complaints ({args.mode} mode)")
+    reference_results, reference_ms = classify_all(reference, complaints, args.mode)
+
+    rows = [("fp32", 1.0, 1.0, 0.0, reference_ms, None)]
+    failed = []
+    for backend in args.backends:
+        try:
+            rss_before = current_rss_mb()
+            clf = ComplaintClassifier(backend=backend)
+            model_mb = current_rss_mb() - rss_before
+        except Exception as e:
+            print(f"[SKIP] {backend}: {e}")
+            continue
+
+        if clf.backend != backend:
+            print(f"[SKIP] {backend}: not available on this machine (loaded {clf.backend})")
+        else:
+            results, avg_ms = classify_all(clf, complaints, args.mode)
+            parity = compare(reference_results, results)
+            rows.append((backend, parity["category_agreement"], parity["severity_agreement"],
+                         parity["max_prob_diff"], avg_ms, model_mb))
+            if min(parity["category_agreement"], parity["severity_agreement"]) < args.min_agreement:
+                failed.append(backend)
+
+        del clf
+        gc.collect()
+
+    # "load MB" is the RSS growth while loading that backend (after the fp32 reference has loaded)
+    print(f"\n{'backend':<8} {'categories':>10} {'severity':>9} {'max Δp':>8} {'avg ms':>9} {'load MB':>9}")
+    for backend, cat_agree, sev_agree, prob_diff, avg_ms, model_mb in rows:
+        load_mb = "-" if model_mb is None else f"{model_mb:.0f}"
+        print(f"{backend:<8} {cat_agree:>10.2%} {sev_agree:>9.2%} {prob_diff:>8} {avg_ms:>9.1f} {load_mb:>9}")
+
+    if failed:
+        print(f"\n❌ Below {args.min_agreement:.0%} agreement with fp32: {', '.join(failed)}")
+        sys.exit(1)
+    print("\n✅ All checked backends match fp32 within tolerance")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Compare generated tokens, strict-retry rate and latency across decoding modes on a fixed complaint set."""
+import os
+import sys
+import time
+import argparse
+
+# Make api.py importable when run as `python scripts/decoding_report.py`
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+SAMPLE_COMPLAINTS = [
+    "My supervisor keeps making comments about my body and asking me to stay late alone with him. I'm scared to report this because he controls my appraisal.",
+    "The lab equipment is faulty and yesterday there was a small fire. Nobody is taking this seriously.",
+    "wifi in hostel not working since 15 days. exam hai aur padhai nahi ho rahi.",
+    "I am being asked to pay 50000 rupees to get my transfer approved. This is pure corruption.",
+    "The water cooler on the third floor is broken and feels unsafe",
+    "Professor is threatening students over grades",
+    "WiFi not working in hostel block B",
+    "Water leakage near electrical panel",
+]
+
+def run_mode(classifier, mode: str, complaints: list) -> dict:
+    """Classify every complaint one at a time with the given decoding mode"""
+    classifier.decoding_mode = mode
+    classifier.reset_decode_stats()
+
+    start = time.perf_counter()
+    for complaint in complaints:
+        classifier.classify_base(complaint)
+    elapsed = time.perf_counter() - start
+
+    stats = classifier.get_decode_stats()
+    stats["avg_latency_ms"] = round(elapsed * 1000 / len(complaints), 1)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare generated tokens, retry rate and latency across decoding modes")
+    parser.add_argument("--modes", nargs="+", default=["free", "stop", "constrained"])
+    parser.add_argument("--input", help="Optional text file with one complaint per line")
+    args = parser.parse_args()
+
+    complaints = SAMPLE_COMPLAINTS
+    if args.input:
+        with open(args.input, encoding="utf-8") as f:
+            complaints = [line.strip() for line in f if line.strip()]
+
+    # Imported here so other scripts can reuse SAMPLE_COMPLAINTS without loading api.py
+    from api import load_model
+    classifier = load_model(warmup=False)
+    print(f"Running {len(complaints)} complaints per mode...\n")
+    print(f"{'mode':<12} {'avg tokens':>10} {'retry rate':>10} {'fallbacks':>9} {'avg ms':>9}")
+    for mode in args.modes:
+        stats = run_mode(classifier, mode, complaints)
+        print(f"{mode:<12} {stats['avg_generated_tokens']:>10} {stats['retry_rate']:>10} "
+              f"{stats['fallbacks']:>9} {stats['avg_latency_ms']:>9}")
+
+if __name__ == "__main__":
+    main()
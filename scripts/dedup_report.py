@@ -0,0 +1,67 @@
+"""Embedding similarity of near-duplicate vs distinct complaints, to pick DEDUP_THRESHOLD."""
+import os
+import sys
+import argparse
+import itertools
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from api import load_model
+from decoding_report import SAMPLE_COMPLAINTS
+
+THRESHOLDS = [0.9, 0.93, 0.95, 0.96, 0.97, 0.98, 0.985, 0.99, 0.995]
+
+def rewordings(complaint: str) -> list:
+    """Near-duplicates of a complaint as users actually resubmit them"""
+    bare = complaint.rstrip(".!? ")
+    return [
+        complaint.lower(),
+        bare + "!!",
+        f"Again: {complaint}",
+        f"{complaint} Please fix this.",
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding similarity of near-duplicate vs distinct complaints, to pick DEDUP_THRESHOLD")
+    parser.add_argument("--input", help="Optional text file with one complaint per line (all treated as distinct)")
+    args = parser.parse_args()
+
+    complaints = SAMPLE_COMPLAINTS
+    if args.input:
+        with open(args.input, encoding="utf-8") as f:
+            complaints = [line.strip() for line in f if line.strip()]
+
+    clf = load_model(warmup=False)
+    originals = clf.embed(complaints)
+    if originals is None:
+        print("❌ This backend/prompt has no prefix cache to embed from (e.g. onnx or PREFIX_CACHE=0)")
+        sys.exit(1)
+
+    duplicate_sims = []
+    for complaint, original in zip(complaints, originals):
+        duplicate_sims.extend(clf.embed(rewordings(complaint)) @ original)
+    distinct_sims = [float(originals[i] @ originals[j]) for i, j in itertools.combinations(range(len(complaints)), 2)]
+
+    print(f"near-duplicate pairs: {len(duplicate_sims):>4}  min {min(duplicate_sims):.4f}  median {np.median(duplicate_sims):.4f}")
+    print(f"distinct pairs:       {len(distinct_sims):>4}  max {max(distinct_sims):.4f}  median {np.median(distinct_sims):.4f}")
+
+    # reused = near-duplicates that skip generation; false merges = distinct complaints sharing a result
+    print(f"\n{'threshold':>9} {'reused':>8} {'false merges':>13}")
+    safe = None
+    for threshold in THRESHOLDS:
+        reused = np.mean(np.array(duplicate_sims) >= threshold)
+        merged = np.mean(np.array(distinct_sims) >= threshold)
+        print(f"{threshold:>9} {reused:>8.1%} {merged:>13.1%}")
+        if safe is None and merged == 0:
+            safe = threshold
+
+    if safe is None:
+        print("\n❌ Distinct complaints are too similar at every threshold; keep DEDUP_THRESHOLD=0")
+        sys.exit(1)
+    print(f"\n✅ Lowest threshold without false merges on this set: DEDUP_THRESHOLD={safe}")
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,28 @@
 
 import os
+import argparse
+import torch
 from transformers import AutoModelForCausalLM, AutoTokenizer
 import shutil
 
 MODEL_ID = "smolify/smolified-complaint-classification"
 LOCAL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "local_model")
 
+def save_weights(model):
+    """Save as fp32 safetensors (the serving dtype) so the API can memory-map them without conversion"""
+    model.save_pretrained(LOCAL_DIR, safe_serialization=True, max_shard_size="2GB")
+
+def convert_local_model():
+    """Re-save an existing local_model (e.g. pytorch_model.bin) as safetensors"""
+    print(f"Converting weights in {LOCAL_DIR} to safetensors...")
+    model = AutoModelForCausalLM.from_pretrained(LOCAL_DIR, torch_dtype=torch.float32)
+    save_weights(model)
+    
+    for name in os.listdir(LOCAL_DIR):
+        if name.startswith("pytorch_model") and name.endswith((".bin", ".bin.index.json")):
+            os.remove(os.path.join(LOCAL_DIR, name))
+    print("\n✅ Converted to safetensors.")
+
 def download_model():
     print(f"Downloading model '{MODEL_ID}'...")
     print(f"Saving to: {LOCAL_DIR}")
@@ -23,10 +40,9 @@ def download_model():
         print("Downloading model weights...")
         model = AutoModelForCausalLM.from_pretrained(
             MODEL_ID,
-            device_map="auto",
-            torch_dtype="auto"
+            torch_dtype=torch.float32
         )
-        model.save_pretrained(LOCAL_DIR)
+        save_weights(model)
         
         print("\n✅ Model downloaded successfully!")
         print(f"Path: {LOCAL_DIR}")
@@ -40,4 +56,12 @@ def download_model():
             print("Cleaned up partial download.")
 
 if __name__ == "__main__":
-    download_model()
+    parser = argparse.ArgumentParser(description="Download the classifier model into local_model/")
+    parser.add_argument("--convert", action="store_true",
+                        help="Convert an existing local_model to safetensors instead of downloading")
+    args = parser.parse_args()
+    
+    if args.convert:
+        convert_local_model()
+    else:
+        download_model()
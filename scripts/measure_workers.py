@@ -0,0 +1,118 @@
+"""Measure per-worker RSS/PSS and total throughput of `python api.py` as SERVE_WORKERS grows."""
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import threading
+import subprocess
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from decoding_report import SAMPLE_COMPLAINTS
+
+def memory_mb(pid: int) -> tuple:
+    """(RSS, PSS) of a process in MB; PSS splits shared pages between the processes mapping them"""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss"):
+                    values[key] = int(rest.split()[0]) / 1024
+    except OSError:
+        pass
+    return values.get("Rss", 0.0), values.get("Pss", 0.0)
+
+def start_server(workers: int, port: int, timeout: float) -> tuple:
+    """Start `python api.py` and wait until every worker reports ready; returns (process, worker pids)"""
+    env = dict(os.environ, SERVE_WORKERS=str(workers), API_PORT=str(port), PYTHONUNBUFFERED="1")
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT_DIR, "api.py")], cwd=ROOT_DIR, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    pids = []
+    ready = threading.Event()
+
+    def read_output():
+        for line in proc.stdout:
+            if line.startswith("[SERVE] Worker") and " ready" in line:
+                pids.append(int(line.split("(pid ")[1].split(")")[0]))
+                if len(pids) >= workers:
+                    ready.set()
+            elif line.startswith("[INIT] Model ready") and workers == 1:
+                pids.append(proc.pid)
+                ready.set()
+
+    threading.Thread(target=read_output, daemon=True).start()
+    if not ready.wait(timeout):
+        proc.kill()
+        raise RuntimeError(f"server with {workers} worker(s) not ready after {timeout:.0f}s")
+    return proc, pids
+
+def post_classify(port: int, complaint: str) -> float:
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/classify",
+        data=json.dumps({"complaint": complaint}).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    start = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=120) as response:
+        response.read()
+    return time.perf_counter() - start
+
+def run_load(port: int, requests: int, concurrency: int) -> tuple:
+    # Unique texts so the result cache never answers
+    complaints = [f"{SAMPLE_COMPLAINTS[i % len(SAMPLE_COMPLAINTS)]} (ref {i})" for i in range(requests)]
+    # The workers are loaded; wait until the listening socket answers
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health/ready", timeout=5).read()
+            break
+        except OSError:
+            time.sleep(0.1)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = sorted(pool.map(lambda c: post_classify(port, c), complaints))
+    elapsed = time.perf_counter() - start
+    return requests / elapsed, latencies[len(latencies) // 2] * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-worker memory and total throughput as SERVE_WORKERS grows")
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=64, help="/classify calls per configuration")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds to wait for the workers to load")
+    args = parser.parse_args()
+
+    rows = []
+    for workers in args.workers:
+        print(f"Starting {workers} worker(s)...", flush=True)
+        proc, pids = start_server(workers, args.port, args.timeout)
+        try:
+            throughput, p50_ms = run_load(args.port, args.requests, args.concurrency)
+            memory = [memory_mb(pid) for pid in pids]
+            parent_pss = memory_mb(proc.pid)[1] if workers > 1 else 0.0
+        finally:
+            proc.send_signal(signal.SIGTERM)
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+        rss = sum(m[0] for m in memory) / len(memory)
+        pss = sum(m[1] for m in memory) / len(memory)
+        total_pss = sum(m[1] for m in memory) + parent_pss
+        rows.append((workers, rss, pss, total_pss, throughput, p50_ms))
+
+    # RSS counts shared weight pages in every worker; PSS and the total show the real footprint
+    print(f"\n{'workers':>7} {'RSS/worker MB':>14} {'PSS/worker MB':>14} {'total PSS MB':>13} {'req/s':>8} {'p50 ms':>8}")
+    for workers, rss, pss, total_pss, throughput, p50_ms in rows:
+        print(f"{workers:>7} {rss:>14.0f} {pss:>14.0f} {total_pss:>13.0f} {throughput:>8.2f} {p50_ms:>8.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Distill the cascade's n-gram classifier from logged SLM classifications (e.g. bulk_classify.py output) into cascade_model.npz."""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import minimize
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from api import CASCADE_MODEL_PATH, SEVERITY_LEVELS, CascadeClassifier, ClassificationCache, is_fallback
+
+THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.97, 0.99]
+
+def load_examples(paths: list, field: str) -> list:
+    """(complaint, categories, severity) from JSONL logs of /classify or bulk_classify results"""
+    examples = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                # bulk_classify rows are flat; request logs may nest the result
+                result = row if "categories" in row else row.get("result") or row.get("classification") or {}
+                complaint = str(row.get(field) or "")
+                categories = result.get("categories") or []
+                severity = result.get("severity")
+                if row.get("error") or not complaint or not categories or "Error" in categories:
+                    continue
+                # Keyword-fallback answers would teach the cascade the fallback heuristics
+                if is_fallback(row) or is_fallback(result):
+                    continue
+                if severity not in SEVERITY_LEVELS:
+                    continue
+                # The latest result wins for repeated complaints
+                examples[ClassificationCache.normalize(complaint)] = (complaint, sorted(set(categories)), severity)
+    return list(examples.values())
+
+def feature_matrix(texts: list, n_features: int) -> sparse.csr_matrix:
+    rows, cols, values = [], [], []
+    for row, text in enumerate(texts):
+        indices, row_values = CascadeClassifier.features(text, n_features)
+        rows.extend([row] * len(indices))
+        cols.extend(indices.tolist())
+        values.extend(row_values.tolist())
+    return sparse.csr_matrix((values, (rows, cols)), shape=(len(texts), n_features), dtype=np.float64)
+
+def fit_head(X: sparse.csr_matrix, Y: np.ndarray, softmax: bool, l2: float, max_iter: int) -> tuple:
+    """L-BFGS fit of a logistic (independent sigmoids) or softmax head; returns (weights, bias)"""
+    n, n_features = X.shape
+    k = Y.shape[1]
+    # Only hashed features seen in training get weights; the rest stay zero
+    used = np.unique(X.indices)
+    Xu = X[:, used].tocsr()
+
+    def loss_and_grad(flat):
+        W = flat[:len(used) * k].reshape(len(used), k)
+        b = flat[len(used) * k:]
+        logits = Xu @ W + b
+        if softmax:
+            logits = logits - logits.max(axis=1, keepdims=True)
+            log_probs = logits - np.log(np.exp(logits).sum(axis=1, keepdims=True))
+            loss = -(Y * log_probs).sum() / n
+            residual = (np.exp(log_probs) - Y) / n
+        else:
+            loss = (np.logaddexp(0, logits) - Y * logits).sum() / n
+            residual = (1.0 / (1.0 + np.exp(-logits)) - Y) / n
+        loss += 0.5 * l2 * (W * W).sum()
+        grad_W = Xu.T @ residual + l2 * W
+        return loss, np.concatenate([np.asarray(grad_W).ravel(), residual.sum(axis=0)])
+
+    start = np.zeros(len(used) * k + k)
+    fitted = minimize(loss_and_grad, start, jac=True, method="L-BFGS-B", options={"maxiter": max_iter})
+    weights = np.zeros((n_features, k), dtype=np.float32)
+    weights[used] = fitted.x[:len(used) * k].reshape(len(used), k)
+    return weights, fitted.x[len(used) * k:].astype(np.float32)
+
+def train(examples: list, categories: list, bits: int, l2: float, max_iter: int, threshold: float, info: dict) -> CascadeClassifier:
+    X = feature_matrix([complaint for complaint, _, _ in examples], 1 << bits)
+    category_targets = np.array([[label in labels for label in categories] for _, labels, _ in examples], dtype=np.float64)
+    severity_targets = np.array([[severity == level for level in SEVERITY_LEVELS] for _, _, severity in examples], dtype=np.float64)
+    category_weights, category_bias = fit_head(X, category_targets, softmax=False, l2=l2, max_iter=max_iter)
+    severity_weights, severity_bias = fit_head(X, severity_targets, softmax=True, l2=l2, max_iter=max_iter)
+    return CascadeClassifier(category_weights, category_bias, severity_weights, severity_bias,
+                             categories, list(SEVERITY_LEVELS), threshold, info)
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill the cascade's light classifier from logged SLM classifications")
+    parser.add_argument("logs", nargs="+", help="JSONL files of past results (e.g. scripts/bulk_classify.py output)")
+    parser.add_argument("--output", default=CASCADE_MODEL_PATH)
+    parser.add_argument("--field", default="complaint", help="Field holding the complaint text")
+    parser.add_argument("--bits", type=int, default=18, help="Hashed feature space size (2^bits)")
+    parser.add_argument("--l2", type=float, default=1e-4)
+    parser.add_argument("--max-iter", type=int, default=300)
+    parser.add_argument("--min-count", type=int, default=5, help="Categories seen fewer times are never predicted")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Share of examples held out for agreement/coverage")
+    parser.add_argument("--min-agreement", type=float, default=0.97,
+                        help="Pick the lowest threshold whose answered complaints agree with the SLM at least this often")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    examples = load_examples(args.logs, args.field)
+    label_counts = Counter(label for _, labels, _ in examples for label in labels)
+    categories = sorted(label for label, count in label_counts.items() if count >= args.min_count)
+    if len(examples) < 20 or not categories:
+        print(f"❌ Need at least 20 usable examples and one category seen {args.min_count}+ times (got {len(examples)})")
+        sys.exit(1)
+
+    random.Random(args.seed).shuffle(examples)
+    split = max(1, int(len(examples) * args.holdout))
+    held_out, training = examples[:split], examples[split:]
+    print(f"{len(examples)} examples ({len(training)} train / {len(held_out)} held out), {len(categories)} categories")
+
+    started = time.perf_counter()
+    model = train(training, categories, args.bits, args.l2, args.max_iter, threshold=1.0, info={})
+    print(f"Trained in {time.perf_counter() - started:.1f}s")
+
+    predictions = [model.predict(complaint) for complaint, _, _ in held_out]
+    agrees = np.array([
+        set(predicted["categories"]) == set(labels) and predicted["severity"] == severity
+        for (predicted, _), (_, labels, severity) in zip(predictions, held_out)
+    ])
+    confidences = np.array([confidence for _, confidence in predictions])
+
+    # coverage = share of traffic the cascade takes off the SLM; agreement is on that share only
+    print(f"\nAgreement with the SLM on all held-out complaints: {agrees.mean():.1%}")
+    print(f"\n{'threshold':>9} {'coverage':>9} {'agreement':>10}")
+    chosen = None
+    for threshold in THRESHOLDS:
+        answered = confidences >= threshold
+        agreement = agrees[answered].mean() if answered.any() else 1.0
+        print(f"{threshold:>9} {answered.mean():>9.1%} {agreement:>10.1%}")
+        if chosen is None and answered.any() and agreement >= args.min_agreement:
+            chosen = (threshold, float(answered.mean()), float(agreement))
+
+    if chosen is None:
+        print(f"\n❌ No threshold reaches {args.min_agreement:.0%} agreement; not writing {args.output}")
+        sys.exit(1)
+
+    threshold, coverage, agreement = chosen
+    info = {
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "examples": len(examples),
+        "holdout_coverage": round(coverage, 4),
+        "holdout_agreement": round(agreement, 4),
+    }
+    # The shipped model is refit on every example at the chosen threshold
+    model = train(examples, categories, args.bits, args.l2, args.max_iter, threshold, info)
+    model.save(args.output)
+    print(f"\n✅ Saved {args.output}: threshold {threshold} answers {coverage:.1%} of held-out traffic "
+          f"at {agreement:.1%} agreement with the SLM")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+"""
+Unit tests for the parts of api.py that run without the model. api is imported with its
+stores pointed at a scratch directory, so the tests never touch jobs.db or a trained cascade.
+"""
+import os
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+_scratch = tempfile.mkdtemp(prefix="complaint-api-tests-")
+os.environ.setdefault("JOBS_DB_PATH", os.path.join(_scratch, "jobs.db"))
+os.environ.setdefault("CASCADE_MODEL_PATH", os.path.join(_scratch, "cascade_model.npz"))
+os.environ.setdefault("CACHE_DB_PATH", "")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
@@ -0,0 +1,93 @@
+import time
+
+import pytest
+
+import api
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Wall clock the cache reads expiry from, moved by hand"""
+    now = [time.time()]
+    monkeypatch.setattr(api.time, "time", lambda: now[0])
+    return now
+
+
+def result(*categories):
+    return {"categories": list(categories), "severity": "Normal", "source": "model"}
+
+
+def test_get_returns_a_copy_of_what_was_put():
+    cache = api.ClassificationCache()
+    cache.put("key", result("Infrastructure"))
+    cached = cache.get("key")
+    cached["categories"].append("Harassment")
+    assert cache.get("key") == result("Infrastructure")
+    assert cache.stats()["hits"] == 2
+
+
+def test_keys_ignore_whitespace_but_not_namespace():
+    cache = api.ClassificationCache()
+    key = cache.make_key("Wifi  not working\n", "model-a|generate")
+    assert key == cache.make_key("Wifi not working", "model-a|generate")
+    assert key != cache.make_key("Wifi not working", "model-b|generate")
+    assert key != cache.make_key("Wifi not working", "model-a|score")
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = api.ClassificationCache(ttl_seconds=60)
+    cache.put("key", result("Infrastructure"))
+    clock[0] += 59
+    assert cache.get("key") is not None
+    clock[0] += 2
+    assert cache.get("key") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = api.ClassificationCache(max_entries=2)
+    cache.put("a", result("A"))
+    cache.put("b", result("B"))
+    cache.get("a")
+    cache.put("c", result("C"))
+    assert cache.get("b") is None
+    assert cache.get("a") == result("A")
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget_bounds_the_cache():
+    cache = api.ClassificationCache(max_bytes=200)
+    for index in range(10):
+        cache.put(f"key-{index}", result("Infrastructure"))
+    assert 0 < cache.stats()["bytes"] <= 200
+    assert cache.get("key-9") is not None
+
+
+def test_keyword_fallbacks_are_not_cached():
+    cache = api.ClassificationCache()
+    fallback = dict(result("Infrastructure"), source=api.FALLBACK_SOURCE)
+    cache.put("fallback", fallback)
+    cache.put_many([("model", result("Academic")), ("also-fallback", fallback)])
+    assert cache.get("fallback") is None
+    assert cache.get("also-fallback") is None
+    assert cache.get("model") == result("Academic")
+
+
+def test_persisted_entries_survive_a_restart(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    cache = api.ClassificationCache(db_path=db_path)
+    cache.put_many([("a", result("A")), ("b", result("B"))])
+    
+    restarted = api.ClassificationCache(db_path=db_path)
+    assert restarted.get("a") == result("A")
+    assert restarted.stats()["disk_hits"] == 1
+    # Now in memory as well
+    restarted.get("a")
+    assert restarted.stats()["disk_hits"] == 1
+
+
+def test_expired_rows_are_not_loaded_from_disk(tmp_path, clock):
+    db_path = str(tmp_path / "cache.db")
+    api.ClassificationCache(ttl_seconds=60, db_path=db_path).put("a", result("A"))
+    clock[0] += 61
+    assert api.ClassificationCache(ttl_seconds=60, db_path=db_path).get("a") is None
@@ -0,0 +1,89 @@
+import zlib
+
+import numpy as np
+import pytest
+
+import api
+
+N_FEATURES = 1 << 12
+
+
+def features(text):
+    return api.CascadeClassifier.features(text, N_FEATURES)
+
+
+def cascade(category_bias, severity_bias, threshold=0.9):
+    categories = ["Infrastructure", "Harassment"][:len(category_bias)]
+    return api.CascadeClassifier(
+        np.zeros((N_FEATURES, len(category_bias)), dtype=np.float32), np.array(category_bias, dtype=np.float32),
+        np.zeros((N_FEATURES, 3), dtype=np.float32), np.array(severity_bias, dtype=np.float32),
+        categories, ["Critical", "High", "Normal"], threshold, {"trained_on": 10},
+    )
+
+
+def test_features_are_hashed_into_range_and_normalized():
+    indices, values = features("The hostel wifi is not working, wifi down again")
+    assert len(set(indices.tolist())) == len(indices)
+    assert indices.min() >= 0 and indices.max() < N_FEATURES
+    assert np.linalg.norm(values) == pytest.approx(1.0)
+
+
+def test_features_ignore_case_spacing_and_unicode_width():
+    reference = features("wifi down")
+    for variant in ("WiFi   Down!", "ｗｉｆｉ ｄｏｗｎ"):
+        indices, values = features(variant)
+        assert np.array_equal(indices, reference[0]) and np.allclose(values, reference[1])
+
+
+def test_word_order_changes_the_bigram_features():
+    assert set(features("water leak")[0].tolist()) != set(features("leak water")[0].tolist())
+
+
+def test_repeated_grams_weigh_more_than_single_ones():
+    indices, values = features("wifi wifi wifi router")
+    weights = dict(zip(indices.tolist(), values.tolist()))
+    wifi = zlib.crc32(b"w:wifi") % N_FEATURES
+    router = zlib.crc32(b"w:router") % N_FEATURES
+    assert weights[wifi] > weights[router]
+
+
+def test_text_without_words_has_no_features():
+    indices, values = features("?! ...")
+    assert len(indices) == 0 and len(values) == 0
+
+
+def test_confident_predictions_are_answered_and_unsure_ones_deferred():
+    confident = cascade([6.0, -6.0], [0.0, 8.0, 0.0])
+    assert confident.classify("lights are out") == {"categories": ["Infrastructure"], "severity": "High"}
+    
+    unsure = cascade([0.5, -6.0], [0.0, 8.0, 0.0])
+    classification, confidence = unsure.predict("lights are out")
+    assert classification["categories"] == ["Infrastructure"]
+    assert confidence < 0.9
+    assert unsure.classify("lights are out") is None
+    assert unsure.stats()["deferred"] == 1 and confident.stats()["answered"] == 1
+
+
+def test_a_complaint_with_no_likely_category_still_gets_one_but_defers():
+    model = cascade([-1.0, -3.0], [0.0, 8.0, 0.0])
+    classification, confidence = model.predict("something odd")
+    assert classification["categories"] == ["Infrastructure"]
+    assert confidence < 0.5
+
+
+def test_saved_models_load_back_with_an_optional_threshold_override(tmp_path):
+    path = str(tmp_path / "cascade_model.npz")
+    model = cascade([6.0, -6.0], [0.0, 8.0, 0.0], threshold=0.8)
+    model.save(path)
+    
+    loaded = api.CascadeClassifier.load(path)
+    assert loaded.threshold == 0.8 and loaded.categories == model.categories and loaded.info == {"trained_on": 10}
+    assert loaded.predict("lights are out") == model.predict("lights are out")
+    assert api.CascadeClassifier.load(path, threshold=0.99).threshold == 0.99
+
+
+def test_missing_or_corrupt_models_disable_the_cascade(tmp_path):
+    assert api.load_cascade(str(tmp_path / "missing.npz")) is None
+    corrupt = tmp_path / "corrupt.npz"
+    corrupt.write_bytes(b"not a model")
+    assert api.load_cascade(str(corrupt)) is None
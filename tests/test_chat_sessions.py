@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+import api
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Monotonic clock the store reads idle time from, moved by hand"""
+    now = [time.monotonic()]
+    monkeypatch.setattr(api.time, "monotonic", lambda: now[0])
+    return now
+
+
+def finish_turn(store, session, cached_tokens=0):
+    """Record a turn as run_chat_turn does: history, plus a fake KV cache over cached_tokens tokens"""
+    session.messages.append({"role": "user", "content": "hi"})
+    if cached_tokens:
+        session.token_ids = list(range(cached_tokens))
+        session.past_key_values = object()
+    store.checkin(session)
+    return session
+
+
+def test_messages_without_an_id_are_one_shot():
+    store = api.ChatSessionStore()
+    session = store.checkout()
+    assert session.conversation_id is None
+    finish_turn(store, session, cached_tokens=5)
+    assert store.stats()["sessions"] == 0
+    assert store.stats()["cached_tokens"] == 0
+
+
+def test_remembered_conversations_continue_by_id():
+    store = api.ChatSessionStore()
+    first = finish_turn(store, store.checkout(remember=True))
+    assert first.conversation_id
+    again = store.checkout(first.conversation_id)
+    assert again is first and again.messages == [{"role": "user", "content": "hi"}]
+
+
+def test_a_conversation_takes_one_reply_at_a_time():
+    store = api.ChatSessionStore()
+    session = store.checkout(remember=True)
+    with pytest.raises(api.ConversationBusyError):
+        store.checkout(session.conversation_id)
+    store.checkin(session)
+    assert store.checkout(session.conversation_id) is session
+
+
+def test_least_recently_used_conversations_are_evicted_beyond_max_sessions():
+    store = api.ChatSessionStore(max_sessions=2)
+    oldest = finish_turn(store, store.checkout(remember=True))
+    middle = finish_turn(store, store.checkout(remember=True))
+    finish_turn(store, store.checkout(oldest.conversation_id))
+    finish_turn(store, store.checkout(remember=True))
+    
+    assert store.stats()["sessions"] == 2
+    assert store.stats()["evicted_sessions"] == 1
+    assert store.checkout(middle.conversation_id).messages == []  # starts over under the same id
+
+
+def test_busy_conversations_are_not_evicted():
+    store = api.ChatSessionStore(max_sessions=1)
+    busy = store.checkout(remember=True)
+    finish_turn(store, store.checkout(remember=True))
+    assert busy.conversation_id in store._sessions
+    store.checkin(busy)
+    assert store.stats()["sessions"] == 1
+
+
+def test_idle_conversations_expire(clock):
+    store = api.ChatSessionStore(ttl_seconds=60)
+    session = finish_turn(store, store.checkout(remember=True))
+    clock[0] += 61
+    finish_turn(store, store.checkout(remember=True))
+    assert session.conversation_id not in store._sessions
+    assert store.stats()["evicted_sessions"] == 1
+
+
+def test_kv_caches_are_dropped_least_recently_used_first_beyond_the_token_budget():
+    store = api.ChatSessionStore(max_cached_tokens=10)
+    first = finish_turn(store, store.checkout(remember=True), cached_tokens=6)
+    second = finish_turn(store, store.checkout(remember=True), cached_tokens=6)
+    
+    assert first.past_key_values is None and first.token_ids == []
+    assert first.messages  # history is kept; only the next prefill starts from scratch
+    assert second.past_key_values is not None
+    stats = store.stats()
+    assert (stats["cached_tokens"], stats["evicted_caches"], stats["sessions"]) == (6, 1, 2)
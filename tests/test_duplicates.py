@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+import api
+
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def result(category):
+    return {"categories": [category], "severity": "Normal", "source": "model"}
+
+
+@pytest.mark.parametrize("threshold", [-0.5, 1.5, float("nan")])
+def test_thresholds_outside_the_cosine_range_are_rejected(threshold):
+    with pytest.raises(ValueError):
+        api.DuplicateIndex(threshold=threshold)
+
+
+def test_zero_threshold_disables_the_index():
+    assert not api.DuplicateIndex(threshold=0).enabled
+    assert api.DuplicateIndex(threshold=1).enabled
+
+
+def test_close_embeddings_reuse_the_stored_classification():
+    index = api.DuplicateIndex(threshold=0.95)
+    stored = index.add(unit(1, 0, 0), "ns", "wifi down in hostel", result("Infrastructure"))
+    
+    matches = index.match(np.stack([unit(1, 0.1, 0), unit(0, 1, 0)]), "ns")
+    assert matches[0] == stored
+    assert matches[0]["duplicate_group"] == stored["duplicate_group"]
+    assert matches[1] is None
+    assert index.stats()["hits"] == 1 and index.stats()["misses"] == 1
+    
+    # Matches are copies
+    matches[0]["categories"].append("Harassment")
+    assert index.match(unit(1, 0, 0)[None], "ns")[0]["categories"] == ["Infrastructure"]
+
+
+def test_namespaces_never_share_rows_or_groups():
+    index = api.DuplicateIndex(threshold=0.95)
+    generated = index.add(unit(1, 0), "model|generate", "wifi down", result("Infrastructure"))
+    assert index.match(unit(1, 0)[None], "model|score") == [None]
+    
+    scored = index.add(unit(1, 0), "model|score", "wifi down", result("Service Issue"))
+    assert scored["duplicate_group"] != generated["duplicate_group"]
+    assert index.stats()["entries"] == 2
+    assert index.match(unit(1, 0)[None], "model|generate")[0]["categories"] == ["Infrastructure"]
+    assert index.match(unit(1, 0)[None], "model|score")[0]["categories"] == ["Service Issue"]
+
+
+def test_keyword_fallbacks_are_not_indexed():
+    index = api.DuplicateIndex(threshold=0.95)
+    fallback = dict(result("Infrastructure"), source=api.FALLBACK_SOURCE)
+    returned = index.add(unit(1, 0), "ns", "wifi down", fallback)
+    assert "duplicate_group" not in returned
+    assert index.stats()["entries"] == 0
+    assert index.match(unit(1, 0)[None], "ns") == [None]
+
+
+def test_least_recently_matched_row_is_evicted():
+    index = api.DuplicateIndex(threshold=0.95, max_entries=2)
+    index.add(unit(1, 0, 0), "ns", "a", result("A"))
+    index.add(unit(0, 1, 0), "ns", "b", result("B"))
+    index.match(unit(1, 0, 0)[None], "ns")
+    index.add(unit(0, 0, 1), "ns", "c", result("C"))
+    
+    assert index.stats()["evictions"] == 1
+    assert index.match(unit(0, 1, 0)[None], "ns") == [None]
+    assert index.match(unit(1, 0, 0)[None], "ns")[0]["categories"] == ["A"]
+
+
+def test_group_rows_points_each_embedding_at_its_first_near_duplicate():
+    index = api.DuplicateIndex(threshold=0.95)
+    vectors = np.stack([unit(1, 0), unit(0, 1), unit(1, 0.05), unit(0.05, 1), unit(1, 1)])
+    assert index.group_rows(vectors) == [0, 1, 0, 1, 4]
+
+
+def test_groups_count_matches_and_touches():
+    index = api.DuplicateIndex(threshold=0.95)
+    stored = index.add(unit(1, 0), "ns", "wifi down in hostel", result("Infrastructure"))
+    index.add(unit(0, 1), "ns", "mess food stale", result("Service Issue"))
+    index.match(unit(1, 0)[None], "ns")
+    index.touch(stored["duplicate_group"])
+    index.touch("unknown-group")
+    
+    groups = index.groups(min_count=2)
+    assert [(group["group"], group["count"], group["example"]) for group in groups] == [
+        (stored["duplicate_group"], 3, "wifi down in hostel")
+    ]
+    assert len(index.groups(min_count=1)) == 2
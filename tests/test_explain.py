@@ -0,0 +1,72 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import api
+
+occlusion_spans = api.ComplaintClassifier._occlusion_spans
+
+
+def response(categories, severity):
+    return api.ClassificationResponse(
+        categories=categories, severity=severity, anonymous_recommended=False,
+        escalation_required=severity == "Critical", route_to="Somewhere", sla_hours=24,
+    )
+
+
+def test_each_word_is_a_span_when_there_are_few_words():
+    text = "wifi  not\tworking"
+    assert [text[start:end] for start, end in occlusion_spans(text, 12)] == ["wifi", "not", "working"]
+
+
+def test_long_complaints_are_grouped_into_at_most_max_spans():
+    text = " ".join(f"w{index}" for index in range(25))
+    spans = occlusion_spans(text, 4)
+    assert len(spans) == 4
+    assert [text[start:end].split()[0] for start, end in spans] == ["w0", "w7", "w14", "w21"]
+    # Contiguous groups covering every word
+    assert " ".join(text[start:end] for start, end in spans) == text
+
+
+def test_blank_complaints_have_no_spans():
+    assert occlusion_spans("   \n", 12) == []
+    # A budget below one still gives one group
+    assert occlusion_spans("one two", 0) == [(0, 7)]
+
+
+def test_attributed_spans_become_the_triggers_in_order():
+    spans = [{"text": "Fire!", "score": 0.9}, {"text": " (lab)", "score": 0.5}, {"text": "fire", "score": 0.1}]
+    explanation = api.build_explanation(response(["Safety Hazard"], "Critical"), spans, [])
+    assert explanation.key_triggers == ["fire", "lab"]
+    assert explanation.summary_reason == "Classified as Critical due to safety hazard"
+
+
+def test_keyword_triggers_are_used_without_spans():
+    complaint = "The wifi is broken and it is unsafe, unresolved for weeks"
+    hits = api.keyword_matcher.find(complaint)
+    explanation = api.build_explanation(response(["Infrastructure or Facility Issue"], "High"), [], hits)
+    assert explanation.key_triggers == ["unresolved", "weeks", "wifi", "broken"]
+    assert explanation.summary_reason.startswith("Classified as High - infrastructure or facility issue")
+
+
+def test_triggers_are_capped_and_never_empty():
+    spans = [{"text": f"word{index}", "score": 1.0} for index in range(10)]
+    assert len(api.build_explanation(response(["HR"], "Normal"), spans, []).key_triggers) == api.MAX_KEY_TRIGGERS
+    assert api.build_explanation(response(["HR"], "Normal"), [], []).key_triggers == ["general complaint indicators"]
+
+
+def test_fallback_answers_are_explained_without_a_model_pass(monkeypatch):
+    fallback = {"categories": ["Safety Hazard"], "severity": "Critical", "source": api.FALLBACK_SOURCE}
+    
+    async def base_classification(complaint, mode=None):
+        return fallback
+    
+    def no_model_work(*args, **kwargs):
+        raise AssertionError("attribution was queued for a fallback answer")
+    
+    monkeypatch.setattr(api, "classifier", SimpleNamespace(cache_namespace="test"))
+    monkeypatch.setattr(api, "get_base_classification", base_classification)
+    monkeypatch.setattr(api.scheduler, "submit_call", no_model_work)
+    result, spans = asyncio.run(api.get_explained_classification("fire in the lab", "generate"))
+    assert result == fallback and spans == []
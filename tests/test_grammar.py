@@ -0,0 +1,98 @@
+import json
+
+import pytest
+import torch
+
+import api
+
+GRAMMAR = api.JsonOutputGrammar()
+
+# A toy vocabulary: grammar pieces, whitespace runs and free text (id 0 is EOS). Like real
+# vocabularies it has every single character, so any valid prefix can be completed
+VOCAB = [
+    None, '{"', '"categories"', '":', "  ", "\n", ' [', '["', "],", ' "', '","', ", ", "Infra", "structure",
+    "Harass", "ment", 'ment"', '"severity"', "Critical", "High", "Normal", "Norm", 'al"', '"}', "} ", "x" * 70,
+] + sorted(set('{}[]":, ' + "categoriesverityCriticalHighNormal"))
+
+
+def final_phase(text):
+    state = GRAMMAR.feed(GRAMMAR.INITIAL, text)
+    return state[0] if state is not None else None
+
+
+@pytest.mark.parametrize("text", [
+    '{"categories":["Infrastructure"],"severity":"High"}',
+    '{"categories": ["Infrastructure", "Harassment"], "severity": "Critical"}',
+    '{"categories": [], "severity": "Normal"}',
+])
+def test_valid_answers_complete(text):
+    assert final_phase(text) == "done"
+
+
+@pytest.mark.parametrize("text", [
+    ' {"categories": []',                          # space before the object
+    '{"categories":  []',                          # run of spaces
+    '{"categories":\n[]',                          # newline
+    '{ "categories": []',                          # space where none is allowed
+    '{"categories": ["Infrastructure" ]',          # space before ']'
+    '{"categories": [""]',                         # empty category
+    '{"categories": [], "severity": "Low"}',       # unknown severity
+    '{"categories": [], "severity": "High"} ',     # anything after the close
+])
+def test_invalid_answers_are_rejected(text):
+    assert final_phase(text) is None
+
+
+def test_category_text_and_count_are_capped():
+    too_long = '{"categories": ["' + "x" * (GRAMMAR.MAX_CATEGORY_CHARS + 1)
+    assert final_phase(too_long) is None
+    
+    full = '{"categories": [' + ", ".join(['"c"'] * GRAMMAR.MAX_CATEGORIES)
+    assert final_phase(full) == "after_item"
+    assert final_phase(full + ', "c"') is None
+
+
+def brute_force_mask(state):
+    return torch.tensor([bool(text) and GRAMMAR.feed(state, text) is not None for text in VOCAB])
+
+
+@pytest.mark.parametrize("prefix", [
+    "",
+    '{"categories":',
+    '{"categories": ',
+    '{"categories": [',
+    '{"categories": ["',
+    '{"categories": ["Infra',
+    '{"categories": ["Infrastructure"',
+    '{"categories": ["Infrastructure"]',
+    '{"categories": [], "severity": "Norm',
+    '{"categories": [], "severity": "Normal"}',
+])
+def test_index_masks_match_feeding_every_token(prefix):
+    index = api.GrammarTokenIndex(GRAMMAR, VOCAB)
+    state = GRAMMAR.feed(GRAMMAR.INITIAL, prefix)
+    assert torch.equal(index.mask(state), brute_force_mask(state))
+    # Served from the precomputed masks the second time
+    assert torch.equal(index.mask(state), brute_force_mask(state))
+
+
+def test_constrained_greedy_decoding_always_parses():
+    index = api.GrammarTokenIndex(GRAMMAR, VOCAB)
+    generator = torch.Generator().manual_seed(0)
+    for _ in range(20):
+        prompt = [1, 2]
+        processor = api.JsonGrammarLogitsProcessor(index, eos_token_id=0, prompt_length=len(prompt))
+        input_ids = torch.tensor([prompt])
+        # Category text alone may run MAX_CATEGORIES * MAX_CATEGORY_CHARS single-character tokens
+        for _ in range(1000):
+            scores = processor(input_ids, torch.randn(1, len(VOCAB), generator=generator))
+            token_id = int(scores[0].argmax())
+            if token_id == 0:
+                break
+            input_ids = torch.cat([input_ids, torch.tensor([[token_id]])], dim=1)
+        assert token_id == 0
+        
+        text = "".join(VOCAB[token_id] for token_id in input_ids[0, len(prompt):].tolist())
+        answer = json.loads(text)
+        assert answer["severity"] in api.SEVERITY_LEVELS
+        assert isinstance(answer["categories"], list)
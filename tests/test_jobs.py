@@ -0,0 +1,131 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+import api
+
+
+@pytest.fixture
+def store(tmp_path):
+    return api.JobStore(str(tmp_path / "jobs.db"))
+
+
+def queued_job(store, complaints, mode="generate"):
+    job_id = store.create(mode)
+    store.add_items(job_id, 0, [(f"ref-{idx}", complaint) for idx, complaint in enumerate(complaints)])
+    store.enqueue(job_id, len(complaints))
+    return job_id
+
+
+def set_owner(store, job_id, pid):
+    store._conn().execute("UPDATE jobs SET owner_pid = ? WHERE id = ?", (pid, job_id))
+    store._conn().commit()
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_uploading_jobs_are_not_claimed(store):
+    job_id = store.create("generate")
+    store.add_items(job_id, 0, [(None, "wifi down")])
+    assert store.get(job_id)["status"] == "uploading"
+    assert store.claim_next() is None
+
+
+def test_a_job_runs_to_completion(store):
+    job_id = queued_job(store, ["wifi down", "mess food stale", "lab fire"])
+    job = store.claim_next()
+    assert (job["job_id"], job["status"], job["total"], job["done"]) == (job_id, "running", 3, 0)
+    assert store.claim_next() is None
+    
+    assert store.pending_items(job_id, 2) == [(0, "wifi down"), (1, "mess food stale")]
+    store.save_results(job_id, [(0, json.dumps({"categories": ["Infrastructure"]}), None), (1, None, "model failed")])
+    assert store.pending_items(job_id, 10) == [(2, "lab fire")]
+    store.save_results(job_id, [(2, json.dumps({"categories": ["Safety Hazard"]}), None)])
+    store.finish(job_id, "completed")
+    
+    job = store.get(job_id)
+    assert (job["status"], job["done"], job["failed"], job["progress"]) == ("completed", 3, 1, 1.0)
+    assert store.results(job_id, offset=1, limit=1) == [
+        {"index": 1, "id": "ref-1", "complaint": "mess food stale", "error": "model failed"}
+    ]
+    assert [item["result"]["categories"] for item in store.results(job_id) if "result" in item] == [
+        ["Infrastructure"], ["Safety Hazard"]
+    ]
+
+
+def test_oldest_queued_job_is_claimed_first(store):
+    first = queued_job(store, ["a"])
+    second = queued_job(store, ["b"])
+    assert store.claim_next()["job_id"] == first
+    assert store.claim_next()["job_id"] == second
+
+
+def test_running_jobs_resume_after_a_restart(store):
+    job_id = queued_job(store, ["a", "b"])
+    store.claim_next()
+    store.save_results(job_id, [(0, json.dumps({}), None)])
+    
+    # Same pid, but this process no longer runs it (the store was reopened)
+    store.open_db()
+    resumed = store.claim_next()
+    assert resumed["job_id"] == job_id and resumed["done"] == 1
+    assert store.pending_items(job_id, 10) == [(1, "b")]
+
+
+def test_jobs_of_a_dead_owner_are_reclaimed_but_live_ones_are_not(store):
+    job_id = queued_job(store, ["a"])
+    store.claim_next()
+    store.release(job_id)
+    
+    set_owner(store, job_id, os.getppid())
+    assert store.claim_next() is None
+    set_owner(store, job_id, dead_pid())
+    assert store.claim_next()["job_id"] == job_id
+
+
+def test_cancelled_jobs_stay_cancelled(store):
+    job_id = queued_job(store, ["a"])
+    store.claim_next()
+    assert store.cancel(job_id)["status"] == "cancelled"
+    store.finish(job_id, "completed")
+    assert store.get(job_id)["status"] == "cancelled"
+    assert store.claim_next() is None
+    
+    finished = queued_job(store, ["b"])
+    store.claim_next()
+    store.finish(finished, "completed")
+    assert store.cancel(finished)["status"] == "completed"
+
+
+def test_purge_removes_only_old_finished_jobs(store):
+    finished = queued_job(store, ["a"])
+    store.claim_next()
+    store.finish(finished, "completed")
+    running = queued_job(store, ["b"])
+    store.claim_next()
+    
+    assert store.purge(older_than_seconds=3600) == 0
+    assert store.purge(older_than_seconds=-1) == 1
+    assert store.get(finished) is None
+    assert store.results(finished) == []
+    assert store.get(running)["status"] == "running"
+
+
+def test_async_callers_run_store_methods_on_the_store_thread(store):
+    job_id = store.create("score")
+    
+    async def fetch():
+        return await store.run(lambda: (threading.current_thread().name, store.get(job_id)))
+    
+    thread_name, job = asyncio.run(fetch())
+    assert thread_name.startswith("job-store")
+    assert job["mode"] == "score"
@@ -0,0 +1,53 @@
+import api
+
+TABLES = {
+    ("category", "Network"): ["wifi", "net*"],
+    ("category", "Cooling"): ["air conditioning"],
+    ("category", "Air"): ["air"],
+    ("severity", "Critical"): ["fire", "fire*"],
+}
+
+
+def matcher():
+    return api.KeywordMatcher(TABLES)
+
+
+def test_terms_match_whole_words_only():
+    hits = matcher().find("The WiFi is down, swifi and wifis are not terms")
+    assert [(hit.text, hit.start, hit.end) for hit in hits] == [("wifi", 4, 8)]
+
+
+def test_stems_match_any_ending():
+    texts = [hit.text for hit in matcher().find("network, nets and internet")]
+    assert texts == ["network", "nets"]
+
+
+def test_phrases_span_any_whitespace_and_carry_overlapped_tags():
+    hits = matcher().find("No air\n  conditioning since Monday, the air is stale")
+    assert [hit.text for hit in hits] == ["air conditioning", "air"]
+    assert set(hits[0].tags) == {("category", "Cooling"), ("category", "Air")}
+    assert hits[1].tags == (("category", "Air"),)
+
+
+def test_a_term_listed_exactly_and_as_a_stem_is_tagged_once():
+    hits = matcher().find("fire in the lab, fires everywhere")
+    assert [hit.tags for hit in hits] == [(("severity", "Critical"),)] * 2
+
+
+def test_find_many_matches_find_per_text():
+    texts = ["wifi and net", "", "air conditioning on fire", "nothing here"]
+    keywords = matcher()
+    assert keywords.find_many(texts) == [keywords.find(text) for text in texts]
+
+
+def test_values_and_triggers_keep_first_hit_order():
+    keywords = matcher()
+    hits = keywords.find("net down, fire near the air conditioning, wifi dead, network too")
+    assert keywords.values(hits, "category") == ["Network", "Air", "Cooling"]
+    assert keywords.triggers(hits, "category", "Network") == ["net", "wifi", "network"]
+    assert keywords.triggers(hits, "severity", "Critical") == ["fire"]
+
+
+def test_builtin_tables_drive_the_fallback_categories():
+    hits = api.keyword_matcher.find("I was harassed near the broken water cooler")
+    assert api.KeywordMatcher.values(hits, "fallback_category") == ["Harassment", "Infrastructure"]
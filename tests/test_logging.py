@@ -0,0 +1,60 @@
+import json
+import logging
+import random
+import sys
+
+import pytest
+
+import api
+
+
+def record(level=logging.INFO, message="[CLASSIFY] Done in %d ms", args=(12,), exc_info=None):
+    return logging.LogRecord("complaint_api", level, __file__, 1, message, args, exc_info)
+
+
+def kept(sampling_filter, level, count=2000):
+    return sum(sampling_filter.filter(record(level)) for _ in range(count))
+
+
+def test_sampling_keeps_about_the_configured_share():
+    random.seed(1234)
+    share = kept(api.SamplingFilter(0.1), logging.INFO, 5000) / 5000
+    assert share == pytest.approx(0.1, abs=0.02)
+
+
+@pytest.mark.parametrize("rate, expected", [(0.0, 0), (1.0, 500), (2.0, 500)])
+def test_sampling_bounds(rate, expected):
+    assert kept(api.SamplingFilter(rate), logging.INFO, 500) == expected
+
+
+@pytest.mark.parametrize("level", [logging.WARNING, logging.ERROR, logging.CRITICAL])
+def test_warnings_and_above_are_always_kept(level):
+    assert kept(api.SamplingFilter(0.0), level, 200) == 200
+
+
+def test_json_lines_carry_level_pid_tag_and_message():
+    entry = json.loads(api.JsonLogFormatter().format(record()))
+    assert entry["level"] == "info"
+    assert entry["tag"] == "CLASSIFY"
+    assert entry["message"] == "Done in 12 ms"
+    assert isinstance(entry["pid"], int) and isinstance(entry["ts"], float)
+    assert "exc" not in entry
+
+
+def test_untagged_messages_keep_their_text_and_unicode():
+    entry = json.loads(api.JsonLogFormatter().format(record(message="wifi कमरा [not a tag]", args=())))
+    assert "tag" not in entry
+    assert entry["message"] == "wifi कमरा [not a tag]"
+
+
+def test_exceptions_are_serialized_with_their_traceback():
+    try:
+        raise ValueError("bad output")
+    except ValueError:
+        exc_info = sys.exc_info()
+    line = api.JsonLogFormatter().format(record(logging.ERROR, "[PARSE] Failed", (), exc_info))
+    assert "\n" not in line
+    entry = json.loads(line)
+    assert entry["level"] == "error" and entry["tag"] == "PARSE"
+    assert entry["exc"].startswith("Traceback (most recent call last):")
+    assert entry["exc"].endswith("ValueError: bad output")
@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+
+import api
+
+
+def test_counters_render_labels_with_escaping():
+    counter = api.CounterMetric("demo_total", "Demo counter", ("path",))
+    counter.inc(path='/a"b\\c\nd')
+    counter.inc(2, path="/plain")
+    counter.inc(path="/plain")
+    assert counter.render() == [
+        "# HELP demo_total Demo counter",
+        "# TYPE demo_total counter",
+        'demo_total{path="/a\\"b\\\\c\\nd"} 1',
+        'demo_total{path="/plain"} 3',
+    ]
+
+
+def test_unlabelled_counters_render_a_bare_sample():
+    counter = api.CounterMetric("plain_total", "Plain")
+    assert counter.render()[2:] == []
+    counter.inc(0.5)
+    assert counter.render()[2:] == ["plain_total 0.5"]
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    histogram = api.HistogramMetric("latency_seconds", "Latency", (1, 0.1), ("stage",))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, stage="decode")
+    assert histogram.render() == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{stage="decode",le="0.1"} 2',
+        'latency_seconds_bucket{stage="decode",le="1"} 3',
+        'latency_seconds_bucket{stage="decode",le="+Inf"} 4',
+        'latency_seconds_sum{stage="decode"} 3.650000',
+        'latency_seconds_count{stage="decode"} 4',
+    ]
+
+
+def test_registry_renders_metrics_then_gauges_and_skips_failing_gauges():
+    registry = api.MetricsRegistry()
+    registry.counter("requests_total", "Requests").inc()
+    registry.gauge("queue_depth", "Depth", lambda: 3)
+    registry.gauge("broken", "Raises", lambda: 1 / 0)
+    text = registry.render()
+    assert text.endswith("\n")
+    assert text.splitlines() == [
+        "# HELP requests_total Requests",
+        "# TYPE requests_total counter",
+        "requests_total 1",
+        "# HELP queue_depth Depth",
+        "# TYPE queue_depth gauge",
+        "queue_depth 3",
+    ]
+
+
+def slow_work(seconds):
+    time.sleep(seconds)
+
+
+def profile(profiler, seconds, label):
+    """One request that spends `seconds` in slow_work on a worker thread"""
+    started = profiler.request_started()
+    worker = threading.Thread(target=slow_work, args=(seconds,), name="request-worker")
+    worker.start()
+    worker.join()
+    profiler.request_finished(started, label)
+
+
+def test_profiler_disabled_at_zero_threshold(tmp_path):
+    assert not api.SlowRequestProfiler(0, output_dir=str(tmp_path)).enabled
+
+
+def test_slow_requests_are_written_as_collapsed_stacks(tmp_path):
+    profiler = api.SlowRequestProfiler(50, interval_ms=2, output_dir=str(tmp_path))
+    profile(profiler, 0.2, "POST /classify")
+    
+    files = os.listdir(tmp_path)
+    assert len(files) == 1 and files[0].endswith("-POST_classify.folded")
+    with open(tmp_path / files[0], encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert all(int(line.rsplit(" ", 1)[1]) > 0 for line in lines)
+    assert any(line.startswith("request-worker;") and "slow_work (test_metrics.py:" in line for line in lines)
+    assert profiler.profiles_written == 1
+
+
+def test_fast_requests_are_not_written(tmp_path):
+    profiler = api.SlowRequestProfiler(10_000, interval_ms=2, output_dir=str(tmp_path))
+    profile(profiler, 0.02, "GET /health")
+    assert os.listdir(tmp_path) == []
+    assert profiler.profiles_written == 0
+
+
+def test_profile_files_are_capped_at_max_files(tmp_path):
+    profiler = api.SlowRequestProfiler(20, interval_ms=2, output_dir=str(tmp_path), max_files=2)
+    for index in range(3):
+        profile(profiler, 0.05, f"request-{index}")
+    assert profiler.profiles_written == 3
+    assert len(os.listdir(tmp_path)) == 2
@@ -0,0 +1,88 @@
+import copy
+import json
+import os
+
+import api
+
+
+def write_policy(path, config, mtime):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(config, f)
+    os.utime(path, (mtime, mtime))
+
+
+def test_first_matching_rule_wins_across_categories():
+    policy = api.RoutingPolicy(api.DEFAULT_POLICY)
+    assert policy.route_to(["Service Issue", "Sexual Harassment"]) == "Internal Complaints Committee"
+    assert policy.route_to(["Infrastructure or Facility Issue"]) == "Operations / Facilities Management"
+    # Rule keywords match inside free-form category text, case-insensitively
+    assert policy.route_to(["possible fraud in billing"]) == "Vigilance / Ethics Office"
+    assert policy.route_to(["Something else", "Other"]) == api.DEFAULT_POLICY["default_department"]
+    assert policy.route_to([]) == api.DEFAULT_POLICY["default_department"]
+
+
+def test_sla_escalation_and_sensitivity():
+    policy = api.RoutingPolicy(api.DEFAULT_POLICY)
+    assert [policy.sla(severity) for severity in ("Critical", "High", "Normal", "Unknown")] == [24, 72, 168, 168]
+    assert policy.escalation_required("Critical") and not policy.escalation_required("High")
+    assert policy.sensitive(["Service Issue", "Retaliation by manager"])
+    assert not policy.sensitive(["Service Issue"])
+
+
+def test_evaluate_many_defaults_missing_fields():
+    policy = api.RoutingPolicy(api.DEFAULT_POLICY)
+    evaluated = policy.evaluate_many([{"categories": ["Fraud"], "severity": "Critical"}, {}])
+    assert evaluated == [
+        {"route_to": "Vigilance / Ethics Office", "sla_hours": 24, "escalation_required": True, "sensitive": True},
+        {"route_to": api.DEFAULT_POLICY["default_department"], "sla_hours": 168,
+         "escalation_required": False, "sensitive": False},
+    ]
+
+
+def test_built_in_rules_match_the_shipped_policy_file():
+    with open(os.path.join(os.path.dirname(api.__file__), "policy.json"), encoding="utf-8") as f:
+        assert json.load(f) == api.DEFAULT_POLICY
+
+
+def test_store_reloads_when_the_file_changes(tmp_path):
+    path = str(tmp_path / "policy.json")
+    write_policy(path, api.DEFAULT_POLICY, 1000)
+    store = api.PolicyStore(path, poll_seconds=0)
+    assert store.stats()["source"] == path
+    assert not store.reload()
+    
+    changed = copy.deepcopy(api.DEFAULT_POLICY)
+    changed["default_department"] = "Front Desk"
+    write_policy(path, changed, 2000)
+    assert store.reload()
+    assert store.current.route_to([]) == "Front Desk"
+    assert store.reloads == 2
+
+
+def test_a_broken_file_keeps_the_current_policy_until_it_changes(tmp_path):
+    path = str(tmp_path / "policy.json")
+    write_policy(path, api.DEFAULT_POLICY, 1000)
+    store = api.PolicyStore(path, poll_seconds=0)
+    loaded = store.current
+    
+    broken = copy.deepcopy(api.DEFAULT_POLICY)
+    del broken["sla_hours"]
+    write_policy(path, broken, 2000)
+    assert not store.reload()
+    assert not store.reload()  # not retried for the same mtime
+    assert store.current is loaded
+    assert store.reload_errors == 1
+    assert "sla_hours" in store.last_error
+
+
+def test_missing_file_falls_back_to_built_in_rules(tmp_path):
+    path = str(tmp_path / "policy.json")
+    store = api.PolicyStore(path, poll_seconds=0)
+    assert store.stats()["source"] == "built-in"
+    assert store.current.route_to(["Fraud"]) == "Vigilance / Ethics Office"
+    assert not store.reload()
+    assert store.reload_errors == 1
+    
+    write_policy(path, api.DEFAULT_POLICY, 1000)
+    assert store.reload()
+    assert store.stats()["source"] == path
@@ -0,0 +1,82 @@
+import threading
+from collections import OrderedDict
+
+import pytest
+
+import api
+
+
+class StubTokenizer:
+    """One token per character; records every batch it is asked to tokenize"""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def __call__(self, texts, add_special_tokens=True, truncation=False, max_length=None):
+        self.calls.append(list(texts))
+        encoded = [[ord(ch) for ch in text] for text in texts]
+        if truncation:
+            encoded = [ids[:max_length] for ids in encoded]
+        return {"input_ids": encoded}
+
+
+@pytest.fixture
+def classifier(monkeypatch):
+    monkeypatch.setattr(api, "MAX_COMPLAINT_TOKENS", 5)
+    clf = object.__new__(api.ComplaintClassifier)
+    clf.tokenizer = StubTokenizer()
+    clf._complaint_ids = OrderedDict()
+    clf._complaint_ids_lock = threading.Lock()
+    return clf
+
+
+def ids(text):
+    return [ord(ch) for ch in text]
+
+
+def test_over_length_complaints_are_cut_and_counted(classifier):
+    truncated_before = api.TRUNCATED_COMPLAINTS._values.get((), 0)
+    encoded = classifier._encode_complaints(["short", "much too long", "abcdef"])
+    assert encoded == [ids("short"), ids("much "), ids("abcde")]
+    assert api.TRUNCATED_COMPLAINTS._values.get((), 0) == truncated_before + 2
+
+
+def test_no_budget_means_no_cut(classifier, monkeypatch):
+    monkeypatch.setattr(api, "MAX_COMPLAINT_TOKENS", 0)
+    assert classifier._encode_complaints(["much too long"]) == [ids("much too long")]
+
+
+def test_repeated_complaints_are_tokenized_once(classifier):
+    first = classifier._encode_complaints(["wifi", "food", "wifi"])
+    assert classifier.tokenizer.calls == [["wifi", "food"]]
+    
+    second = classifier._encode_complaints(["food", "lab fire", "wifi"])
+    assert classifier.tokenizer.calls[1:] == [["lab fire"]]
+    assert first == [ids("wifi"), ids("food"), ids("wifi")]
+    assert second == [ids("food"), ids("lab f"), ids("wifi")]
+    
+    # Repeats are served again and truncation is only counted when tokenizing
+    truncated_before = api.TRUNCATED_COMPLAINTS._values.get((), 0)
+    classifier._encode_complaints(["lab fire"])
+    assert len(classifier.tokenizer.calls) == 2
+    assert api.TRUNCATED_COMPLAINTS._values.get((), 0) == truncated_before
+
+
+def test_callers_get_copies_of_the_remembered_ids(classifier):
+    classifier._encode_complaints(["wifi"])[0].append(0)
+    assert classifier._encode_complaints(["wifi"]) == [ids("wifi")]
+
+
+def test_the_remembered_complaints_are_bounded(classifier, monkeypatch):
+    monkeypatch.setattr(api, "COMPLAINT_IDS_CACHE_SIZE", 2)
+    classifier._encode_complaints(["a", "b"])
+    classifier._encode_complaints(["a"])  # "b" is now least recently used
+    classifier._encode_complaints(["c"])
+    assert list(classifier._complaint_ids) == ["a", "c"]
+
+
+def test_length_buckets_reuse_the_remembered_ids(classifier):
+    complaints = ["medium", "a", "much too long", "abc"]
+    assert classifier.bucket_by_length(complaints, chunk_size=2) == [[1, 3], [0, 2]]
+    classifier._encode_complaints(complaints)
+    assert len(classifier.tokenizer.calls) == 1
@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import api
+
+
+class FakeClassifier:
+    """Answers every complaint with its own text and records each batch it was given"""
+    
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.batches = []
+    
+    def classify_with_mode(self, complaints, mode, duplicates=None):
+        self.batches.append((list(complaints), mode))
+        if self.fail:
+            raise RuntimeError("model failed")
+        return [{"complaint": complaint, "mode": mode} for complaint in complaints]
+
+
+def hold_worker(scheduler):
+    """Occupy the worker until the returned event is set, so later work queues up"""
+    started, release = threading.Event(), threading.Event()
+    
+    def blocker():
+        started.set()
+        release.wait(5)
+    
+    scheduler.submit_call(blocker)
+    assert started.wait(5)
+    return release
+
+
+def test_concurrent_complaints_share_one_pass():
+    classifier = FakeClassifier()
+    scheduler = api.MicroBatchScheduler(classifier, max_batch_size=8, max_wait_ms=50)
+    release = hold_worker(scheduler)
+    futures = [scheduler.submit(f"complaint {i}") for i in range(3)]
+    release.set()
+    
+    results = [future.result(timeout=5) for future in futures]
+    assert [result["complaint"] for result in results] == ["complaint 0", "complaint 1", "complaint 2"]
+    assert classifier.batches == [(["complaint 0", "complaint 1", "complaint 2"], "generate")]
+
+
+def test_batches_are_capped_at_max_batch_size():
+    classifier = FakeClassifier()
+    scheduler = api.MicroBatchScheduler(classifier, max_batch_size=2, max_wait_ms=50)
+    release = hold_worker(scheduler)
+    futures = [scheduler.submit(f"complaint {i}") for i in range(5)]
+    release.set()
+    
+    for future in futures:
+        future.result(timeout=5)
+    assert [len(complaints) for complaints, _ in classifier.batches] == [2, 2, 1]
+
+
+def test_modes_are_classified_in_separate_passes():
+    classifier = FakeClassifier()
+    scheduler = api.MicroBatchScheduler(classifier, max_batch_size=8, max_wait_ms=50)
+    release = hold_worker(scheduler)
+    generated = scheduler.submit("a", "generate")
+    scored = scheduler.submit("b", "score")
+    release.set()
+    
+    assert generated.result(timeout=5)["mode"] == "generate"
+    assert scored.result(timeout=5)["mode"] == "score"
+    assert sorted(classifier.batches) == [(["a"], "generate"), (["b"], "score")]
+
+
+def test_a_failed_pass_fails_every_complaint_in_it():
+    scheduler = api.MicroBatchScheduler(FakeClassifier(fail=True), max_batch_size=8, max_wait_ms=50)
+    release = hold_worker(scheduler)
+    futures = [scheduler.submit(f"complaint {i}") for i in range(2)]
+    release.set()
+    
+    for future in futures:
+        with pytest.raises(RuntimeError, match="model failed"):
+            future.result(timeout=5)
+
+
+def counter_value(counter):
+    return counter._values.get((), 0)
+
+
+def test_new_work_beyond_the_queue_limit_is_rejected():
+    scheduler = api.MicroBatchScheduler(FakeClassifier(), max_queue_size=2)
+    release = hold_worker(scheduler)
+    rejected_before = counter_value(api.QUEUE_REJECTED)
+    futures = [scheduler.submit("a"), scheduler.submit("b")]
+    with pytest.raises(api.QueueFullError) as excinfo:
+        scheduler.submit("c")
+    assert excinfo.value.retry_after >= 1
+    assert scheduler.rejected == 1
+    assert counter_value(api.QUEUE_REJECTED) == rejected_before + 1
+    
+    # Continuations of admitted work are never turned away
+    continuation = scheduler.submit_call(lambda: "next slice", continuation=True)
+    release.set()
+    assert continuation.result(timeout=5) == "next slice"
+    for future in futures:
+        future.result(timeout=5)
+
+
+def test_work_past_its_deadline_is_dropped_unrun():
+    classifier = FakeClassifier()
+    scheduler = api.MicroBatchScheduler(classifier)
+    release = hold_worker(scheduler)
+    expired_before = counter_value(api.QUEUE_EXPIRED)
+    late = scheduler.submit("late", deadline=time.monotonic() - 1)
+    on_time = scheduler.submit("on time")
+    release.set()
+    
+    with pytest.raises(api.DeadlineExceededError):
+        late.result(timeout=5)
+    assert on_time.result(timeout=5)["complaint"] == "on time"
+    assert classifier.batches == [(["on time"], "generate")]
+    assert scheduler.expired == 1
+    assert counter_value(api.QUEUE_EXPIRED) == expired_before + 1
+
+
+def test_cancelled_work_is_skipped():
+    classifier = FakeClassifier()
+    scheduler = api.MicroBatchScheduler(classifier)
+    release = hold_worker(scheduler)
+    cancelled = scheduler.submit("cancelled")
+    assert cancelled.cancel()
+    kept = scheduler.submit("kept")
+    release.set()
+    
+    kept.result(timeout=5)
+    assert classifier.batches == [(["kept"], "generate")]
+    assert scheduler.expired == 0
+
+
+def test_waiting_past_the_deadline_cancels_the_work():
+    scheduler = api.MicroBatchScheduler(FakeClassifier())
+    release = hold_worker(scheduler)
+    deadline = time.monotonic() + 0.05
+    future = scheduler.submit("slow", deadline=deadline)
+    with pytest.raises(api.DeadlineExceededError):
+        asyncio.run(api._await_result(future, deadline))
+    assert future.cancelled()
+    release.set()
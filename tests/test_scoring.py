@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+import pytest
+import torch
+
+import api
+
+
+VOCAB_SIZE = 256
+
+
+class StubTokenizer:
+    """One token per character"""
+    
+    pad_token_id = 0
+    
+    def encode(self, text, add_special_tokens=True):
+        return [ord(ch) for ch in text]
+
+
+class UniformModel:
+    """Every next token is equally likely, whatever the input"""
+    
+    device = torch.device("cpu")
+    
+    def __call__(self, input_ids, attention_mask, past_key_values=None):
+        rows, width = input_ids.shape
+        return SimpleNamespace(logits=torch.zeros(rows, width, VOCAB_SIZE))
+
+
+@pytest.fixture
+def classifier():
+    clf = object.__new__(api.ComplaintClassifier)
+    clf.tokenizer = StubTokenizer()
+    clf.model = UniformModel()
+    clf.supports_kv_reuse = False
+    return clf
+
+
+def test_equally_likely_labels_of_different_lengths_get_equal_scores(classifier):
+    probs = classifier._label_probabilities(classifier.tokenizer.encode('{"severity": "'), ["low", "critical"])
+    assert probs == {"low": 0.5, "critical": 0.5}
+
+
+def test_label_scores_still_sum_to_one(classifier):
+    probs = classifier._label_probabilities([1, 2, 3], api.CATEGORY_LABELS)
+    assert sum(probs.values()) == pytest.approx(1.0, abs=1e-3)
+    assert len(set(probs.values())) == 1